@@ -0,0 +1,60 @@
+"""Compare `trim_prompt` against the previous recursive implementation.
+
+Run from the repository root with `python -m benchmarks.trim_prompt_benchmark`.
+"""
+import random
+import timeit
+
+from deep_research_py.ai.providers import MIN_CHUNK_SIZE, encoder, trim_prompt
+from deep_research_py.ai.text_splitter import RecursiveCharacterTextSplitter
+
+
+def trim_prompt_recursive(prompt: str, context_size: int) -> str:
+    """The recursive estimate-and-split implementation `trim_prompt` replaced."""
+    if not prompt:
+        return ""
+
+    length = len(encoder.encode(prompt))
+    if length <= context_size:
+        return prompt
+
+    overflow_tokens = length - context_size
+    chunk_size = len(prompt) - overflow_tokens * 3
+    if chunk_size < MIN_CHUNK_SIZE:
+        return prompt[:MIN_CHUNK_SIZE]
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=0)
+
+    trimmed_prompt = splitter.split_text(prompt)[0] if splitter.split_text(prompt) else ""
+
+    if len(trimmed_prompt) == len(prompt):
+        return trim_prompt_recursive(prompt[:chunk_size], context_size)
+
+    return trim_prompt_recursive(trimmed_prompt, context_size)
+
+
+def make_learnings(n_tokens: int, seed: int = 0) -> str:
+    """Build a learnings-style prompt of roughly `n_tokens` tokens."""
+    rng = random.Random(seed)
+    words = [
+        "supplier", "facility", "chemical", "rail", "truck", "polymer", "Sauget",
+        "additive", "2023", "capacity", "tons", "terminal", "lubricant", "barge",
+    ]
+    learnings = []
+    while len(encoder.encode("\n".join(learnings))) < n_tokens:
+        for _ in range(500):
+            sentence = " ".join(rng.choice(words) for _ in range(rng.randint(8, 25)))
+            learnings.append(f"<learning>\n{sentence.capitalize()}.\n</learning>")
+    return "\n".join(learnings)
+
+
+if __name__ == "__main__":
+    for total, budget in [(30_000, 25_000), (200_000, 150_000)]:
+        prompt = make_learnings(total)
+        for name, fn in [("recursive", trim_prompt_recursive), ("single-pass", trim_prompt)]:
+            result = fn(prompt, budget)
+            seconds = min(timeit.repeat(lambda: fn(prompt, budget), number=1, repeat=3))
+            print(
+                f"{name:>12} {total:>7} -> {budget:>7} tokens: {seconds * 1000:8.1f} ms, "
+                f"kept {len(encoder.encode(result))} tokens"
+            )
@@ -0,0 +1,132 @@
+import json
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from deep_research_py.ai.providers import encoder
+
+
+@dataclass
+class LLMCall:
+    """One LLM call, attributed to the pipeline stage that issued it."""
+
+    stage: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency: float
+    cached: bool = False
+
+
+class RunAccounting:
+    """Collects every LLM call made during a run and aggregates them."""
+
+    def __init__(self):
+        self.calls: List[LLMCall] = []
+        self._lock = threading.Lock()
+
+    def record(self, call: LLMCall) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+    @property
+    def total_tokens(self) -> int:
+        with self._lock:
+            return sum(c.prompt_tokens + c.completion_tokens for c in self.calls)
+
+    @staticmethod
+    def _aggregate(calls: List[LLMCall]) -> Dict[str, Any]:
+        return {
+            "calls": len(calls),
+            "cached_calls": sum(c.cached for c in calls),
+            "prompt_tokens": sum(c.prompt_tokens for c in calls),
+            "completion_tokens": sum(c.completion_tokens for c in calls),
+            "latency_seconds": round(sum(c.latency for c in calls), 3),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals for the run, broken down by stage and by model."""
+        with self._lock:
+            calls = list(self.calls)
+
+        by_stage: Dict[str, List[LLMCall]] = {}
+        by_model: Dict[str, List[LLMCall]] = {}
+        for call in calls:
+            by_stage.setdefault(call.stage, []).append(call)
+            by_model.setdefault(call.model, []).append(call)
+
+        return {
+            "total": self._aggregate(calls),
+            "by_stage": {k: self._aggregate(v) for k, v in by_stage.items()},
+            "by_model": {k: self._aggregate(v) for k, v in by_model.items()},
+        }
+
+    def write_json(self, path: str, include_calls: bool = True) -> None:
+        """Write the summary (and optionally every call) as a sidecar JSON file."""
+        report = self.summary()
+        if include_calls:
+            with self._lock:
+                report["calls"] = [asdict(c) for c in self.calls]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+_current_run: ContextVar[Optional[RunAccounting]] = ContextVar("current_run", default=None)
+_current_stage: ContextVar[str] = ContextVar("current_stage", default="unknown")
+
+
+@contextmanager
+def track_run(accounting: Optional[RunAccounting] = None) -> Iterator[RunAccounting]:
+    """Record LLM calls made in this context (and tasks spawned from it).
+
+    Nested calls without an explicit `accounting` join the enclosing run.
+    """
+    accounting = accounting or _current_run.get() or RunAccounting()
+    token = _current_run.set(accounting)
+    try:
+        yield accounting
+    finally:
+        _current_run.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Attribute LLM calls made in this context to pipeline stage `name`."""
+    token = _current_stage.set(name)
+    try:
+        yield
+    finally:
+        _current_stage.reset(token)
+
+
+def current_run() -> Optional[RunAccounting]:
+    return _current_run.get()
+
+
+def count_tokens(text: Optional[str]) -> int:
+    return len(encoder.encode(text, disallowed_special=())) if text else 0
+
+
+def record_llm_call(
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    latency: float,
+    cached: bool = False,
+) -> None:
+    """Charge a call to the active run (if any) under the current stage."""
+    accounting = _current_run.get()
+    if accounting is None:
+        return
+    accounting.record(
+        LLMCall(
+            stage=_current_stage.get(),
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency=latency,
+            cached=cached,
+        )
+    )
@@ -0,0 +1,103 @@
+import os
+import math
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Optional
+
+from deep_research_py.ai.text_splitter import RecursiveCharacterTextSplitter
+from deep_research_py.dedup import STOPWORDS, WORD_RE
+
+PASSAGE_TOKENS = 200
+DEFAULT_PASSAGE_TOKEN_BUDGET = int(os.getenv("PASSAGE_TOKEN_BUDGET", "8000"))
+
+passage_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+    chunk_size=PASSAGE_TOKENS, chunk_overlap=0
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [w for w in WORD_RE.findall(text.casefold()) if w not in STOPWORDS]
+
+
+class BM25Index:
+    """In-memory Okapi BM25 index over a small set of passages."""
+
+    def __init__(self, documents: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_counts = [Counter(tokenize(doc)) for doc in documents]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+        document_frequency = Counter()
+        for counts in self.term_counts:
+            document_frequency.update(counts.keys())
+        n = len(documents)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    def scores(self, query: str) -> List[float]:
+        terms = set(tokenize(query))
+        scores = []
+        for counts, length in zip(self.term_counts, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self.avg_length or 1))
+            score = 0.0
+            for term in terms:
+                tf = counts.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(score)
+        return scores
+
+
+@dataclass
+class Passage:
+    text: str
+    source: int
+    position: int
+    tokens: int
+
+
+def split_passages(contents: List[str]) -> List[Passage]:
+    passages = []
+    for source, content in enumerate(contents):
+        chunks = passage_splitter.split_text(content)
+        lengths = passage_splitter.length_function.batch(chunks)
+        for position, (chunk, tokens) in enumerate(zip(chunks, lengths)):
+            passages.append(Passage(chunk, source, position, tokens))
+    return passages
+
+
+def select_passages(
+    query: str, contents: List[str], token_budget: Optional[int] = None
+) -> List[str]:
+    """Keep the passages most relevant to `query` that fit in `token_budget`.
+
+    Contents that already fit are returned untouched. Otherwise each content is
+    split into ~PASSAGE_TOKENS passages, ranked with BM25, and the best ones are
+    taken greedily until the budget is spent. Selected passages are returned
+    grouped per source, in their original order.
+    """
+    token_budget = token_budget or DEFAULT_PASSAGE_TOKEN_BUDGET
+
+    passages = split_passages(contents)
+    if sum(p.tokens for p in passages) <= token_budget:
+        return contents
+
+    scores = BM25Index([p.text for p in passages]).scores(query)
+    ranked = sorted(range(len(passages)), key=lambda i: scores[i], reverse=True)
+
+    selected, used = [], 0
+    for i in ranked:
+        if used + passages[i].tokens > token_budget:
+            continue
+        selected.append(passages[i])
+        used += passages[i].tokens
+
+    selected.sort(key=lambda p: (p.source, p.position))
+    grouped = {}
+    for passage in selected:
+        grouped.setdefault(passage.source, []).append(passage.text)
+    return ["\n...\n".join(texts) for texts in grouped.values()]
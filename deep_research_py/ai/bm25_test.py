@@ -0,0 +1,42 @@
+from deep_research_py.ai.bm25 import passage_splitter, select_passages, split_passages
+
+
+def filler(word):
+    return " ".join(f"{word}{i % 7} words about general topics here." for i in range(60))
+
+
+RELEVANT = "Ethylene pipeline supplier Sauget delivers feedstock. " * 10
+CONTENTS = [
+    filler("alpha") + "\n\n" + RELEVANT + "\n\n" + filler("beta"),
+    filler("gamma"),
+]
+
+
+def passage_tokens(selected):
+    pieces = [piece for text in selected for piece in text.split("\n...\n")]
+    return sum(passage_splitter.length_function.batch(pieces))
+
+
+def test_contents_within_budget_are_untouched():
+    contents = ["short page", "another short page"]
+    assert select_passages("query", contents, 1000) is contents
+
+
+def test_most_relevant_passages_are_selected():
+    selected = select_passages("ethylene pipeline supplier", CONTENTS, 300)
+    assert len(selected) == 1
+    assert selected[0].startswith("Ethylene pipeline supplier")
+    assert "alpha" not in selected[0] and "gamma" not in selected[0]
+
+
+def test_budget_is_respected():
+    for budget in (200, 500, 1000, 3000):
+        selected = select_passages("ethylene supplier gamma3", CONTENTS, budget)
+        assert 0 < passage_tokens(selected) <= budget
+
+
+def test_unmatched_query_keeps_leading_passages_in_order():
+    passages = split_passages(CONTENTS)
+    budget = passages[0].tokens + passages[1].tokens
+    selected = select_passages("zeppelin", CONTENTS, budget)
+    assert selected == [passages[0].text + "\n...\n" + passages[1].text]
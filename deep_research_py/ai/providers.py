@@ -1,4 +1,5 @@
 import os
+import time
 import typer
 import json
 from openai import AsyncOpenAI
@@ -6,7 +7,6 @@ import tiktoken
 from typing import Optional
 from rich.console import Console
 from dotenv import load_dotenv
-from deep_research_py.ai.text_splitter import RecursiveCharacterTextSplitter
 from deep_research_py.config import EnvironmentConfig
 
 load_dotenv()
@@ -58,6 +58,10 @@ class AIClientFactory:
 async def get_client_response(
     client: AsyncOpenAI, model: str, messages: list, response_format: dict
 ):
+    # Imported here, `accounting` counts tokens with this module's encoder
+    from deep_research_py.accounting import record_llm_call
+
+    started = time.perf_counter()
     response = await client.beta.chat.completions.parse(
         model=model,
         messages=messages,
@@ -66,40 +70,57 @@ async def get_client_response(
 
     result = response.choices[0].message.content
 
+    usage = getattr(response, "usage", None)
+    record_llm_call(
+        model,
+        getattr(usage, "prompt_tokens", 0) or 0,
+        getattr(usage, "completion_tokens", 0) or 0,
+        time.perf_counter() - started,
+    )
+
     return json.loads(result)
 
 
 MIN_CHUNK_SIZE = 140
+# How far back from the token cut (as a fraction of the kept text) to look for a separator
+SEPARATOR_WINDOW = 0.1
+SEPARATORS = ["\n\n", "\n", ".", ",", ">", "<", " "]
 encoder = tiktoken.get_encoding(
     "cl100k_base"
 )  # Updated to use OpenAI's current encoding
 
 
+def cut_at_separator(text: str, window: float = SEPARATOR_WINDOW) -> str:
+    """Cut `text` at the coarsest separator found near its end."""
+    floor = int(len(text) * (1 - window))
+    for separator in SEPARATORS:
+        idx = text.rfind(separator)
+        if idx >= floor and idx > 0:
+            return text[:idx].strip()
+    return text.strip()
+
+
 def trim_prompt(
     prompt: str, context_size: int = int(os.getenv("CONTEXT_SIZE", "128000"))
 ) -> str:
-    """Trims a prompt to fit within the specified context size."""
+    """Trims a prompt to fit within the specified context size.
+
+    The prompt is encoded once and cut exactly at the token budget, then backed
+    off to the nearest separator so the cut lands on a paragraph, line or
+    sentence boundary where one is close by.
+    """
     if not prompt:
         return ""
 
-    length = len(encoder.encode(prompt))
-    if length <= context_size:
+    tokens = encoder.encode(prompt)
+    if len(tokens) <= context_size:
         return prompt
 
-    overflow_tokens = length - context_size
-    # Estimate characters to remove (3 chars per token on average)
-    chunk_size = len(prompt) - overflow_tokens * 3
-    if chunk_size < MIN_CHUNK_SIZE:
-        return prompt[:MIN_CHUNK_SIZE]
-
-    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=0)
+    # Decoding a token prefix may end mid-character, drop the partial bytes
+    head = encoder.decode_bytes(tokens[:context_size]).decode("utf-8", errors="ignore")
 
-    trimmed_prompt = (
-        splitter.split_text(prompt)[0] if splitter.split_text(prompt) else ""
-    )
-
-    # Handle edge case where trimmed prompt is same length
-    if len(trimmed_prompt) == len(prompt):
-        return trim_prompt(prompt[:chunk_size], context_size)
+    trimmed_prompt = cut_at_separator(head)
+    if len(trimmed_prompt) < MIN_CHUNK_SIZE:
+        return prompt[:MIN_CHUNK_SIZE]
 
-    return trim_prompt(trimmed_prompt, context_size)
+    return trimmed_prompt
@@ -1,42 +1,145 @@
+import hashlib
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from collections import OrderedDict, deque
+from itertools import groupby, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import tiktoken
+
+# Number of splits encoded per `encode_batch` call in token mode
+MEASURE_BATCH_SIZE = 256
+# Longer strings (whole pages) are rarely measured twice, so are not cached
+MAX_CACHED_CHARS = 16_000
+
+
+class TokenLength:
+    """Token length function for the splitters.
+
+    Lengths are computed with `encode_batch` and kept in an LRU cache keyed
+    by a digest of the string, so the same split is never encoded twice and
+    the cache holds no copies of the text. Safe to share between threads.
+    """
+
+    def __init__(self, encoding_name: str = "cl100k_base", max_cache_size: int = 100_000):
+        self.encoder = tiktoken.get_encoding(encoding_name)
+        self.max_cache_size = max_cache_size
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, text: str) -> int:
+        return self.batch([text])[0]
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def batch(self, texts: List[str]) -> List[int]:
+        keys = {t: self._key(t) for t in texts if len(t) <= MAX_CACHED_CHARS}
+        lengths: Dict[str, int] = {}
+        with self._lock:
+            for text, key in keys.items():
+                length = self._cache.get(key)
+                if length is not None:
+                    self._cache.move_to_end(key)
+                    lengths[text] = length
+        missing = [t for t in set(texts) if t not in lengths]
+        if missing:
+            # Encode outside the lock, tiktoken releases the GIL
+            encoded = self.encoder.encode_batch(missing, disallowed_special=())
+            lengths.update(zip(missing, map(len, encoded)))
+            with self._lock:
+                for text in missing:
+                    key = keys.get(text)
+                    if key is not None:
+                        self._cache[key] = lengths[text]
+                while len(self._cache) > self.max_cache_size:
+                    self._cache.popitem(last=False)
+        return [lengths[t] for t in texts]
 
 
 class TextSplitter(ABC):
-    """Base text splitter class that handles splitting text into chunks."""
+    """Base text splitter class that handles splitting text into chunks.
 
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    Sizes are measured in characters by default. Pass a `TokenLength` as
+    `length_function` (or use `from_tiktoken_encoder`) to measure in tokens.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        length_function: Callable[[str], int] = len,
+    ):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.length_function = length_function
 
         if self.chunk_overlap >= self.chunk_size:
             raise ValueError("Cannot have chunk_overlap >= chunk_size")
 
     @abstractmethod
-    def split_text(self, text: str) -> List[str]:
+    def iter_split(self, text: str) -> Iterator[str]:
+        """Lazily yield chunks of `text`, so callers can stop after the first few."""
         pass
 
+    def split_text(self, text: str) -> List[str]:
+        return list(self.iter_split(text))
+
     def create_documents(self, texts: List[str]) -> List[str]:
         documents = []
         for text in texts:
-            for chunk in self.split_text(text):
-                documents.append(chunk)
+            documents.extend(self.iter_split(text))
         return documents
 
     def split_documents(self, documents: List[str]) -> List[str]:
         return self.create_documents(documents)
 
-    def _join_docs(self, docs: List[str], separator: str) -> Optional[str]:
+    def _join_docs(self, docs: Iterable[str], separator: str) -> Optional[str]:
         text = separator.join(docs).strip()
         return text if text else None
 
-    def merge_splits(self, splits: List[str], separator: str) -> List[str]:
-        docs: List[str] = []
-        current_doc: List[str] = []
+    @classmethod
+    def from_tiktoken_encoder(
+        cls, encoding_name: str = "cl100k_base", **kwargs
+    ) -> "TextSplitter":
+        """Create a splitter whose chunk size and overlap are measured in tokens."""
+        return cls(length_function=TokenLength(encoding_name), **kwargs)
+
+    def measure(self, splits: Iterable[str], separator: str = "") -> Iterator[Tuple[str, int]]:
+        """Pair each split with its length.
+
+        Token lengths are encoded in batches and include the separator the
+        split is joined with, so merged chunks stay within `chunk_size`.
+        """
+        batch_lengths = getattr(self.length_function, "batch", None)
+        if batch_lengths is None:
+            for d in splits:
+                yield d, self.length_function(d)
+            return
+
+        splits = iter(splits)
+        while True:
+            batch = list(islice(splits, MEASURE_BATCH_SIZE))
+            if not batch:
+                return
+            yield from zip(batch, batch_lengths([separator + d for d in batch]))
+
+    def iter_merge_splits(self, splits: Iterable[str], separator: str) -> Iterator[str]:
+        """Merge small splits into chunks, keeping `chunk_overlap` between them."""
+        return self._iter_merge(self.measure(splits, separator), separator)
+
+    def _iter_merge(self, splits: Iterable[Tuple[str, int]], separator: str) -> Iterator[str]:
+        """Merge measured splits.
+
+        The window is a deque with a running length total, so each split is
+        added and dropped once and merging is linear in the input.
+        """
+        current_doc: deque = deque()
+        lengths: deque = deque()
         total = 0
 
-        for d in splits:
-            _len = len(d)
+        for d, _len in splits:
             if total + _len >= self.chunk_size:
                 if total > self.chunk_size:
                     print(
@@ -46,21 +149,41 @@ class TextSplitter(ABC):
                 if current_doc:
                     doc = self._join_docs(current_doc, separator)
                     if doc is not None:
-                        docs.append(doc)
+                        yield doc
 
                     while total > self.chunk_overlap or (
                         total + _len > self.chunk_size and total > 0
                     ):
-                        total -= len(current_doc[0])
-                        current_doc.pop(0)
+                        current_doc.popleft()
+                        total -= lengths.popleft()
 
             current_doc.append(d)
+            lengths.append(_len)
             total += _len
 
         doc = self._join_docs(current_doc, separator)
         if doc is not None:
-            docs.append(doc)
-        return docs
+            yield doc
+
+    def merge_splits(self, splits: List[str], separator: str) -> List[str]:
+        return list(self.iter_merge_splits(splits, separator))
+
+
+def iter_pieces(text: str, separator: str) -> Iterator[str]:
+    """Lazy equivalent of `text.split(separator)` (or `list(text)` for "")."""
+    if not separator:
+        yield from text
+        return
+
+    start = 0
+    step = len(separator)
+    while True:
+        idx = text.find(separator, start)
+        if idx == -1:
+            yield text[start:]
+            return
+        yield text[start:idx]
+        start = idx + step
 
 
 class RecursiveCharacterTextSplitter(TextSplitter):
@@ -71,42 +194,36 @@ class RecursiveCharacterTextSplitter(TextSplitter):
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
         separators: Optional[List[str]] = None,
+        length_function: Callable[[str], int] = len,
     ):
-        super().__init__(chunk_size, chunk_overlap)
+        super().__init__(chunk_size, chunk_overlap, length_function)
         self.separators = separators or ["\n\n", "\n", ".", ",", ">", "<", " ", ""]
 
-    def split_text(self, text: str) -> List[str]:
-        final_chunks: List[str] = []
-
-        # Get appropriate separator to use
-        separator = self.separators[-1]
-        for s in self.separators:
-            if s == "":
+    def iter_split(self, text: str) -> Iterator[str]:
+        return self._iter_split(text, self.separators)
+
+    def _iter_split(self, text: str, separators: List[str]) -> Iterator[str]:
+        if not separators:
+            # Nothing left to split on, emit the oversized piece as is
+            if text.strip():
+                yield text.strip()
+            return
+
+        # Get appropriate separator to use. Separators before it do not occur in
+        # `text`, so oversized pieces only need to try the ones after it.
+        separator = separators[-1]
+        remaining = separators
+        for i, s in enumerate(separators):
+            if s == "" or s in text:
                 separator = s
+                remaining = separators[i + 1 :]
                 break
-            if s in text:
-                separator = s
-                break
-
-        # Split the text
-        splits = text.split(separator) if separator else list(text)
 
-        # Merge splits recursively
-        good_splits: List[str] = []
-        for s in splits:
-            if len(s) < self.chunk_size:
-                good_splits.append(s)
+        # Merge runs of small splits, recurse into oversized ones
+        pieces = self.measure(iter_pieces(text, separator), separator)
+        for small, group in groupby(pieces, key=lambda p: p[1] < self.chunk_size):
+            if small:
+                yield from self._iter_merge(group, separator)
             else:
-                if good_splits:
-                    merged_text = self.merge_splits(good_splits, separator)
-                    final_chunks.extend(merged_text)
-                    good_splits = []
-                other_info = self.split_text(s)
-                final_chunks.extend(other_info)
-
-        if good_splits:
-            merged_text = self.merge_splits(good_splits, separator)
-            final_chunks.extend(merged_text)
-
-        return final_chunks
-
+                for s, _ in group:
+                    yield from self._iter_split(s, remaining)
@@ -0,0 +1,20 @@
+from deep_research_py.ai.text_splitter import MAX_CACHED_CHARS, TokenLength
+
+
+def test_token_length_cache_evicts_least_recently_used():
+    length = TokenLength(max_cache_size=2)
+    expected = length.encoder.encode("one two")
+    assert length.batch(["one two", "three", "one two"])[0] == len(expected)
+
+    length("one two")  # most recently used
+    length("four")
+    assert length._key("one two") in length._cache
+    assert length._key("three") not in length._cache
+    assert len(length._cache) == 2
+
+
+def test_token_length_skips_caching_long_strings():
+    length = TokenLength()
+    text = "word " * MAX_CACHED_CHARS
+    assert length(text) == len(length.encoder.encode(text))
+    assert len(length._cache) == 0
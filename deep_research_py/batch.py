@@ -0,0 +1,267 @@
+import os
+import csv
+import json
+import time
+import asyncio
+import hashlib
+from typing import Any, Dict, Iterator, Optional, Set
+
+import typer
+
+from deep_research_py.llm_query import Gemini, Ollama
+from deep_research_py.deep_research import (
+    ResearchBudget,
+    ResearchLimits,
+    async_get_predicted_facilities_map_reduce,
+    deep_research_local_async,
+)
+from deep_research_py.accounting import track_run
+from deep_research_py.utils import logger
+
+app = typer.Typer()
+
+
+def facility_query(record: Dict[str, Any], query_field: str) -> str:
+    """The research query for a facility record, e.g. "Afton Chemical in Sauget, IL"."""
+    if record.get(query_field):
+        return str(record[query_field]).strip()
+    name, address = record.get("name"), record.get("address")
+    if name and address:
+        return f"{name} in {address}"
+    return str(name or address or "").strip()
+
+
+def facility_id(record: Dict[str, Any], query: str, id_field: str) -> str:
+    if record.get(id_field):
+        return str(record[id_field])
+    return hashlib.sha1(query.encode("utf-8")).hexdigest()[:12]
+
+
+def read_facilities(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield facility records from a CSV (with a header row) or JSONL file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """Ids already written successfully to `output_path`, failures are retried."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by a crash
+                continue
+            if row.get("status") == "ok":
+                done.add(row["id"])
+    return done
+
+
+class BatchRunner:
+    """Research and predict suppliers for many facilities with bounded parallelism.
+
+    Each result is appended to the output JSONL as soon as its facility finishes,
+    and facilities already in the output are skipped, so a killed batch picks up
+    where it stopped. With `checkpoint_path` set, a facility interrupted
+    mid-research also resumes from its last completed node.
+    """
+
+    def __init__(
+        self,
+        ollama_client: Ollama,
+        predict_client,
+        output_path: str,
+        breadth: int = 2,
+        depth: int = 2,
+        concurrency: int = 4,
+        limits: Optional[ResearchLimits] = None,
+        budget: Optional[ResearchBudget] = None,
+        checkpoint_path: Optional[str] = None,
+    ):
+        self.ollama_client = ollama_client
+        self.predict_client = predict_client
+        self.output_path = output_path
+        self.breadth = breadth
+        self.depth = depth
+        self.concurrency = concurrency
+        self.limits = limits
+        self.budget = budget
+        self.checkpoint_path = checkpoint_path
+
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def write(self, row: Dict[str, Any]) -> None:
+        # Single line appends from the event loop thread, flushed per facility
+        with open(self.output_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(row) + "\n")
+            f.flush()
+
+    async def research(self, fid: str, query: str) -> Dict[str, Any]:
+        started = time.monotonic()
+        with track_run() as accounting:
+            results = await deep_research_local_async(
+                gemini_client=None,
+                ollama_client=self.ollama_client,
+                query=query,
+                breadth=self.breadth,
+                depth=self.depth,
+                limits=self.limits,
+                budget=self.budget,
+                run_id=f"batch-{fid}" if self.checkpoint_path else None,
+                checkpoint_path=self.checkpoint_path,
+            )
+            predicted = await async_get_predicted_facilities_map_reduce(
+                client=self.predict_client,
+                prompt=query,
+                learnings=results["learnings"],
+                visited_urls=results["visited_urls"],
+            )
+
+        return {
+            "id": fid,
+            "query": query,
+            "status": "ok",
+            "predicted_facilities": predicted,
+            "learnings": results["learnings"],
+            "visited_urls": results["visited_urls"],
+            "usage": accounting.summary(),
+            "elapsed_seconds": round(time.monotonic() - started, 1),
+        }
+
+    async def worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            fid, query = await queue.get()
+            try:
+                row = await self.research(fid, query)
+                self.succeeded += 1
+            except Exception as e:
+                logger.error(f"Facility {fid} ({query!r}) failed: {e}")
+                row = {"id": fid, "query": query, "status": "error", "error": str(e)}
+                self.failed += 1
+            finally:
+                queue.task_done()
+            self.write(row)
+            print(f"[{self.succeeded + self.failed} done, {self.failed} failed] {fid}: {row['status']}")
+
+    async def run(
+        self, input_path: str, query_field: str = "facility", id_field: str = "id"
+    ) -> Dict[str, int]:
+        done = completed_ids(self.output_path)
+
+        # Bounded queue, so large inputs are streamed rather than loaded at once
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [asyncio.create_task(self.worker(queue)) for _ in range(self.concurrency)]
+        try:
+            seen = set()
+            for record in read_facilities(input_path):
+                query = facility_query(record, query_field)
+                if not query:
+                    continue
+                fid = facility_id(record, query, id_field)
+                if fid in done or fid in seen:
+                    self.skipped += 1
+                    continue
+                seen.add(fid)
+                await queue.put((fid, query))
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        return {"succeeded": self.succeeded, "failed": self.failed, "skipped": self.skipped}
+
+
+async def run_batch(
+    input_path: str,
+    output_path: str,
+    ollama_model: str = "qwen3:14b",
+    predict_with: str = "gemini",
+    breadth: int = 2,
+    depth: int = 2,
+    concurrency: int = 4,
+    query_field: str = "facility",
+    id_field: str = "id",
+    budget: Optional[ResearchBudget] = None,
+    checkpoint_path: Optional[str] = None,
+) -> Dict[str, int]:
+    ollama_client = Ollama(model=ollama_model)
+    gemini_client = Gemini() if predict_with == "gemini" else None
+    runner = BatchRunner(
+        ollama_client=ollama_client,
+        predict_client=gemini_client or ollama_client,
+        output_path=output_path,
+        breadth=breadth,
+        depth=depth,
+        concurrency=concurrency,
+        budget=budget,
+        checkpoint_path=checkpoint_path,
+    )
+    try:
+        return await runner.run(input_path, query_field, id_field)
+    finally:
+        # The pooled async clients are bound to this event loop
+        await ollama_client.aclose()
+        if gemini_client is not None:
+            await gemini_client.aclose()
+
+
+@app.command()
+def main(
+    input_path: str = typer.Argument(..., help="CSV (with a header row) or JSONL of facilities."),
+    output: str = typer.Option("predictions.jsonl", help="JSONL results, appended per facility."),
+    breadth: int = typer.Option(2, help="Research breadth per facility."),
+    depth: int = typer.Option(2, help="Research depth per facility."),
+    concurrency: int = typer.Option(4, help="Facilities researched at the same time."),
+    query_field: str = typer.Option(
+        "facility", help="Column holding the query, otherwise 'name' in 'address'."
+    ),
+    id_field: str = typer.Option("id", help="Column holding a stable facility id."),
+    ollama_model: str = typer.Option("qwen3:14b", help="Ollama model used for research."),
+    predict_with: str = typer.Option("gemini", help="'gemini' or 'ollama' for prediction."),
+    max_llm_calls: Optional[int] = typer.Option(None, help="LLM call budget per facility."),
+    checkpoint: bool = typer.Option(True, help="Checkpoint facilities so they resume mid-run."),
+    checkpoint_path: Optional[str] = typer.Option(None, help="SQLite checkpoint file."),
+):
+    """Predict suppliers for every facility in a CSV/JSONL file."""
+    if checkpoint and checkpoint_path is None:
+        checkpoint_path = os.getenv(
+            "CHECKPOINT_PATH",
+            os.path.join(os.path.dirname(os.path.abspath(output)), "checkpoints.sqlite"),
+        )
+
+    summary = asyncio.run(
+        run_batch(
+            input_path=input_path,
+            output_path=output,
+            ollama_model=ollama_model,
+            predict_with=predict_with,
+            breadth=breadth,
+            depth=depth,
+            concurrency=concurrency,
+            query_field=query_field,
+            id_field=id_field,
+            budget=ResearchBudget(max_llm_calls=max_llm_calls),
+            checkpoint_path=checkpoint_path if checkpoint else None,
+        )
+    )
+    print(f"Batch finished: {summary}")
+
+
+def run():
+    """Entry point for the `deep-research-batch` script."""
+    app()
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,351 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from deep_research_py.utils import logger
+
+CACHE_DIR = os.path.expanduser(
+    os.getenv("DEEP_RESEARCH_CACHE_DIR", "~/.cache/deep_research_py")
+)
+
+DEFAULT_LLM_CACHE_TTL = 7 * 24 * 60 * 60
+DEFAULT_LLM_CACHE_MAX_ENTRIES = 50_000
+DEFAULT_SEARCH_CACHE_TTL = 24 * 60 * 60
+DEFAULT_SEARCH_CACHE_MAX_ENTRIES = 20_000
+# Access times are written in batches rather than on every hit
+TOUCH_BATCH = 256
+
+# `system_prompt()` embeds `datetime.now().isoformat()`
+ISO_TIMESTAMP_RE = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:[+-]\d{2}:\d{2}|Z)?")
+WHITESPACE_RE = re.compile(r"\s+")
+
+T = TypeVar("T")
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean flag such as `LLM_CACHE_DISABLED=1` from the environment."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class SQLiteCache:
+    """Disk-backed key/value cache with TTL expiry and size-bounded LRU eviction.
+
+    Values are stored as strings or bytes. A single connection is shared across
+    threads behind a lock, so the cache can be used from worker threads as well
+    as from the event loop. Hits do not write: access times are batched and
+    flushed on the next `set` (or every TOUCH_BATCH hits), and entries are
+    only evicted once there are more than `max_entries`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        table: str = "cache",
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        enabled: bool = True,
+    ):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self._count = 0
+        self._touched: Dict[str, float] = {}
+        if self.enabled:
+            self._connect()
+
+    def _connect(self) -> None:
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value BLOB, created_at REAL, accessed_at REAL)"
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.table}_accessed_at "
+            f"ON {self.table} (accessed_at)"
+        )
+        self._conn.commit()
+        self._count = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss or an expired entry."""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or self._expired(row[1], now):
+                if row is not None:
+                    self._delete(key)
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._touched[key] = now
+            if len(self._touched) >= TOUCH_BATCH:
+                self._flush_touches()
+                self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value and evict the least recently used entries over the limit."""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                f"INSERT OR IGNORE INTO {self.table} (key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            if cursor.rowcount > 0:
+                self._count += 1
+            else:
+                self._conn.execute(
+                    f"UPDATE {self.table} SET value = ?, created_at = ?, accessed_at = ? "
+                    "WHERE key = ?",
+                    (value, now, now, key),
+                )
+            self._touched.pop(key, None)
+            self._flush_touches()
+            if self.max_entries is not None and self._count > self.max_entries:
+                cursor = self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN ("
+                    f"SELECT key FROM {self.table} ORDER BY accessed_at ASC LIMIT ?)",
+                    (self._count - self.max_entries,),
+                )
+                evicted = max(cursor.rowcount, 0)
+                self._count -= evicted
+                self.evictions += evicted
+            self._conn.commit()
+
+    def _delete(self, key: str) -> None:
+        cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        self._count -= max(cursor.rowcount, 0)
+        self._touched.pop(key, None)
+
+    def _flush_touches(self) -> None:
+        """Write pending access times, called with the lock held before a commit."""
+        if self._touched:
+            self._conn.executemany(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()],
+            )
+            self._touched = {}
+
+    def delete(self, key: str) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._delete(key)
+            self._conn.commit()
+
+    def clear(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+            self._count = 0
+            self._touched = {}
+
+    def __len__(self) -> int:
+        if not self.enabled:
+            return 0
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters for this process plus the current size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self),
+        }
+
+    def close(self) -> None:
+        if self._conn is not None:
+            with self._lock:
+                self._flush_touches()
+                self._conn.commit()
+                self._conn.close()
+            self._conn = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into a single upstream call.
+
+    The first caller for a key runs the function, callers arriving while it is
+    in flight block on its result (or exception) instead of repeating the work.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+def normalize_prompt(text: Optional[str]) -> str:
+    """Drop the volatile timestamp and collapse whitespace so equal system prompts hash equally."""
+    if not text:
+        return ""
+    text = ISO_TIMESTAMP_RE.sub("<timestamp>", text)
+    return WHITESPACE_RE.sub(" ", text).strip()
+
+
+def llm_cache_key(model: str, system_prompt: Optional[str], user_prompt: str) -> str:
+    # Only the system prompt is boilerplate, the user prompt is content and
+    # is keyed exactly: its whitespace and timestamps may matter
+    payload = "\x1f".join([model, normalize_prompt(system_prompt), user_prompt])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Content-addressed cache of parsed JSON responses, keyed on model and prompts."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: Optional[float] = DEFAULT_LLM_CACHE_TTL,
+        max_entries: Optional[int] = DEFAULT_LLM_CACHE_MAX_ENTRIES,
+        enabled: bool = True,
+    ):
+        self.store = SQLiteCache(
+            path=path or os.path.join(CACHE_DIR, "llm_cache.sqlite"),
+            table="llm_responses",
+            ttl=ttl,
+            max_entries=max_entries,
+            enabled=enabled,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.store.enabled
+
+    def get(
+        self, model: str, system_prompt: Optional[str], user_prompt: str
+    ) -> Optional[Dict]:
+        value = self.store.get(llm_cache_key(model, system_prompt, user_prompt))
+        if value is None:
+            return None
+        return json.loads(value)
+
+    def set(
+        self, model: str, system_prompt: Optional[str], user_prompt: str, response: Dict
+    ) -> None:
+        self.store.set(
+            llm_cache_key(model, system_prompt, user_prompt), json.dumps(response)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return self.store.stats()
+
+
+_llm_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Process-wide LLM cache configured from the environment.
+
+    LLM_CACHE_DISABLED=1 bypasses the cache, LLM_CACHE_PATH, LLM_CACHE_TTL (seconds)
+    and LLM_CACHE_MAX_ENTRIES override the defaults.
+    """
+    global _llm_cache
+    with _cache_lock:
+        if _llm_cache is None:
+            try:
+                _llm_cache = LLMCache(
+                    path=os.getenv("LLM_CACHE_PATH"),
+                    ttl=float(os.getenv("LLM_CACHE_TTL", DEFAULT_LLM_CACHE_TTL)),
+                    max_entries=int(
+                        os.getenv("LLM_CACHE_MAX_ENTRIES", DEFAULT_LLM_CACHE_MAX_ENTRIES)
+                    ),
+                    enabled=not env_flag("LLM_CACHE_DISABLED"),
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache unavailable, continuing without it: {e}")
+                _llm_cache = LLMCache(enabled=False)
+        return _llm_cache
+
+
+_search_cache: Optional[SQLiteCache] = None
+
+
+def get_search_cache() -> SQLiteCache:
+    """Process-wide search result cache configured from the environment.
+
+    SEARCH_CACHE_DISABLED=1 bypasses the cache, SEARCH_CACHE_PATH, SEARCH_CACHE_TTL
+    (seconds) and SEARCH_CACHE_MAX_ENTRIES override the defaults.
+    """
+    global _search_cache
+    with _cache_lock:
+        if _search_cache is None:
+            try:
+                _search_cache = SQLiteCache(
+                    path=os.getenv(
+                        "SEARCH_CACHE_PATH", os.path.join(CACHE_DIR, "search_cache.sqlite")
+                    ),
+                    table="search_results",
+                    ttl=float(os.getenv("SEARCH_CACHE_TTL", DEFAULT_SEARCH_CACHE_TTL)),
+                    max_entries=int(
+                        os.getenv("SEARCH_CACHE_MAX_ENTRIES", DEFAULT_SEARCH_CACHE_MAX_ENTRIES)
+                    ),
+                    enabled=not env_flag("SEARCH_CACHE_DISABLED"),
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Search cache unavailable, continuing without it: {e}")
+                _search_cache = SQLiteCache(path=":memory:", enabled=False)
+        return _search_cache
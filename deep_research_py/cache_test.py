@@ -0,0 +1,59 @@
+from deep_research_py.cache import LLMCache, SQLiteCache, llm_cache_key
+
+
+def accessed_at(cache, key):
+    return cache._conn.execute(
+        f"SELECT accessed_at FROM {cache.table} WHERE key = ?", (key,)
+    ).fetchone()[0]
+
+
+def test_hits_are_not_written_until_the_next_set():
+    cache = SQLiteCache(":memory:")
+    cache.set("a", "1")
+    stored = accessed_at(cache, "a")
+    assert cache.get("a") == "1"
+    assert accessed_at(cache, "a") == stored
+
+    cache.set("b", "2")
+    assert accessed_at(cache, "a") > stored
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_least_recently_used_is_evicted_only_over_the_limit():
+    cache = SQLiteCache(":memory:", max_entries=3)
+    for key in "abc":
+        cache.set(key, key)
+    assert cache.evictions == 0
+
+    cache.get("a")
+    cache.set("c", "replaced")
+    assert cache.evictions == 0 and len(cache) == 3
+    cache.set("d", "d")
+    assert cache.evictions == 1
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == ["a", "replaced", "d"]
+
+
+def test_expired_entries_are_misses():
+    cache = SQLiteCache(":memory:", ttl=-1)
+    cache.set("a", "1")
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_only_the_system_prompt_is_normalized():
+    system = "You are an expert researcher. Today is {}."
+    assert llm_cache_key("m", system.format("2025-01-01T10:00:00"), "q") == llm_cache_key(
+        "m", system.format("2025-03-04T11:22:33.123456") + "\n", "q"
+    )
+    assert llm_cache_key("m", None, "a  b") != llm_cache_key("m", None, "a b")
+    assert llm_cache_key("m", None, "as of 2025-01-01T10:00:00") != llm_cache_key(
+        "m", None, "as of 2025-03-04T11:22:33"
+    )
+
+
+def test_llm_cache_round_trip():
+    cache = LLMCache(path=":memory:")
+    cache.set("m", "system", "user", {"learnings": ["x"]})
+    assert cache.get("m", "system", "user") == {"learnings": ["x"]}
+    assert cache.get("other", "system", "user") is None
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+from deep_research_py.cache import CACHE_DIR
+from deep_research_py.utils import logger
+
+ROOT_KEY = "root"
+
+
+def node_key(parent_key: str, index: int, query: str) -> str:
+    """Deterministic key of the `index`-th query generated under `parent_key`."""
+    payload = "\x1f".join([parent_key, str(index), query.strip()])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ResearchCheckpoint:
+    """Durable record of a research tree, so an interrupted run can resume.
+
+    Everything a node produces is written as soon as it completes: the queries
+    generated under it, its search results and the learnings extracted from
+    them. A resumed run replays those records in place of the searches and LLM
+    calls, and only does the work that never finished.
+
+    The methods block on SQLite, the research engine calls them through
+    `asyncio.to_thread` so checkpointing does not stall the event loop.
+    """
+
+    def __init__(self, run_id: str, path: Optional[str] = None):
+        self.run_id = run_id
+        self.path = path or os.getenv(
+            "CHECKPOINT_PATH", os.path.join(CACHE_DIR, "checkpoints.sqlite")
+        )
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "run_id TEXT PRIMARY KEY, query TEXT, breadth INTEGER, depth INTEGER, "
+            "status TEXT, stop_reason TEXT, created_at REAL, updated_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "run_id TEXT, node_key TEXT, kind TEXT, value TEXT, created_at REAL, "
+            "PRIMARY KEY (run_id, node_key, kind))"
+        )
+        self._conn.commit()
+
+    def start(self, query: str, breadth: int, depth: int) -> None:
+        """Register the run, or check that a resumed run has the same parameters."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT query, breadth, depth FROM runs WHERE run_id = ?", (self.run_id,)
+            ).fetchone()
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO runs VALUES (?, ?, ?, ?, 'running', NULL, ?, ?)",
+                    (self.run_id, query, breadth, depth, now, now),
+                )
+            else:
+                if tuple(row) != (query, breadth, depth):
+                    logger.warning(
+                        f"Resuming run {self.run_id} with different parameters, "
+                        f"checkpointed as {tuple(row)}"
+                    )
+                self._conn.execute(
+                    "UPDATE runs SET status = 'running', updated_at = ? WHERE run_id = ?",
+                    (now, self.run_id),
+                )
+            self._conn.commit()
+
+    def finish(self, stop_reason: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, stop_reason = ?, updated_at = ? WHERE run_id = ?",
+                (
+                    "stopped" if stop_reason else "done",
+                    stop_reason,
+                    time.time(),
+                    self.run_id,
+                ),
+            )
+            self._conn.commit()
+
+    def run_info(self) -> Optional[Dict[str, Any]]:
+        """Parameters and status of this run, or None if it was never started."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT query, breadth, depth, status, stop_reason FROM runs WHERE run_id = ?",
+                (self.run_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("query", "breadth", "depth", "status", "stop_reason"), row))
+
+    def get(self, key: str, kind: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM records WHERE run_id = ? AND node_key = ? AND kind = ?",
+                (self.run_id, key, kind),
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, key: str, kind: str, value: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)",
+                (self.run_id, key, kind, json.dumps(value), time.time()),
+            )
+            self._conn.commit()
+
+    def get_queries(self, key: str) -> Optional[List[Dict[str, str]]]:
+        """SERP queries generated under node `key` (ROOT_KEY for the first level)."""
+        return self.get(key, "queries")
+
+    def save_queries(self, key: str, queries: List[Dict[str, str]]) -> None:
+        self.put(key, "queries", queries)
+
+    def get_search(self, key: str) -> Optional[List[Dict[str, str]]]:
+        return self.get(key, "search")
+
+    def save_search(self, key: str, result: List[Dict[str, str]]) -> None:
+        self.put(key, "search", result)
+
+    def get_extraction(self, key: str) -> Optional[Dict[str, List[str]]]:
+        return self.get(key, "extraction")
+
+    def save_extraction(self, key: str, extraction: Dict[str, List[str]]) -> None:
+        self.put(key, "extraction", extraction)
+
+    def completed_nodes(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM records WHERE run_id = ? AND kind = 'extraction'",
+                (self.run_id,),
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
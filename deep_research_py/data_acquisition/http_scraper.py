@@ -0,0 +1,314 @@
+import io
+import re
+import asyncio
+from collections import Counter
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from deep_research_py.utils import logger
+from deep_research_py.data_acquisition.scraper import ScrapedContent, Scraper, PlaywrightScraper
+from deep_research_py.data_acquisition.politeness import retry_after
+
+try:
+    import pypdf
+except ImportError:  # optional, see the `pdf` extra
+    pypdf = None
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+)
+
+# Pages with less visible text than this are assumed to render client side
+MIN_TEXT_CHARS = 200
+
+SKIPPED_TAGS = frozenset(
+    {"script", "style", "noscript", "template", "svg", "head", "iframe", "object", "canvas"}
+)
+BLOCK_TAGS = frozenset(
+    {
+        "p", "div", "section", "article", "main", "header", "footer", "nav", "aside",
+        "li", "ul", "ol", "tr", "table", "br", "hr", "h1", "h2", "h3", "h4", "h5", "h6",
+        "blockquote", "pre", "form", "dd", "dt", "dl", "figcaption", "address",
+    }
+)
+
+# Shells of client-rendered apps and "please enable JavaScript" interstitials
+JS_SHELL_RE = re.compile(
+    r"<div[^>]+id=[\"'](?:root|app|__next|__nuxt|___gatsby)[\"'][^>]*>\s*</div>"
+    r"|enable javascript|javascript is (?:disabled|required)|requires javascript",
+    re.IGNORECASE,
+)
+SCRIPT_RE = re.compile(r"<script\b", re.IGNORECASE)
+BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+SPACES_RE = re.compile(r"[ \t\r\f\v]+")
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.title_parts: List[str] = []
+        self._skip_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        if tag in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title_parts.append(data)
+        elif not self._skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> Dict[str, str]:
+    """Visible text and title of an HTML document, without rendering it."""
+    parser = _TextExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception as e:
+        logger.debug(f"HTML parse error, keeping partial text: {e}")
+
+    text = SPACES_RE.sub(" ", "".join(parser.parts))
+    text = BLANK_LINES_RE.sub("\n\n", "\n".join(line.strip() for line in text.split("\n")))
+    return {"text": text.strip(), "title": " ".join("".join(parser.title_parts).split())}
+
+
+def needs_javascript(html: str, text: str) -> bool:
+    """Whether a fetched page probably only has content once its scripts run."""
+    if len(text) >= MIN_TEXT_CHARS * 5:
+        return False
+    if len(text) < MIN_TEXT_CHARS:
+        return True
+    return bool(JS_SHELL_RE.search(html)) or len(SCRIPT_RE.findall(html)) > len(text) / 50
+
+
+def decode_body(body: bytes, charset: str) -> str:
+    try:
+        return body.decode(charset, errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+def pdf_to_text(data: bytes) -> str:
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    return "\n\n".join(page.extract_text() or "" for page in reader.pages).strip()
+
+
+class HttpScraper(Scraper):
+    """Plain HTTP scraper on a pooled aiohttp session.
+
+    Static pages are fetched and converted to text without a browser, PDFs
+    are read with pypdf when it is installed. Results carry
+    `metadata["needs_js"]` when the page looks like it renders client side.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        max_connections: int = 32,
+        max_connections_per_host: int = 4,
+        max_bytes: int = 5 * 1024 * 1024,
+        user_agent: str = USER_AGENT,
+        capture_html: bool = False,
+    ):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.max_bytes = max_bytes
+        self.user_agent = user_agent
+        self.capture_html = capture_html
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def setup(self):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    limit_per_host=self.max_connections_per_host,
+                    ttl_dns_cache=300,
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={
+                    "User-Agent": self.user_agent,
+                    "Accept": "text/html,application/xhtml+xml,application/pdf;q=0.9,*/*;q=0.8",
+                    "Accept-Language": "en-US,en;q=0.9",
+                },
+            )
+
+    async def teardown(self):
+        if self.session is not None:
+            await self.session.close()
+        self.session = None
+
+    async def read_body(self, response: aiohttp.ClientResponse) -> bytes:
+        """Read the body until EOF or `max_bytes`, whichever comes first.
+
+        `StreamReader.read(n)` returns whatever is buffered, which for a
+        chunked response can be only the first chunk.
+        """
+        chunks = []
+        total = 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            chunks.append(chunk)
+            total += len(chunk)
+            if total >= self.max_bytes:
+                break
+        return b"".join(chunks)[: self.max_bytes]
+
+    async def scrape(
+        self,
+        url: str,
+        capture_html: Optional[bool] = None,
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs,
+    ) -> ScrapedContent:
+        """Fetch `url`, `headers` are sent as is (e.g. conditional request validators)."""
+        if capture_html is None:
+            capture_html = self.capture_html
+        if self.session is None or self.session.closed:
+            await self.setup()
+
+        try:
+            async with self.session.get(url, allow_redirects=True, headers=headers) as response:
+                body = await self.read_body(response)
+                content_type = response.content_type or ""
+                status_code = response.status
+                response_headers = dict(response.headers)
+                charset = response.charset or "utf-8"
+        except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeError, ValueError) as e:
+            return ScrapedContent(
+                url=url, html="", text="", status_code=0, metadata={"error": str(e) or type(e).__name__}
+            )
+
+        metadata = {"tier": "http", "headers": response_headers, "content_type": content_type}
+
+        if status_code == 304:
+            # Not modified, the caller already has the content
+            metadata["needs_js"] = False
+            return ScrapedContent(url=url, html="", text="", status_code=status_code, metadata=metadata)
+
+        if content_type == "application/pdf" or url.lower().endswith(".pdf"):
+            if pypdf is None:
+                metadata["error"] = "pypdf is not installed"
+                return ScrapedContent(url=url, html="", text="", status_code=status_code, metadata=metadata)
+            try:
+                text = await asyncio.to_thread(pdf_to_text, body)
+            except Exception as e:
+                metadata["error"] = f"PDF extraction failed: {e}"
+                text = ""
+            metadata["needs_js"] = False
+            return ScrapedContent(url=url, html="", text=text, status_code=status_code, metadata=metadata)
+
+        if content_type.startswith("text/plain"):
+            text = decode_body(body, charset)
+            metadata["needs_js"] = False
+            return ScrapedContent(url=url, html="", text=text, status_code=status_code, metadata=metadata)
+
+        if content_type and "html" not in content_type and "xml" not in content_type:
+            metadata["error"] = f"Unsupported content type {content_type}"
+            return ScrapedContent(url=url, html="", text="", status_code=status_code, metadata=metadata)
+
+        html = decode_body(body, charset)
+        extracted = html_to_text(html)
+        metadata["title"] = extracted["title"]
+        metadata["needs_js"] = needs_javascript(html, extracted["text"])
+        return ScrapedContent(
+            url=url,
+            html=html if capture_html else "",
+            text=extracted["text"],
+            status_code=status_code,
+            metadata=metadata,
+        )
+
+
+# Statuses worth retrying in a real browser (bot walls, flaky servers)
+ESCALATE_STATUSES = frozenset({0, 401, 403, 500, 502, 503, 504})
+
+
+class TieredScraper(Scraper):
+    """Fetch with plain HTTP first and render in a browser only when needed.
+
+    A page goes to the `PlaywrightScraper` when the HTTP fetch fails, is
+    blocked, or looks like a JavaScript shell. The browser is only launched on
+    the first escalation. `tier_counts` records which tier produced each page.
+    """
+
+    def __init__(
+        self,
+        http: Optional[HttpScraper] = None,
+        browser: Optional[PlaywrightScraper] = None,
+        capture_html: bool = False,
+    ):
+        self.http = http or HttpScraper(capture_html=capture_html)
+        self.browser = browser or PlaywrightScraper(capture_html=capture_html)
+        self.tier_counts: Counter = Counter()
+        self._browser_ready = False
+        self._browser_lock = asyncio.Lock()
+
+    async def setup(self):
+        await self.http.setup()
+
+    async def teardown(self):
+        await self.http.teardown()
+        if self._browser_ready:
+            await self.browser.teardown()
+            self._browser_ready = False
+        logger.info(f"Scraper tiers used: {dict(self.tier_counts)}")
+
+    def should_escalate(self, result: ScrapedContent) -> bool:
+        metadata = result.metadata or {}
+        if result.status_code == 429 or (
+            result.status_code == 503 and retry_after(metadata.get("headers")) is not None
+        ):
+            # The host asked to slow down, back off instead of hitting it again in a browser
+            return False
+        if result.status_code in ESCALATE_STATUSES:
+            return True
+        if result.status_code >= 400:
+            # A 404 is a 404 in a browser too
+            return False
+        return bool(metadata.get("needs_js")) or (not result.text and "error" not in metadata)
+
+    async def _ensure_browser(self) -> None:
+        async with self._browser_lock:
+            if not self._browser_ready:
+                await self.browser.setup()
+                self._browser_ready = True
+
+    async def scrape(self, url: str, **kwargs) -> ScrapedContent:
+        result = await self.http.scrape(url, **kwargs)
+        if not self.should_escalate(result):
+            self.tier_counts["http"] += 1
+            return result
+
+        await self._ensure_browser()
+        rendered = await self.browser.scrape(url, **kwargs)
+        if rendered.text:
+            self.tier_counts["browser"] += 1
+            rendered.metadata = {**(rendered.metadata or {}), "tier": "browser"}
+            return rendered
+
+        # The browser did no better, keep whatever the HTTP fetch got
+        self.tier_counts["http" if result.text else "failed"] += 1
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.tier_counts)
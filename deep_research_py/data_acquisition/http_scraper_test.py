@@ -0,0 +1,70 @@
+import asyncio
+
+from aiohttp import web
+
+from deep_research_py.data_acquisition.http_scraper import HttpScraper, html_to_text, needs_javascript
+
+PARAGRAPH = "<p>" + "Supplier delivers feedstock to the plant by pipeline. " * 20 + "</p>\n"
+
+
+async def serve(handler):
+    app = web.Application()
+    app.router.add_get("/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/"
+
+
+async def chunked_page(request):
+    response = web.StreamResponse(headers={"Content-Type": "text/html; charset=utf-8"})
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+    await response.write(b"<html><head><title>Big</title></head><body>")
+    for _ in range(500):
+        await response.write(PARAGRAPH.encode())
+        # Force separate network chunks
+        await asyncio.sleep(0)
+    await response.write(b"<p>END OF PAGE</p></body></html>")
+    await response.write_eof()
+    return response
+
+
+async def test_reads_whole_chunked_body():
+    runner, url = await serve(chunked_page)
+    scraper = HttpScraper()
+    try:
+        result = await scraper.scrape(url)
+    finally:
+        await scraper.teardown()
+        await runner.cleanup()
+
+    assert result.status_code == 200
+    assert result.text.endswith("END OF PAGE")
+    assert len(result.text) > 500 * len("Supplier delivers feedstock")
+    assert result.metadata["title"] == "Big"
+
+
+async def test_stops_at_max_bytes():
+    runner, url = await serve(chunked_page)
+    scraper = HttpScraper(max_bytes=100_000)
+    try:
+        result = await scraper.scrape(url)
+    finally:
+        await scraper.teardown()
+        await runner.cleanup()
+
+    assert "END OF PAGE" not in result.text
+    assert len(result.text) <= 100_000
+
+
+def test_html_to_text_skips_scripts():
+    extracted = html_to_text("<title>T</title><script>var x = 1;</script><p>Hello</p>")
+    assert extracted == {"text": "Hello", "title": "T"}
+
+
+def test_needs_javascript():
+    assert needs_javascript('<div id="root"></div>', "")
+    assert not needs_javascript("<p>text</p>", "x" * 2000)
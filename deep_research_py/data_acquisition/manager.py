@@ -1,16 +1,44 @@
+import time
 import asyncio
-from typing import List, Dict, Union
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Dict, Optional, Union
 from deep_research_py.utils import logger
 from deep_research_py.data_acquisition.search import SearchResult, SearchEngine, DdgsSearchEngine
-from deep_research_py.data_acquisition.scraper import ScrapedContent, Scraper, PlaywrightScraper
+from deep_research_py.data_acquisition.scraper import ScrapedContent, Scraper
+from deep_research_py.data_acquisition.http_scraper import TieredScraper
+from deep_research_py.data_acquisition.page_cache import CachingScraper, cached_page
+from deep_research_py.data_acquisition.politeness import PolitenessScheduler, politeness
+from deep_research_py.data_acquisition.urls import VisitedUrls, url_identity
+from deep_research_py.data_acquisition.pipeline import drain, feed, run_stage
+
+
+
+@dataclass
+class PipelineResult:
+    """One search result on its way through `SearchAndScrapeManager.pipeline`."""
+
+    query: str
+    search_result: SearchResult
+    scraped: Optional[ScrapedContent] = None
+    extracted: Any = None
 
 
 class SearchAndScrapeManager:
     """Main class for coordinating search and scrape operations."""
 
-    def __init__(self, search_engine: SearchEngine = None, scraper: Scraper = None):
+    def __init__(
+        self,
+        search_engine: SearchEngine = None,
+        scraper: Scraper = None,
+        capture_html: bool = False,
+        scheduler: PolitenessScheduler = None,
+    ):
         self.search_engine = search_engine or DdgsSearchEngine()
-        self.scraper = scraper or PlaywrightScraper()
+        # Cached pages first, then plain HTTP, Playwright only for pages that need a browser
+        self.scraper = scraper or CachingScraper(TieredScraper(capture_html=capture_html))
+        # Shared across managers, so concurrent searches respect the same host limits
+        self.scheduler = scheduler or politeness
 
     async def setup(self):
         """Initialize required resources."""
@@ -29,8 +57,17 @@ class SearchAndScrapeManager:
         return await self.search_engine.search(query, num_results, **kwargs)
 
     async def scrape(self, url: str, **kwargs) -> ScrapedContent:
-        """Scrape a URL using the configured scraper."""
-        return await self.scraper.scrape(url, **kwargs)
+        """Scrape a URL using the configured scraper, within the host's politeness limits."""
+        cached, cache_kwargs = await cached_page(self.scraper, url)
+        if cached is not None:
+            # Fresh cache hits cost the host nothing
+            return cached
+
+        async with self.scheduler.slot(url):
+            result = await self.scraper.scrape(url, **cache_kwargs, **kwargs)
+
+        self.scheduler.observe_scrape(url, result)
+        return result
 
     async def search_and_scrape(
         self,
@@ -38,51 +75,208 @@ class SearchAndScrapeManager:
         num_results: int = 10,
         scrape_all: bool = False,
         max_concurrent_scrapes: int = 5,
+        visited: Optional[VisitedUrls] = None,
+        deadline: Optional[float] = None,
+        quorum: Optional[int] = None,
         **kwargs,
-    ) -> Dict[str, Union[List[SearchResult], Dict[str, ScrapedContent]]]:
+    ) -> Dict[str, Union[List[SearchResult], Dict[str, ScrapedContent], List[str]]]:
         """
         Search for results and optionally scrape them.
 
+        By default every scrape is awaited, so the slowest page sets the
+        latency. With a `deadline` and/or `quorum` the call returns as soon as
+        either is met, cancels the scrapes still running and lists their URLs
+        in `cancelled_urls`.
+
         Args:
             query: Search query string
             num_results: Maximum number of search results to retrieve
             scrape_all: Whether to scrape all search results
             max_concurrent_scrapes: Maximum number of concurrent scrape operations
+            visited: Registry shared by related searches, results it already
+                holds are not scraped again (and new ones are added to it)
+            deadline: Seconds from the start of the call after which
+                unfinished scrapes are cancelled
+            quorum: Return once this many pages were scraped successfully
             **kwargs: Additional parameters to pass to search and scrape methods
 
         Returns:
-            Dictionary containing search results and scraped content
+            Dictionary containing search results, scraped content and the
+            URLs whose scrapes were cancelled
         """
+        started = time.monotonic()
+
         # Perform search
         search_results = await self.search(query, num_results, **kwargs)
 
         scraped_contents = {}
+        cancelled_urls = []
 
         # Scrape results if requested
         if scrape_all and search_results:
-            # Create a semaphore to limit concurrent scrapes
+            # Per-call cap, host and global limits are applied by the shared scheduler
             semaphore = asyncio.Semaphore(max_concurrent_scrapes)
 
             async def scrape_with_semaphore(url):
                 async with semaphore:
                     return await self.scrape(url, **kwargs)
 
-            # Create scraping tasks
-            scrape_tasks = [
-                scrape_with_semaphore(result.url) for result in search_results
-            ]
+            # One scrape per page, URL variants (tracking params, http/https) share it
+            urls: Dict[str, str] = {}
+            for result in search_results:
+                key = url_identity(result.url)
+                if key in urls or (visited is not None and not visited.claim(result.url)):
+                    continue
+                urls[key] = result.url
 
             # Execute scraping tasks concurrently with rate limiting
-            scraped_results = await asyncio.gather(
-                *scrape_tasks, return_exceptions=True
-            )
+            tasks = {
+                asyncio.create_task(scrape_with_semaphore(url)): (key, url)
+                for key, url in urls.items()
+            }
+            pending = set(tasks)
+            scraped_by_key = {}
+            succeeded = 0
+            try:
+                while pending and (quorum is None or succeeded < quorum):
+                    timeout = None
+                    if deadline is not None:
+                        timeout = deadline - (time.monotonic() - started)
+                        if timeout <= 0:
+                            break
+                    done, pending = await asyncio.wait(
+                        pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        key, url = tasks[task]
+                        if task.exception() is not None:
+                            logger.error(f"Error scraping {url}: {str(task.exception())}")
+                            continue
+                        result = task.result()
+                        scraped_by_key[key] = result
+                        if result.text and result.status_code < 400:
+                            succeeded += 1
+            finally:
+                # Stragglers past the deadline or quorum
+                for task in [task for task in tasks if task in pending]:
+                    task.cancel()
+                    url = tasks[task][1]
+                    cancelled_urls.append(url)
+                    if visited is not None:
+                        # Not scraped after all, a later search may still take it
+                        visited.release(url)
+                await asyncio.gather(*pending, return_exceptions=True)
 
-            # Process results
-            for i, result in enumerate(scraped_results):
-                if isinstance(result, Exception):
-                    logger.error(f"Error scraping result {i+1}: {str(result)}")
-                    continue
+            if cancelled_urls:
+                logger.info(
+                    f"Cancelled {len(cancelled_urls)} scrapes for {query!r} "
+                    f"({succeeded} pages done in {time.monotonic() - started:.1f}s)"
+                )
 
-                scraped_contents[search_results[i].url] = result
+            for result in search_results:
+                scraped = scraped_by_key.get(url_identity(result.url))
+                if scraped is not None:
+                    scraped_contents[result.url] = scraped
+
+        return {
+            "search_results": search_results,
+            "scraped_contents": scraped_contents,
+            "cancelled_urls": cancelled_urls,
+        }
+
+    async def pipeline(
+        self,
+        queries: List[str],
+        extract: Optional[Callable[[PipelineResult], Awaitable[Any]]] = None,
+        num_results: int = 10,
+        search_concurrency: int = 2,
+        max_concurrent_scrapes: int = 5,
+        extract_concurrency: int = 2,
+        queue_size: int = 16,
+        visited: Optional[VisitedUrls] = None,
+        **kwargs,
+    ) -> AsyncIterator[PipelineResult]:
+        """
+        Search, scrape and extract as a pipeline, yielding each result when it is done.
+
+        Unlike `search_and_scrape`, nothing waits for a whole batch: a page is
+        scraped as soon as its search returns, and extracted as soon as it is
+        scraped, so one slow page only delays itself. Stages are connected by
+        queues of `queue_size`, so a slow stage holds back the ones before it
+        instead of buffering unbounded work. Closing the generator early (e.g.
+        with `contextlib.aclosing`) cancels the remaining work.
+
+        Args:
+            queries: Search queries, searched `search_concurrency` at a time
+            extract: Optional coroutine run on each scraped result (e.g. an LLM
+                extraction), its return value is set as `extracted`
+            num_results: Maximum number of search results per query
+            search_concurrency: Concurrent searches
+            max_concurrent_scrapes: Concurrent scrapes, within the shared
+                politeness limits
+            extract_concurrency: Concurrent `extract` calls
+            queue_size: Capacity of each queue between stages
+            visited: Registry of pages already scraped, a fresh one by default
+                so each page is scraped once across all queries
+            **kwargs: Additional parameters to pass to search and scrape methods
+
+        Yields:
+            Results in completion order, `scraped` (or `extracted`) is None when
+            that stage failed
+        """
+        visited = visited if visited is not None else VisitedUrls()
+
+        async def search_stage(query: str) -> List[PipelineResult]:
+            results = await self.search(query, num_results, **kwargs)
+            return [PipelineResult(query, result) for result in results if visited.claim(result.url)]
+
+        async def scrape_stage(item: PipelineResult) -> List[PipelineResult]:
+            try:
+                item.scraped = await self.scrape(item.search_result.url, **kwargs)
+            except Exception as e:
+                logger.error(f"Error scraping {item.search_result.url}: {str(e)}")
+            return [item]
+
+        async def extract_stage(item: PipelineResult) -> List[PipelineResult]:
+            try:
+                item.extracted = await extract(item)
+            except Exception as e:
+                logger.error(f"Error extracting {item.search_result.url}: {str(e)}")
+            return [item]
+
+        search_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        scrape_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        extract_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        output: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+        tasks = [
+            asyncio.create_task(feed(queries, search_queue, search_concurrency)),
+            asyncio.create_task(
+                run_stage(
+                    "search", search_queue, scrape_queue, search_stage,
+                    search_concurrency, max_concurrent_scrapes,
+                )
+            ),
+        ]
+        if extract is None:
+            tasks.append(
+                asyncio.create_task(
+                    run_stage("scrape", scrape_queue, output, scrape_stage, max_concurrent_scrapes, 1)
+                )
+            )
+        else:
+            tasks += [
+                asyncio.create_task(
+                    run_stage(
+                        "scrape", scrape_queue, extract_queue, scrape_stage,
+                        max_concurrent_scrapes, extract_concurrency,
+                    )
+                ),
+                asyncio.create_task(
+                    run_stage("extract", extract_queue, output, extract_stage, extract_concurrency, 1)
+                ),
+            ]
 
-        return {"search_results": search_results, "scraped_contents": scraped_contents}
+        async with aclosing(drain(output, tasks)) as items:
+            async for item in items:
+                yield item
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+from deep_research_py.data_acquisition.manager import SearchAndScrapeManager
+from deep_research_py.data_acquisition.politeness import PolitenessScheduler
+from deep_research_py.data_acquisition.scraper import ScrapedContent, Scraper
+from deep_research_py.data_acquisition.search import SearchEngine, SearchResult
+from deep_research_py.data_acquisition.services import SearchService
+from deep_research_py.data_acquisition.urls import VisitedUrls
+
+FAST = ["https://fast.com/1", "https://fast.com/2"]
+SLOW = ["https://slow.com/1", "https://slow.com/2", "https://slow.com/3"]
+
+
+class FakeSearch(SearchEngine):
+    async def search(self, query, num_results=10, **kwargs):
+        return [
+            SearchResult(title=url, url=url, description="", position=i)
+            for i, url in enumerate(FAST + SLOW)
+        ]
+
+
+class FakeScraper(Scraper):
+    def __init__(self):
+        self.cancelled = []
+
+    async def setup(self):
+        pass
+
+    async def teardown(self):
+        pass
+
+    async def scrape(self, url, **kwargs):
+        try:
+            await asyncio.sleep(0.0 if url in FAST else 10.0)
+        except asyncio.CancelledError:
+            self.cancelled.append(url)
+            raise
+        return ScrapedContent(url=url, html="", text=f"text of {url}", status_code=200, metadata={})
+
+
+def manager(scheduler=None):
+    return SearchAndScrapeManager(
+        search_engine=FakeSearch(),
+        scraper=FakeScraper(),
+        scheduler=scheduler
+        or PolitenessScheduler(global_concurrency=16, per_host_concurrency=4, min_interval=0),
+    )
+
+
+async def test_deadline_returns_partial_results():
+    m = manager()
+    visited = VisitedUrls()
+    started = time.monotonic()
+    result = await m.search_and_scrape("q", scrape_all=True, deadline=0.2, visited=visited)
+
+    assert time.monotonic() - started < 1.0
+    assert sorted(result["scraped_contents"]) == FAST
+    assert sorted(result["cancelled_urls"]) == SLOW
+    assert sorted(m.scraper.cancelled) == SLOW
+    # Cancelled pages were released for a later search to take
+    assert all(url not in visited for url in SLOW)
+    assert all(url in visited for url in FAST)
+
+
+async def test_quorum_returns_early():
+    m = manager()
+    started = time.monotonic()
+    result = await m.search_and_scrape("q", scrape_all=True, quorum=2)
+
+    assert time.monotonic() - started < 1.0
+    assert sorted(result["scraped_contents"]) == FAST
+    assert sorted(result["cancelled_urls"]) == SLOW
+
+
+async def test_cancelled_scrapes_release_their_politeness_slots():
+    scheduler = PolitenessScheduler(global_concurrency=2, per_host_concurrency=1, min_interval=0)
+    result = await manager(scheduler).search_and_scrape("q", scrape_all=True, deadline=0.2)
+    assert result["cancelled_urls"]
+
+    # Every host and global slot is free again
+    async def fetch(url):
+        async with scheduler.slot(url):
+            pass
+
+    await asyncio.wait_for(asyncio.gather(fetch(SLOW[0]), fetch(FAST[0])), timeout=1.0)
+
+
+async def test_search_service_reports_cancelled_urls():
+    service = SearchService(service_type="playwright_ddgs")
+    service.manager = manager()
+    response = await service.search("q", limit=5, deadline=0.2)
+
+    assert sorted(response["cancelled_urls"]) == SLOW
+    contents = {item["url"]: item["content"] for item in response["data"]}
+    assert all(contents[url] == f"text of {url}" for url in FAST)
+    assert all(contents[url] == "" for url in SLOW)
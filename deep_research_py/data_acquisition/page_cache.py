@@ -0,0 +1,435 @@
+import os
+import time
+import zlib
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from deep_research_py.utils import logger
+from deep_research_py.cache import CACHE_DIR, env_flag
+from deep_research_py.data_acquisition.urls import url_identity
+from deep_research_py.data_acquisition.scraper import ScrapedContent, Scraper
+
+DEFAULT_PAGE_CACHE_TTL = 24 * 60 * 60
+DEFAULT_PAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+COMPRESSION_LEVEL = 6
+# Access times are written in batches rather than on every hit
+TOUCH_BATCH = 256
+
+
+def page_key(url: str) -> str:
+    return hashlib.sha256(url_identity(url).encode("utf-8")).hexdigest()
+
+
+def header(headers: Optional[Dict[str, Any]], name: str) -> Optional[str]:
+    """Case-insensitive header lookup, aiohttp and Playwright disagree on case."""
+    if not headers:
+        return None
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str
+    title: str
+    status_code: int
+    content_type: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_scraped(self, tier: str = "cache") -> ScrapedContent:
+        return ScrapedContent(
+            url=self.url,
+            html="",
+            text=self.text,
+            status_code=self.status_code,
+            metadata={
+                "tier": tier,
+                "title": self.title,
+                "content_type": self.content_type,
+                "fetched_at": self.fetched_at,
+            },
+        )
+
+
+class PageCache:
+    """Disk cache of scraped page text keyed by canonical URL.
+
+    Page bodies are zlib-compressed and stored once per content hash, so
+    mirrors and URL variants serving the same text share storage. Each page
+    keeps the fetch metadata needed to revalidate it (ETag, Last-Modified).
+    Entries older than `ttl` are stale rather than gone, and the least
+    recently used pages are evicted once the compressed bodies exceed
+    `max_bytes`.
+
+    The methods block on SQLite; from the event loop use the `async_`
+    variants, which run them in a worker thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = DEFAULT_PAGE_CACHE_TTL,
+        max_bytes: Optional[int] = DEFAULT_PAGE_CACHE_MAX_BYTES,
+        enabled: bool = True,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self._total_bytes = 0
+        self._touched: Dict[str, float] = {}
+        if self.enabled:
+            self._connect()
+
+    def _connect(self) -> None:
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "key TEXT PRIMARY KEY, url TEXT, content_hash TEXT, title TEXT, "
+            "status_code INTEGER, content_type TEXT, etag TEXT, last_modified TEXT, "
+            "fetched_at REAL, accessed_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS bodies (content_hash TEXT PRIMARY KEY, data BLOB, size INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_content_hash ON pages (content_hash)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM bodies"
+        ).fetchone()[0]
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Return the cached page for `url`, fresh or stale, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        key = page_key(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT p.url, b.data, p.title, p.status_code, p.content_type, p.etag, "
+                "p.last_modified, p.fetched_at FROM pages p "
+                "JOIN bodies b ON b.content_hash = p.content_hash WHERE p.key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= TOUCH_BATCH:
+                self._flush_touches()
+                self._conn.commit()
+
+        page = CachedPage(
+            url=row[0],
+            text=zlib.decompress(row[1]).decode("utf-8"),
+            title=row[2] or "",
+            status_code=row[3],
+            content_type=row[4] or "",
+            etag=row[5],
+            last_modified=row[6],
+            fetched_at=row[7],
+        )
+        if self.is_fresh(page):
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return page
+
+    async def async_get(self, url: str) -> Optional[CachedPage]:
+        return await asyncio.to_thread(self.get, url)
+
+    def is_fresh(self, page: CachedPage) -> bool:
+        return page.age() <= self.ttl
+
+    def put(self, result: ScrapedContent) -> None:
+        """Store the text and validators of a successful scrape."""
+        if not self.enabled or not result.text:
+            return
+
+        metadata = result.metadata or {}
+        headers = metadata.get("headers")
+        data = result.text.encode("utf-8")
+        content_hash = hashlib.sha256(data).hexdigest()
+        now = time.time()
+
+        with self._lock:
+            known = self._conn.execute(
+                "SELECT 1 FROM bodies WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+            if known is None:
+                compressed = zlib.compress(data, COMPRESSION_LEVEL)
+                self._conn.execute(
+                    "INSERT INTO bodies (content_hash, data, size) VALUES (?, ?, ?)",
+                    (content_hash, compressed, len(compressed)),
+                )
+                self._total_bytes += len(compressed)
+
+            key = page_key(result.url)
+            previous = self._conn.execute(
+                "SELECT content_hash FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (key, url, content_hash, title, status_code, "
+                "content_type, etag, last_modified, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    result.url,
+                    content_hash,
+                    metadata.get("title") or "",
+                    result.status_code,
+                    metadata.get("content_type") or header(headers, "content-type") or "",
+                    header(headers, "etag"),
+                    header(headers, "last-modified"),
+                    now,
+                    now,
+                ),
+            )
+            if previous is not None and previous[0] != content_hash:
+                self._drop_orphans()
+            self._touched.pop(key, None)
+            self._flush_touches()
+            self._evict()
+            self._conn.commit()
+
+    async def async_put(self, result: ScrapedContent) -> None:
+        await asyncio.to_thread(self.put, result)
+
+    def refresh(self, url: str, headers: Optional[Dict[str, Any]] = None) -> None:
+        """Mark a page fresh again after a 304, keeping any updated validators."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE key = ?",
+                (time.time(), header(headers, "etag"), header(headers, "last-modified"), page_key(url)),
+            )
+            self._conn.commit()
+        self.revalidated += 1
+
+    async def async_refresh(self, url: str, headers: Optional[Dict[str, Any]] = None) -> None:
+        await asyncio.to_thread(self.refresh, url, headers)
+
+    def _flush_touches(self) -> None:
+        """Write pending access times, called with the lock held before a commit."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE pages SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()],
+            )
+            self._touched = {}
+
+    def _drop_orphans(self) -> None:
+        freed = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM bodies WHERE content_hash NOT IN "
+            "(SELECT content_hash FROM pages)"
+        ).fetchone()[0]
+        self._conn.execute(
+            "DELETE FROM bodies WHERE content_hash NOT IN (SELECT content_hash FROM pages)"
+        )
+        self._total_bytes -= freed
+
+    def _evict(self) -> None:
+        if self.max_bytes is None:
+            return
+        while self._total_bytes > self.max_bytes:
+            # Evict in batches, one orphan sweep per batch
+            cursor = self._conn.execute(
+                "DELETE FROM pages WHERE key IN ("
+                "SELECT key FROM pages ORDER BY accessed_at ASC LIMIT 64)"
+            )
+            if cursor.rowcount <= 0:
+                break
+            self.evictions += cursor.rowcount
+            self._drop_orphans()
+
+    def clear(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.execute("DELETE FROM bodies")
+            self._touched = {}
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def __len__(self) -> int:
+        if not self.enabled:
+            return 0
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+            "pages": len(self),
+            "bytes": self._total_bytes,
+        }
+
+    def close(self) -> None:
+        if self._conn is not None:
+            with self._lock:
+                self._flush_touches()
+                self._conn.commit()
+                self._conn.close()
+            self._conn = None
+
+
+# `CachingScraper.scrape` was not handed a lookup result (None means a miss)
+_NOT_LOOKED_UP = object()
+
+
+class CachingScraper(Scraper):
+    """Serve pages from the `PageCache` and fetch only what is missing or stale.
+
+    Fresh hits never touch the network. Stale pages with an ETag or
+    Last-Modified are revalidated with a conditional plain HTTP request, a 304
+    refreshes the entry without re-rendering it. Everything else goes to the
+    wrapped scraper, and a stale copy is returned if that fetch fails.
+    """
+
+    def __init__(self, scraper: Scraper, cache: Optional[PageCache] = None, http=None):
+        self.scraper = scraper
+        self.cache = cache if cache is not None else get_page_cache()
+        # Plain HTTP client for conditional requests, the tiered scraper already has one
+        self.http = http or getattr(scraper, "http", None)
+
+    async def setup(self):
+        if hasattr(self.scraper, "setup"):
+            await self.scraper.setup()
+
+    async def teardown(self):
+        if hasattr(self.scraper, "teardown"):
+            await self.scraper.teardown()
+        if self.cache.enabled:
+            logger.info(f"Page cache: {self.cache.stats()}")
+
+    async def lookup(self, url: str) -> Optional[CachedPage]:
+        """The cached copy of `url`, fresh or stale, without any network access."""
+        return await self.cache.async_get(url)
+
+    def cacheable(self, result: ScrapedContent) -> bool:
+        return 200 <= result.status_code < 300 and bool(result.text)
+
+    async def scrape(
+        self,
+        url: str,
+        capture_html: Optional[bool] = None,
+        cached: Any = _NOT_LOOKED_UP,
+        **kwargs,
+    ) -> ScrapedContent:
+        """Scrape `url` through the cache, `cached` is the result of an earlier `lookup`."""
+        if capture_html:
+            # Only text is cached
+            return await self.scraper.scrape(url, capture_html=capture_html, **kwargs)
+
+        page = await self.lookup(url) if cached is _NOT_LOOKED_UP else cached
+        if page is not None and self.cache.is_fresh(page):
+            return page.to_scraped()
+
+        if page is not None and self.http is not None and page.conditional_headers():
+            result = await self.http.scrape(url, headers=page.conditional_headers())
+            if result.status_code == 304:
+                await self.cache.async_refresh(url, (result.metadata or {}).get("headers"))
+                return page.to_scraped(tier="revalidated")
+            if self.cacheable(result) and not (result.metadata or {}).get("needs_js"):
+                await self.cache.async_put(result)
+                return result
+
+        result = await self.scraper.scrape(url, **kwargs)
+        if self.cacheable(result):
+            await self.cache.async_put(result)
+        elif page is not None:
+            logger.debug(f"Fetch of {url} failed, serving the stale cached copy")
+            stale = page.to_scraped(tier="stale")
+            # Keep what the host said, e.g. a 429 the caller should back off on
+            stale.metadata["fetch_status"] = result.status_code
+            stale.metadata["headers"] = (result.metadata or {}).get("headers") or {}
+            return stale
+        return result
+
+
+async def cached_page(
+    scraper: Optional[Scraper], url: str
+) -> Tuple[Optional[ScrapedContent], Dict[str, Any]]:
+    """Check `scraper`'s page cache before taking any fetch limits.
+
+    Returns a fresh hit, or None and the keyword arguments that hand the
+    lookup on to `scraper.scrape`, so the cache is read once per URL.
+    """
+    if not isinstance(scraper, CachingScraper):
+        return None, {}
+    page = await scraper.lookup(url)
+    if page is not None and scraper.cache.is_fresh(page):
+        return page.to_scraped(), {}
+    return None, {"cached": page}
+
+
+_page_cache: Optional[PageCache] = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    """Process-wide page cache configured from the environment.
+
+    PAGE_CACHE_DISABLED=1 bypasses the cache, PAGE_CACHE_PATH, PAGE_CACHE_TTL
+    (seconds before revalidation) and PAGE_CACHE_MAX_BYTES override the defaults.
+    """
+    global _page_cache
+    with _page_cache_lock:
+        if _page_cache is None:
+            try:
+                _page_cache = PageCache(
+                    path=os.getenv(
+                        "PAGE_CACHE_PATH", os.path.join(CACHE_DIR, "page_cache.sqlite")
+                    ),
+                    ttl=float(os.getenv("PAGE_CACHE_TTL", DEFAULT_PAGE_CACHE_TTL)),
+                    max_bytes=int(
+                        os.getenv("PAGE_CACHE_MAX_BYTES", DEFAULT_PAGE_CACHE_MAX_BYTES)
+                    ),
+                    enabled=not env_flag("PAGE_CACHE_DISABLED"),
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Page cache unavailable, continuing without it: {e}")
+                _page_cache = PageCache(path=":memory:", enabled=False)
+        return _page_cache
@@ -0,0 +1,118 @@
+import random
+import string
+
+from deep_research_py.data_acquisition.page_cache import CachingScraper, PageCache, cached_page
+from deep_research_py.data_acquisition.scraper import ScrapedContent, Scraper
+
+
+def scraped(url, text, status_code=200, headers=None):
+    return ScrapedContent(
+        url=url,
+        html="",
+        text=text,
+        status_code=status_code,
+        metadata={"title": "T", "headers": headers or {}},
+    )
+
+
+def random_text(rng, size=2000):
+    return "".join(rng.choice(string.ascii_letters) for _ in range(size))
+
+
+def test_put_and_get_by_url_identity():
+    cache = PageCache(":memory:")
+    cache.put(scraped("https://example.com/a?utm_source=x", "body", headers={"ETag": '"v1"'}))
+
+    page = cache.get("http://EXAMPLE.com/a/")
+    assert page.text == "body"
+    assert page.title == "T"
+    assert page.conditional_headers() == {"If-None-Match": '"v1"'}
+    assert cache.get("https://example.com/b") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_stale_pages_are_returned_until_refreshed():
+    cache = PageCache(":memory:", ttl=0)
+    cache.put(scraped("https://example.com/a", "body", headers={"ETag": '"v1"'}))
+    page = cache.get("https://example.com/a")
+    assert page is not None and not cache.is_fresh(page)
+    assert cache.stale_hits == 1
+
+    cache.ttl = 60
+    cache.refresh("https://example.com/a", {"etag": '"v2"'})
+    page = cache.get("https://example.com/a")
+    assert cache.is_fresh(page)
+    assert page.etag == '"v2"'
+    assert cache.revalidated == 1
+
+
+def test_identical_bodies_are_stored_once():
+    cache = PageCache(":memory:")
+    text = random_text(random.Random(0))
+    cache.put(scraped("https://a.com/x", text))
+    size = cache.stats()["bytes"]
+    cache.put(scraped("https://mirror.com/y", text))
+    assert cache.stats()["bytes"] == size
+    assert len(cache) == 2
+
+    # Replacing a page's only copy of a body frees it
+    cache.put(scraped("https://a.com/x", "new"))
+    cache.put(scraped("https://mirror.com/y", "new"))
+    assert cache.stats()["bytes"] < size
+
+
+def test_least_recently_used_pages_are_evicted():
+    rng = random.Random(1)
+    cache = PageCache(":memory:", max_bytes=None)
+    for i in range(70):
+        cache.put(scraped(f"https://a.com/{i}", random_text(rng)))
+    assert cache.get("https://a.com/0") is not None
+
+    # The next page goes over the limit, and a batch of 64 pages is evicted
+    cache.max_bytes = cache.stats()["bytes"]
+    cache.put(scraped("https://a.com/new", random_text(rng)))
+    assert cache.evictions == 64
+    assert cache.stats()["bytes"] <= cache.max_bytes
+    assert cache.get("https://a.com/0") is not None
+    assert cache.get("https://a.com/new") is not None
+    assert cache.get("https://a.com/1") is None
+
+
+def test_disabled_cache_stores_nothing():
+    cache = PageCache(":memory:", enabled=False)
+    cache.put(scraped("https://a.com/x", "body"))
+    assert cache.get("https://a.com/x") is None
+    assert len(cache) == 0
+
+
+class CountingScraper(Scraper):
+    def __init__(self):
+        self.calls = 0
+
+    async def setup(self):
+        pass
+
+    async def teardown(self):
+        pass
+
+    async def scrape(self, url, **kwargs):
+        self.calls += 1
+        return scraped(url, f"fetched {url}")
+
+
+async def test_caching_scraper_reads_cache_once_per_url():
+    inner = CountingScraper()
+    cache = PageCache(":memory:")
+    scraper = CachingScraper(inner, cache=cache)
+
+    hit, cache_kwargs = await cached_page(scraper, "https://a.com/x")
+    assert hit is None
+    result = await scraper.scrape("https://a.com/x", **cache_kwargs)
+    assert result.text == "fetched https://a.com/x"
+    assert cache.misses == 1
+
+    hit, cache_kwargs = await cached_page(scraper, "https://a.com/x")
+    assert hit.text == "fetched https://a.com/x"
+    assert hit.metadata["tier"] == "cache"
+    assert inner.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
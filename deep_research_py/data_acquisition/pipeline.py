@@ -0,0 +1,82 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, List
+
+from deep_research_py.utils import logger
+
+# Marks the end of a stage's input, one per downstream worker
+_DONE = object()
+
+
+async def run_stage(
+    name: str,
+    inbox: asyncio.Queue,
+    outbox: asyncio.Queue,
+    fn: Callable[[Any], Awaitable[List[Any]]],
+    workers: int,
+    downstream_workers: int,
+) -> None:
+    """Run `workers` copies of `fn` over `inbox`, putting what they return on `outbox`.
+
+    Items move on one at a time, so the next stage starts on the first result
+    while this one is still working. A bounded `outbox` applies backpressure.
+    An item that raises is logged and dropped rather than stopping the stage.
+    """
+
+    async def worker():
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            try:
+                results = await fn(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Pipeline stage {name} failed on {item!r}: {e}")
+                continue
+            for result in results:
+                await outbox.put(result)
+
+    await asyncio.gather(*[worker() for _ in range(workers)])
+    for _ in range(downstream_workers):
+        await outbox.put(_DONE)
+
+
+async def feed(items: Iterable[Any], outbox: asyncio.Queue, downstream_workers: int) -> None:
+    for item in items:
+        await outbox.put(item)
+    for _ in range(downstream_workers):
+        await outbox.put(_DONE)
+
+
+async def drain(outbox: asyncio.Queue, tasks: List[asyncio.Task]) -> AsyncIterator[Any]:
+    """Yield the pipeline's output until its last stage is done, then clean up.
+
+    A stage that dies outside of `fn` never marks its output done, so its
+    error is raised here instead of waiting for output that will not come.
+    Closing the generator early cancels every stage.
+    """
+    running = set(tasks)
+    getter = None
+    try:
+        while True:
+            getter = asyncio.ensure_future(outbox.get())
+            while not getter.done():
+                done, _ = await asyncio.wait(
+                    {getter, *running}, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done - {getter}:
+                    running.discard(task)
+                    if not task.cancelled() and task.exception() is not None:
+                        raise task.exception()
+            item = getter.result()
+            if item is _DONE:
+                break
+            yield item
+        await asyncio.gather(*tasks)
+    finally:
+        if getter is not None:
+            getter.cancel()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
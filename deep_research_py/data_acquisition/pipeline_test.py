@@ -0,0 +1,143 @@
+import asyncio
+from contextlib import aclosing
+
+import pytest
+
+from deep_research_py.data_acquisition.manager import SearchAndScrapeManager
+from deep_research_py.data_acquisition.pipeline import drain, feed, run_stage
+from deep_research_py.data_acquisition.politeness import PolitenessScheduler
+from deep_research_py.data_acquisition.scraper import ScrapedContent, Scraper
+from deep_research_py.data_acquisition.search import SearchEngine, SearchResult
+from deep_research_py.data_acquisition.services import SearchService
+
+
+class FakeSearch(SearchEngine):
+    async def search(self, query, num_results=10, **kwargs):
+        urls = [f"https://{query}.com/{i}" for i in range(num_results - 1)]
+        # Found by every query, scraped once
+        urls.append("https://shared.com/")
+        return [SearchResult(title=url, url=url, description="", position=i) for i, url in enumerate(urls)]
+
+
+class FakeScraper(Scraper):
+    def __init__(self, delay=lambda url: 0.0):
+        self.delay = delay
+        self.scraped = []
+        self.active = 0
+        self.cancelled = 0
+
+    async def setup(self):
+        pass
+
+    async def teardown(self):
+        pass
+
+    async def scrape(self, url, **kwargs):
+        self.active += 1
+        try:
+            await asyncio.sleep(self.delay(url))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.active -= 1
+        self.scraped.append(url)
+        return ScrapedContent(url=url, html="", text=f"text of {url}", status_code=200, metadata={})
+
+
+def manager(scraper):
+    return SearchAndScrapeManager(
+        search_engine=FakeSearch(),
+        scraper=scraper,
+        scheduler=PolitenessScheduler(global_concurrency=16, per_host_concurrency=4, min_interval=0),
+    )
+
+
+async def test_every_result_is_delivered_once():
+    scraper = FakeScraper()
+
+    async def extract(item):
+        if item.search_result.url.endswith("/1"):
+            raise ValueError("extraction failed")
+        return item.scraped.text.upper()
+
+    results = [
+        item
+        async for item in manager(scraper).pipeline(
+            ["a", "b", "c"], extract=extract, num_results=5, queue_size=2
+        )
+    ]
+    urls = sorted(item.search_result.url for item in results)
+    assert urls == sorted({f"https://{q}.com/{i}" for q in "abc" for i in range(4)} | {"https://shared.com/"})
+    assert sorted(scraper.scraped) == urls
+    for item in results:
+        if item.search_result.url.endswith("/1"):
+            # A failed extraction still delivers the scraped page
+            assert item.extracted is None and item.scraped is not None
+        else:
+            assert item.extracted == item.scraped.text.upper()
+
+
+async def test_bounded_queues_hold_back_upstream_stages():
+    calls = 0
+
+    async def fn(item):
+        nonlocal calls
+        calls += 1
+        return [item]
+
+    inbox, outbox = asyncio.Queue(maxsize=2), asyncio.Queue(maxsize=2)
+    tasks = [
+        asyncio.create_task(feed(range(100), inbox, 1)),
+        asyncio.create_task(run_stage("test", inbox, outbox, fn, 1, 1)),
+    ]
+    # Nobody reads `outbox`: two results fill it, the third blocks the worker
+    await asyncio.sleep(0.05)
+    assert calls == 3
+    assert inbox.full()
+
+    async with aclosing(drain(outbox, tasks)) as items:
+        assert [item async for item in items] == list(range(100))
+
+
+async def test_stage_dying_outside_fn_does_not_hang_drain():
+    async def fn(item):
+        # Not a list of results, the stage fails outside of `fn`
+        return None
+
+    inbox, outbox = asyncio.Queue(maxsize=2), asyncio.Queue(maxsize=2)
+    tasks = [
+        asyncio.create_task(feed(range(10), inbox, 2)),
+        asyncio.create_task(run_stage("test", inbox, outbox, fn, 2, 1)),
+    ]
+
+    async def consume():
+        return [item async for item in drain(outbox, tasks)]
+
+    with pytest.raises(TypeError):
+        await asyncio.wait_for(consume(), timeout=2)
+    assert all(task.done() for task in tasks)
+
+
+async def test_closing_early_cancels_upstream_work():
+    scraper = FakeScraper(delay=lambda url: 0.0 if url == "https://a.com/0" else 10.0)
+    pipeline = manager(scraper).pipeline(["a", "b"], num_results=5, max_concurrent_scrapes=4)
+
+    async with aclosing(pipeline) as items:
+        async for item in items:
+            assert item.search_result.url == "https://a.com/0"
+            break
+
+    assert scraper.cancelled > 0
+    assert scraper.active == 0
+
+
+async def test_search_service_streams_pipeline_results():
+    service = SearchService(service_type="playwright_ddgs")
+    service.manager = manager(FakeScraper())
+    items = [item async for item in service.search_many(["a", "b"], limit=3)]
+    assert sorted(item["url"] for item in items) == [
+        "https://a.com/0", "https://a.com/1", "https://b.com/0", "https://b.com/1", "https://shared.com/",
+    ]
+    assert all(item["content"] == f"text of {item['url']}" for item in items)
+    assert {item["query"] for item in items} == {"a", "b"}
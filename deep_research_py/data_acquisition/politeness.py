@@ -0,0 +1,149 @@
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+
+from deep_research_py.utils import logger
+
+# Statuses after which a host is left alone for a while
+BACKOFF_STATUSES = frozenset({429, 503})
+DEFAULT_BACKOFF = 30.0
+# A huge Retry-After would stall every fetch queued for the host
+MAX_BACKOFF = 300.0
+
+
+def retry_after(headers: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    value = None
+    for key, header_value in (headers or {}).items():
+        if key.lower() == "retry-after":
+            value = str(header_value).strip()
+            break
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def host_key(url: str) -> str:
+    """Host a request counts against, `www.` variants share one budget."""
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+@dataclass
+class HostPolicy:
+    concurrency: int = 2
+    min_interval: float = 1.0
+
+
+class _HostState:
+    def __init__(self, policy: HostPolicy):
+        self.policy = policy
+        self.semaphore = asyncio.Semaphore(policy.concurrency)
+        self.next_start = 0.0
+
+
+class PolitenessScheduler:
+    """Process-wide scheduler for page fetches.
+
+    Every fetch takes a slot for its host (at most `per_host_concurrency` at
+    once, started at least `min_interval` seconds apart) and then one of
+    `global_concurrency` slots shared by all hosts. Waiting on a busy host
+    does not hold a global slot, so other hosts keep being fetched.
+    Configured with SCRAPE_GLOBAL_CONCURRENCY, SCRAPE_HOST_CONCURRENCY and
+    SCRAPE_HOST_INTERVAL.
+    """
+
+    def __init__(
+        self,
+        global_concurrency: Optional[int] = None,
+        per_host_concurrency: Optional[int] = None,
+        min_interval: Optional[float] = None,
+        host_policies: Optional[Dict[str, HostPolicy]] = None,
+    ):
+        self.global_concurrency = global_concurrency or int(
+            os.getenv("SCRAPE_GLOBAL_CONCURRENCY", "16")
+        )
+        self.default_policy = HostPolicy(
+            concurrency=per_host_concurrency or int(os.getenv("SCRAPE_HOST_CONCURRENCY", "2")),
+            min_interval=(
+                min_interval
+                if min_interval is not None
+                else float(os.getenv("SCRAPE_HOST_INTERVAL", "1.0"))
+            ),
+        )
+        self.host_policies = dict(host_policies or {})
+
+        ## asyncio primitives are bound to the loop they are used on, so the
+        ## state is rebuilt when the scheduler is used from a new event loop.
+        self._loop = None
+        self._global: Optional[asyncio.Semaphore] = None
+        self._hosts: Dict[str, _HostState] = {}
+
+    def configure(self, host: str, concurrency: int, min_interval: float) -> None:
+        """Override the policy of one host, e.g. a slow supplier directory."""
+        self.host_policies[host] = HostPolicy(concurrency, min_interval)
+        self._hosts.pop(host, None)
+
+    def _state(self, host: str) -> _HostState:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._global = asyncio.Semaphore(self.global_concurrency)
+            self._hosts = {}
+
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(self.host_policies.get(host, self.default_policy))
+            self._hosts[host] = state
+        return state
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """Hold a host slot and a global slot for one fetch of `url`."""
+        host = host_key(url)
+        state = self._state(host)
+        async with state.semaphore:
+            # Reserve the next start time for this host before sleeping
+            now = time.monotonic()
+            start = max(now, state.next_start)
+            state.next_start = start + state.policy.min_interval
+            if start > now:
+                await asyncio.sleep(start - now)
+
+            async with self._global:
+                yield
+
+    def penalize(self, url: str, delay: float) -> None:
+        """Hold back further fetches from the host of `url`, e.g. after a 429."""
+        delay = min(delay, MAX_BACKOFF)
+        host = host_key(url)
+        state = self._state(host)
+        state.next_start = max(state.next_start, time.monotonic() + delay)
+        logger.warning(f"Backing off {host} for {delay:.0f}s")
+
+    def observe(self, url: str, status_code: int, headers: Optional[Dict[str, Any]] = None) -> None:
+        """Back off the host of `url` if the response asked us to slow down."""
+        if status_code in BACKOFF_STATUSES:
+            delay = retry_after(headers)
+            self.penalize(url, DEFAULT_BACKOFF if delay is None else delay)
+
+    def observe_scrape(self, url: str, result) -> None:
+        """`observe` a `ScrapedContent`, including a fetch hidden behind a stale cached copy."""
+        metadata = result.metadata or {}
+        self.observe(url, metadata.get("fetch_status", result.status_code), metadata.get("headers"))
+
+
+# Shared by every scraper in the process
+politeness = PolitenessScheduler()
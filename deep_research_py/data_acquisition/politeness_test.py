@@ -0,0 +1,111 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import pytest
+
+from deep_research_py.data_acquisition.politeness import (
+    DEFAULT_BACKOFF,
+    MAX_BACKOFF,
+    PolitenessScheduler,
+    host_key,
+    retry_after,
+)
+from deep_research_py.data_acquisition.scraper import ScrapedContent
+
+
+async def fetch_starts(scheduler, urls, hold=0.0):
+    starts = {}
+
+    async def fetch(i, url):
+        async with scheduler.slot(url):
+            starts[i] = time.monotonic()
+            await asyncio.sleep(hold)
+
+    await asyncio.gather(*(fetch(i, url) for i, url in enumerate(urls)))
+    return [starts[i] for i in range(len(urls))]
+
+
+async def test_same_host_fetches_are_spaced():
+    scheduler = PolitenessScheduler(global_concurrency=8, per_host_concurrency=4, min_interval=0.05)
+    urls = ["https://a.com/1", "https://www.a.com/2", "https://a.com/3"]
+    starts = sorted(await fetch_starts(scheduler, urls))
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    assert all(gap >= 0.045 for gap in gaps)
+
+
+async def test_other_hosts_are_not_delayed():
+    scheduler = PolitenessScheduler(global_concurrency=8, per_host_concurrency=1, min_interval=0.2)
+    started = time.monotonic()
+    starts = await fetch_starts(scheduler, ["https://a.com/1", "https://b.com/1", "https://c.com/1"])
+    assert max(starts) - started < 0.1
+
+
+async def test_global_concurrency_is_bounded():
+    scheduler = PolitenessScheduler(global_concurrency=2, per_host_concurrency=2, min_interval=0)
+    active = peak = 0
+
+    async def fetch(url):
+        nonlocal active, peak
+        async with scheduler.slot(url):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(fetch(f"https://host{i}.com/") for i in range(6)))
+    assert peak == 2
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({"Retry-After": "120"}, 120.0),
+        ({"retry-after": " 7 "}, 7.0),
+        ({"Retry-After": "-5"}, 0.0),
+        ({"Retry-After": "soon"}, None),
+        ({}, None),
+        (None, None),
+    ],
+)
+def test_retry_after(headers, expected):
+    assert retry_after(headers) == expected
+
+
+def test_retry_after_http_date():
+    delay = retry_after({"Retry-After": formatdate(time.time() + 60, usegmt=True)})
+    assert 55 <= delay <= 61
+
+
+def host_wait(scheduler, url):
+    return scheduler._state(host_key(url)).next_start - time.monotonic()
+
+
+async def test_backoff_statuses_hold_back_the_host():
+    scheduler = PolitenessScheduler(min_interval=0)
+    scheduler.observe("https://a.com/x", 200)
+    assert host_wait(scheduler, "https://a.com/") <= 0
+
+    scheduler.observe("https://a.com/x", 429, {"Retry-After": "20"})
+    assert 19 <= host_wait(scheduler, "https://www.a.com/") <= 20
+    assert host_wait(scheduler, "https://b.com/") <= 0
+
+    scheduler.observe("https://b.com/x", 503)
+    assert DEFAULT_BACKOFF - 1 <= host_wait(scheduler, "https://b.com/") <= DEFAULT_BACKOFF
+
+    scheduler.observe("https://c.com/x", 429, {"Retry-After": "86400"})
+    assert host_wait(scheduler, "https://c.com/") <= MAX_BACKOFF
+
+
+async def test_observe_scrape_uses_the_hidden_fetch_status():
+    scheduler = PolitenessScheduler(min_interval=0)
+    # A stale cached copy served after the refetch was rate limited
+    result = ScrapedContent(
+        url="https://a.com/x",
+        html="",
+        text="cached",
+        status_code=200,
+        metadata={"fetch_status": 429, "headers": {"Retry-After": "10"}},
+    )
+    scheduler.observe_scrape(result.url, result)
+    assert 9 <= host_wait(scheduler, "https://a.com/") <= 10
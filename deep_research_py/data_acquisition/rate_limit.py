@@ -0,0 +1,171 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+from deep_research_py.utils import logger
+
+T = TypeVar("T")
+
+# Default (tokens per second, burst) for each search provider
+DEFAULT_RATES: Dict[str, Tuple[float, int]] = {
+    "duckduckgo": (1.0, 2),
+    "firecrawl": (2.0, 5),
+}
+FALLBACK_RATE = (1.0, 1)
+
+RATE_LIMIT_MARKERS = ("429", "ratelimit", "rate limit", "too many requests")
+
+
+def is_rate_limit_error(e: BaseException) -> bool:
+    """Best-effort detection of 429 / rate limit errors across the search SDKs."""
+    if "ratelimit" in type(e).__name__.lower():
+        return True
+
+    response = getattr(e, "response", None)
+    for status in (
+        getattr(e, "status_code", None),
+        getattr(e, "status", None),
+        getattr(response, "status_code", None),
+    ):
+        if status == 429:
+            return True
+
+    message = str(e).lower()
+    return any(marker in message for marker in RATE_LIMIT_MARKERS)
+
+
+class TokenBucket:
+    """Token bucket shared by every caller of one provider.
+
+    Callers reserve a token and are told how long to wait for it, so the wait
+    can be an `asyncio.sleep` on the event loop or a `time.sleep` in a worker
+    thread. A rate limit response pushes back every caller of the bucket.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token and return the number of seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    async def acquire(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def penalize(self, delay: float) -> None:
+        """Hold back every caller of this bucket for at least `delay` seconds."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+
+class RateLimiter:
+    """Process-wide rate limit scheduler for the search providers.
+
+    Each provider gets its own token bucket, configured with
+    SEARCH_RATE_LIMIT_<PROVIDER> (tokens per second) and SEARCH_RATE_BURST_<PROVIDER>.
+    Calls that fail with a rate limit error are retried with jittered
+    exponential backoff, while callers of other providers keep going.
+    """
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 2.0, max_delay: float = 60.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, name: str, rate: float, burst: int = 1) -> None:
+        with self._lock:
+            self._buckets[name] = TokenBucket(rate, burst)
+
+    def bucket(self, name: str) -> TokenBucket:
+        with self._lock:
+            if name not in self._buckets:
+                rate, burst = DEFAULT_RATES.get(name, FALLBACK_RATE)
+                env_name = name.upper()
+                self._buckets[name] = TokenBucket(
+                    rate=float(os.getenv(f"SEARCH_RATE_LIMIT_{env_name}", rate)),
+                    burst=int(os.getenv(f"SEARCH_RATE_BURST_{env_name}", burst)),
+                )
+            return self._buckets[name]
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with equal jitter."""
+        delay = min(self.max_delay, self.base_delay * 2**attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _should_retry(
+        self,
+        name: str,
+        e: Exception,
+        attempt: int,
+        retryable: Callable[[Exception], bool],
+    ) -> Optional[float]:
+        if attempt >= self.max_retries or not retryable(e):
+            return None
+
+        delay = self.backoff(attempt)
+        self.bucket(name).penalize(delay)
+        logger.warning(f"{name} rate limited ({e}), backing off for {delay:.1f}s")
+        return delay
+
+    async def call(
+        self,
+        name: str,
+        fn: Callable[[], Awaitable[T]],
+        retryable: Callable[[Exception], bool] = is_rate_limit_error,
+    ) -> T:
+        """Run `fn` once a token for `name` is available, retrying on rate limits."""
+        bucket = self.bucket(name)
+        attempt = 0
+        while True:
+            await bucket.acquire()
+            try:
+                return await fn()
+            except Exception as e:
+                if self._should_retry(name, e, attempt, retryable) is None:
+                    raise
+                attempt += 1
+
+    def call_blocking(
+        self,
+        name: str,
+        fn: Callable[[], T],
+        retryable: Callable[[Exception], bool] = is_rate_limit_error,
+    ) -> T:
+        """Blocking variant of `call` for code running in worker threads."""
+        bucket = self.bucket(name)
+        attempt = 0
+        while True:
+            bucket.acquire_blocking()
+            try:
+                return fn()
+            except Exception as e:
+                if self._should_retry(name, e, attempt, retryable) is None:
+                    raise
+                attempt += 1
+
+
+# Shared by every search backend in the process
+rate_limiter = RateLimiter()
@@ -1,9 +1,52 @@
 import random
+import asyncio
 from dataclasses import dataclass
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from deep_research_py.utils import logger
 from abc import ABC, abstractmethod
-from playwright.async_api import async_playwright, Browser, BrowserContext, TimeoutError
+from urllib.parse import urlsplit
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Route, TimeoutError
+
+# Only the page text is used, so nothing that does not affect it is downloaded.
+# Stylesheets and scripts stay: innerText depends on them for what is visible.
+BLOCKED_RESOURCE_TYPES = frozenset(
+    {"image", "media", "font", "texttrack", "manifest", "eventsource", "websocket"}
+)
+
+# Analytics, ads and tag managers, matched against the host and its parents
+BLOCKED_HOSTS = frozenset(
+    {
+        "google-analytics.com",
+        "googletagmanager.com",
+        "googlesyndication.com",
+        "doubleclick.net",
+        "googleadservices.com",
+        "facebook.net",
+        "connect.facebook.net",
+        "hotjar.com",
+        "segment.io",
+        "segment.com",
+        "mixpanel.com",
+        "newrelic.com",
+        "nr-data.net",
+        "scorecardresearch.com",
+        "quantserve.com",
+        "adsrvr.org",
+        "amazon-adsystem.com",
+        "taboola.com",
+        "outbrain.com",
+        "criteo.com",
+        "hubspot.com",
+        "clarity.ms",
+    }
+)
+
+
+def is_blocked_host(url: str) -> bool:
+    host = urlsplit(url).hostname or ""
+    parts = host.split(".")
+    return any(".".join(parts[i:]) in BLOCKED_HOSTS for i in range(len(parts) - 1))
+
 
 # ---- Data Models ----
 
@@ -41,8 +84,33 @@ class Scraper(ABC):
         pass
 
 
+class PageSlot:
+    """One reusable page in the pool, bound to one of the pool's contexts."""
+
+    def __init__(self, context_idx: int):
+        self.context_idx = context_idx
+        self.page: Optional[Page] = None
+        self.navigations = 0
+        self.crashed = False
+
+    def healthy(self) -> bool:
+        return self.page is not None and not self.crashed and not self.page.is_closed()
+
+
 class PlaywrightScraper:
-    """Playwright-based scraper implementation."""
+    """Playwright-based scraper implementation.
+
+    Scrapes run on a pool of `num_contexts` browser contexts with
+    `pages_per_context` reusable pages each, so up to
+    num_contexts * pages_per_context pages load concurrently. A page is
+    replaced after `max_navigations_per_page` navigations, after a crash or a
+    failed scrape, and a context is rebuilt when it can no longer open pages.
+
+    Images, fonts, media and known trackers are blocked. Pages are read once
+    the DOM is ready plus a short settle (at most `settle_ms`) for late
+    scripts, instead of waiting for the network to go idle. The HTML is only
+    serialized when `capture_html` is set.
+    """
 
     def __init__(
         self,
@@ -50,17 +118,49 @@ class PlaywrightScraper:
         browser_type: str = "chromium",
         user_agent: Optional[str] = None,
         timeout: int = 6000,
+        num_contexts: int = 2,
+        pages_per_context: int = 4,
+        max_navigations_per_page: int = 50,
+        capture_html: bool = False,
+        settle_ms: int = 1500,
+        blocked_resource_types: Optional[frozenset] = BLOCKED_RESOURCE_TYPES,
+        block_trackers: bool = True,
     ):
         self.headless = headless
         self.browser_type = browser_type
         self.user_agent = user_agent
         self.timeout = timeout
+        self.num_contexts = num_contexts
+        self.pages_per_context = pages_per_context
+        self.max_navigations_per_page = max_navigations_per_page
+        self.capture_html = capture_html
+        self.settle_ms = settle_ms
+        self.blocked_resource_types = blocked_resource_types or frozenset()
+        self.block_trackers = block_trackers
         self.browser = None
-        self.context = None
+        self.contexts: List[Optional[BrowserContext]] = []
+        # Bumped on every rebuild, so concurrent failures rebuild a context once
+        self._context_generations: List[int] = []
+        self._context_locks: List[asyncio.Lock] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._setup_lock = asyncio.Lock()
+
+        self.pages_created = 0
+        self.pages_recycled = 0
+        self.contexts_rebuilt = 0
+        self.requests_blocked = 0
+
+    @property
+    def pool_size(self) -> int:
+        return self.num_contexts * self.pages_per_context
 
     async def setup(self):
-        """Initialize Playwright browser and context."""
+        """Initialize Playwright browser and the context/page pool."""
+        async with self._setup_lock:
+            if self.browser is None:
+                await self._launch()
 
+    async def _launch(self):
         self.playwright = await async_playwright().start()
 
         browser_method = getattr(self.playwright, self.browser_type)
@@ -86,10 +186,21 @@ class PlaywrightScraper:
                 "--mute-audio",
             ],
         )
-        self.context = await self.setup_context(self.browser)
+        self.contexts = [
+            await self.setup_context(self.browser) for _ in range(self.num_contexts)
+        ]
+        self._context_generations = [0] * self.num_contexts
+        self._context_locks = [asyncio.Lock() for _ in range(self.num_contexts)]
+
+        # Pages are opened lazily, the first time their slot is used
+        self._idle = asyncio.Queue()
+        for _ in range(self.pages_per_context):
+            for context_idx in range(self.num_contexts):
+                self._idle.put_nowait(PageSlot(context_idx))
 
         logger.info(
-            f"Playwright {self.browser_type} browser initialized in {'headless' if self.headless else 'headed'} mode"
+            f"Playwright {self.browser_type} browser initialized in {'headless' if self.headless else 'headed'} mode "
+            f"with {self.num_contexts} contexts x {self.pages_per_context} pages"
         )
 
     async def setup_context(self, browser: Browser) -> BrowserContext:
@@ -198,38 +309,158 @@ class PlaywrightScraper:
             };
         """)
 
+        if self.blocked_resource_types or self.block_trackers:
+            await context.route("**/*", self._route)
+
         return context
 
+    async def _route(self, route: Route) -> None:
+        """Abort requests for resources that cannot change the page text."""
+        request = route.request
+        try:
+            # A page hosted on a listed domain (hubspot.com, say) is still
+            # scraped, tracker and ad iframes are not
+            main_document = request.is_navigation_request() and request.frame.parent_frame is None
+            if request.resource_type in self.blocked_resource_types or (
+                self.block_trackers and not main_document and is_blocked_host(request.url)
+            ):
+                self.requests_blocked += 1
+                await route.abort()
+            else:
+                await route.continue_()
+        except Exception:
+            # The page went away while the request was pending
+            pass
+
     async def teardown(self):
         """Clean up Playwright resources."""
+        for context in self.contexts:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+        self.contexts = []
+        self._context_generations = []
+        self._context_locks = []
+        self._idle = None
         if self.browser:
             await self.browser.close()
+            self.browser = None
         if hasattr(self, "playwright") and self.playwright:
             await self.playwright.stop()
-        logger.info("Playwright resources cleaned up")
+            self.playwright = None
+        logger.info(
+            f"Playwright resources cleaned up ({self.pages_created} pages opened, "
+            f"{self.pages_recycled} recycled, {self.contexts_rebuilt} contexts rebuilt, "
+            f"{self.requests_blocked} requests blocked)"
+        )
 
-    async def scrape(self, url: str, **kwargs) -> ScrapedContent:
-        """Scrape a URL using Playwright and return standardized content."""
-        if not self.browser:
+    async def _rebuild_context(self, context_idx: int, generation: int) -> BrowserContext:
+        """Replace the context at `context_idx` unless it changed since `generation`.
+
+        Several slots of a crashed context fail together; only the first
+        rebuilds it, the others pick up the new context.
+        """
+        async with self._context_locks[context_idx]:
+            if self._context_generations[context_idx] != generation:
+                return self.contexts[context_idx]
+
+            old = self.contexts[context_idx]
+            if old is not None:
+                try:
+                    await old.close()
+                except Exception:
+                    pass
+            self.contexts[context_idx] = await self.setup_context(self.browser)
+            self._context_generations[context_idx] += 1
+            self.contexts_rebuilt += 1
+            return self.contexts[context_idx]
+
+    async def _open_page(self, slot: PageSlot) -> None:
+        generation = self._context_generations[slot.context_idx]
+        try:
+            page = await self.contexts[slot.context_idx].new_page()
+        except Exception as e:
+            # A context that cannot open pages has crashed, replace it
+            logger.warning(f"Rebuilding browser context {slot.context_idx}: {e}")
+            context = await self._rebuild_context(slot.context_idx, generation)
+            page = await context.new_page()
+
+        slot.page = page
+        slot.navigations = 0
+        slot.crashed = False
+        page.on("crash", lambda _: setattr(slot, "crashed", True))
+        self.pages_created += 1
+
+    async def acquire_page(self) -> PageSlot:
+        """Wait for a free slot in the pool and make sure its page is usable."""
+        if self.browser is None:
             await self.setup()
 
+        slot = await self._idle.get()
+        try:
+            if not slot.healthy():
+                await self._close_page(slot)
+                await self._open_page(slot)
+        except BaseException:
+            self._idle.put_nowait(slot)
+            raise
+        return slot
+
+    async def _close_page(self, slot: PageSlot) -> None:
+        if slot.page is not None:
+            try:
+                await slot.page.close()
+            except Exception:
+                pass
+            self.pages_recycled += 1
+        slot.page = None
+
+    async def release_page(self, slot: PageSlot, failed: bool = False) -> None:
+        """Return a slot to the pool, recycling its page if it is worn out or broken."""
+        try:
+            if failed or not slot.healthy() or slot.navigations >= self.max_navigations_per_page:
+                await self._close_page(slot)
+        finally:
+            if self._idle is not None:
+                self._idle.put_nowait(slot)
+
+    async def _settle(self, page: Page) -> None:
+        """Give late scripts a moment to render, without waiting for every request."""
+        if self.settle_ms <= 0:
+            return
+        try:
+            await page.wait_for_load_state("networkidle", timeout=self.settle_ms)
+        except TimeoutError:
+            pass
+
+    async def scrape(self, url: str, capture_html: Optional[bool] = None, **kwargs) -> ScrapedContent:
+        """Scrape a URL using Playwright and return standardized content."""
+        if capture_html is None:
+            capture_html = self.capture_html
+        slot = await self.acquire_page()
+        failed = False
+
         try:
-            page = await self.context.new_page()
+            page = slot.page
+            slot.navigations += 1
 
             # Navigate to URL
             try:
-                response = await page.goto(url, wait_until="networkidle")
+                response = await page.goto(url, wait_until="domcontentloaded")
+                await self._settle(page)
             except TimeoutError:
                 logger.warning(
-                    "Networkidle timed out. Proceeding with partially loaded content."
+                    "Navigation timed out. Proceeding with partially loaded content."
                 )
                 response = None
 
             status_code = response.status if response else 0
 
-            # Get HTML and text content
+            # Get HTML (only when asked for) and text content
             title = await page.title()
-            html = await page.content()
+            html = await page.content() if capture_html else ""
 
             # ------- MOST IMPORTANT COMMENT IN THE REPO -------
             # Extract only user-visible text content from the page
@@ -238,9 +469,6 @@ class PlaywrightScraper:
             # Essentially captures what a human would see when viewing the page
             text = await page.evaluate("document.body.innerText")
 
-            # Close the page
-            await page.close()
-
             return ScrapedContent(
                 url=url,
                 html=html,
@@ -252,8 +480,16 @@ class PlaywrightScraper:
                 },
             )
 
+        except asyncio.CancelledError:
+            # Cancelled mid-navigation (e.g. a scrape deadline), don't reuse the page
+            failed = True
+            raise
         except Exception as e:
+            failed = True
             logger.error(f"Error scraping {url}: {str(e)}")
             return ScrapedContent(
                 url=url, html="", text="", status_code=0, metadata={"error": str(e)}
             )
+        finally:
+            # The page goes back to the pool instead of being closed
+            await self.release_page(slot, failed)
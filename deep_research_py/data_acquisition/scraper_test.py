@@ -0,0 +1,55 @@
+import pytest
+
+from deep_research_py.data_acquisition.scraper import PlaywrightScraper
+
+
+class FakeFrame:
+    def __init__(self, parent_frame=None):
+        self.parent_frame = parent_frame
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type, navigation=False, frame=None):
+        self.url = url
+        self.resource_type = resource_type
+        self.navigation = navigation
+        self.frame = frame or FakeFrame()
+
+    def is_navigation_request(self):
+        return self.navigation
+
+
+class FakeRoute:
+    def __init__(self, request):
+        self.request = request
+        self.outcome = None
+
+    async def abort(self):
+        self.outcome = "abort"
+
+    async def continue_(self):
+        self.outcome = "continue"
+
+
+@pytest.mark.parametrize(
+    "request_, outcome",
+    [
+        # The page being scraped, even on a tracker's domain
+        (FakeRequest("https://www.hubspot.com/pricing", "document", navigation=True), "continue"),
+        # An ad iframe navigating inside the page
+        (
+            FakeRequest(
+                "https://ads.doubleclick.net/frame", "document", navigation=True,
+                frame=FakeFrame(parent_frame=FakeFrame()),
+            ),
+            "abort",
+        ),
+        (FakeRequest("https://js.hubspot.com/tracker.js", "script"), "abort"),
+        (FakeRequest("https://example.com/app.js", "script"), "continue"),
+        (FakeRequest("https://example.com/photo.png", "image"), "abort"),
+    ],
+)
+async def test_route_blocks_trackers_but_not_the_main_document(request_, outcome):
+    route = FakeRoute(request_)
+    await PlaywrightScraper()._route(route)
+    assert route.outcome == outcome
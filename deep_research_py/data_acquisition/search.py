@@ -4,6 +4,7 @@ from typing import List, Dict, Any
 from deep_research_py.utils import logger
 from abc import ABC, abstractmethod
 from duckduckgo_search import DDGS
+from deep_research_py.data_acquisition.rate_limit import rate_limiter
 
 
 # ---- Data Models ----
@@ -47,8 +48,11 @@ class DdgsSearchEngine:
         try:
             # Convert to async operation
             loop = asyncio.get_event_loop()
-            results = await loop.run_in_executor(
-                None, lambda: list(self.ddgs.text(query, max_results=num_results))
+            results = await rate_limiter.call(
+                "duckduckgo",
+                lambda: loop.run_in_executor(
+                    None, lambda: list(self.ddgs.text(query, max_results=num_results))
+                ),
             )
 
             # Convert to standardized format
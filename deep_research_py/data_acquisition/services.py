@@ -1,55 +1,119 @@
 from enum import Enum
-from typing import Dict, Optional, Any, List, TypedDict
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, NotRequired, Optional, Any, List, TypedDict
 import os
+import re
 import json
+import hashlib
 import asyncio
 from deep_research_py.utils import logger
+from deep_research_py.cache import SQLiteCache, SingleFlight, get_search_cache
 from firecrawl import FirecrawlApp
 from deep_research_py.data_acquisition.manager import SearchAndScrapeManager
-from time import sleep
+from deep_research_py.data_acquisition.page_cache import get_page_cache
+from deep_research_py.data_acquisition.scraper import ScrapedContent
+from deep_research_py.data_acquisition.urls import VisitedUrls
+from deep_research_py.data_acquisition.rate_limit import rate_limiter, is_rate_limit_error
 
 from duckduckgo_search import DDGS
+from duckduckgo_search.exceptions import DuckDuckGoSearchException
 
 
-SLEEP_TIME = 30
+# Identical DuckDuckGo queries issued concurrently share one upstream request
+_ddg_inflight = SingleFlight()
+
+
+def normalize_search_query(query: str) -> str:
+    """Fold case, whitespace and trailing punctuation, which DuckDuckGo ignores."""
+    query = re.sub(r"\s+", " ", query.casefold()).strip()
+    return query.strip("?!.,;: ")
+
+
+def search_cache_key(query: str, region: str, backend: str, timelimit: Optional[str]) -> str:
+    payload = "\x1f".join(
+        ["ddg", normalize_search_query(query), region, backend, timelimit or ""]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
 
 class DuckDuckGoService:
     """DuckDuckGo search service."""
 
-    def __init__(self, region: str = "us-en"):
+    def __init__(
+        self,
+        region: str = "us-en",
+        backend: str = "lite",
+        timelimit: Optional[str] = "y",
+        cache: Optional[SQLiteCache] = None,
+    ):
         self.region = region
+        self.backend = backend
+        self.timelimit = timelimit
+        self.cache = cache if cache is not None else get_search_cache()
 
-    def search(self, query: str, limit: int = 5, attempt_number: int = 0) -> List[Dict[str, str]]:
-        """Perform a search using DuckDuckGo."""
+    def search(self, query: str, limit: int = 5, use_cache: bool = True) -> List[Dict[str, str]]:
+        """Perform a search using DuckDuckGo.
 
-        results = []
+        Results are cached on disk per normalized query, region, backend and
+        timelimit, and concurrent identical searches share one request.
+        """
+        key = search_cache_key(query, self.region, self.backend, self.timelimit)
+
+        if use_cache:
+            cached = self._get_cached(key, limit)
+            if cached is not None:
+                return cached
+
+        results = _ddg_inflight.do(f"{key}:{limit}", lambda: self._search(key, query, limit))
+        return list(results)
+
+    def _get_cached(self, key: str, limit: int) -> Optional[List[Dict[str, str]]]:
+        value = self.cache.get(key)
+        if value is None:
+            return None
+
+        entry = json.loads(value)
+        # A smaller earlier request can only serve this one if it was exhaustive
+        if entry["limit"] < limit and len(entry["results"]) >= entry["limit"]:
+            return None
+        return entry["results"][:limit]
+
+    def _search(self, key: str, query: str, limit: int) -> List[Dict[str, str]]:
+        results = self._fetch(query, limit)
+        if results:
+            self.cache.set(key, json.dumps({"limit": limit, "results": results}))
+        return results
+
+    def _fetch(self, query: str, limit: int) -> List[Dict[str, str]]:
         try:
-            with DDGS(proxy="tb") as ddgs:
-            ## with DDGS() as ddgs:
-                for result in ddgs.text(
-                    query,
-                    backend="lite",
-                    region=self.region,
-                    timelimit="y",
-                    max_results=limit,
-                ):
-                    results.append(
-                        {
-                            "url": result.get("href"),
-                            "title": result.get("title"),
-                            "content": result.get("body"),
-                        }
-                    )
+            return rate_limiter.call_blocking(
+                "duckduckgo",
+                lambda: self._text(query, limit),
+                retryable=lambda e: isinstance(e, DuckDuckGoSearchException)
+                or is_rate_limit_error(e),
+            )
         except Exception as e:
-            if attempt_number >= 2:
-                logger.error(f"Error searching with DuckDuckGo: {e}")
-                return results
-
-            print(f"Rate limiting error. Sleeping for {SLEEP_TIME} seconds then trying again.")
-            sleep(SLEEP_TIME)
-            return self.search(query, limit, attempt_number + 1)
+            logger.error(f"Error searching with DuckDuckGo: {e}")
+            return []
 
+    def _text(self, query: str, limit: int) -> List[Dict[str, str]]:
+        results = []
+        with DDGS(proxy="tb") as ddgs:
+        ## with DDGS() as ddgs:
+            for result in ddgs.text(
+                query,
+                backend=self.backend,
+                region=self.region,
+                timelimit=self.timelimit,
+                max_results=limit,
+            ):
+                results.append(
+                    {
+                        "url": result.get("href"),
+                        "title": result.get("title"),
+                        "content": result.get("body"),
+                    }
+                )
         return results
 
 
@@ -62,6 +126,7 @@ class SearchServiceType(Enum):
 
 class SearchResponse(TypedDict):
     data: List[Dict[str, str]]
+    cancelled_urls: NotRequired[List[str]]
 
 
 class SearchService:
@@ -110,6 +175,10 @@ class SearchService:
         """Search using the configured service.
 
         Returns data in a format compatible with the Firecrawl response format.
+        With `save_content`, page text is kept in the page cache (see
+        `page_cache.get_page_cache`) keyed by canonical URL. When a `deadline`
+        or `quorum` cut scraping short, `cancelled_urls` lists the results
+        returned without content.
         """
         await self.ensure_initialized()
 
@@ -137,26 +206,12 @@ class SearchService:
 
                     formatted_data.append(item)
 
-                response = {"data": formatted_data}
-
-            if save_content:
-                # Create the directory if it doesn't exist
-                os.makedirs("scraped_content", exist_ok=True)
+                # Results whose scrape hit a deadline or quorum are listed without content
+                response = {"data": formatted_data, "cancelled_urls": scraped_data["cancelled_urls"]}
 
-                # Save each result as a separate JSON file
-                for item in response.get("data", []):
-                    # Create a safe filename from the first 50 chars of the title
-                    title = item.get("title", "untitled")
-                    safe_filename = "".join(
-                        c for c in title[:50] if c.isalnum() or c in " ._-"
-                    ).strip()
-                    safe_filename = safe_filename.replace(" ", "_")
-
-                    # Save the content to a JSON file
-                    with open(
-                        f"scraped_content/{safe_filename}.json", "w", encoding="utf-8"
-                    ) as f:
-                        json.dump(item, f, ensure_ascii=False, indent=2)
+            if save_content and self.firecrawl is not None:
+                # Scraped pages are cached as they are fetched, Firecrawl results are stored here
+                await self._cache_pages(response.get("data", []))
 
             return response
 
@@ -164,6 +219,62 @@ class SearchService:
             logger.error(f"Error during search: {str(e)}")
             return {"data": []}
 
+    async def search_many(
+        self, queries: List[str], limit: int = 5, **kwargs
+    ) -> AsyncIterator[Dict[str, str]]:
+        """Search several queries, yielding each page as soon as it is scraped.
+
+        Items are `search` items with the `query` they were found for, in
+        completion order. Pages found by more than one query are yielded once.
+        Scraping uses `SearchAndScrapeManager.pipeline`, so a slow query or
+        page never holds back the others. Stopping early cancels the rest:
+
+            async with aclosing(search_service.search_many(queries)) as items:
+                async for item in items:
+                    ...
+        """
+        await self.ensure_initialized()
+
+        if self.manager is None:
+            # Firecrawl searches and scrapes in one call, yield each query's results as they land
+            async def search_one(query: str):
+                return query, await self.search(query, limit=limit, **kwargs)
+
+            visited = VisitedUrls()
+            tasks = [asyncio.create_task(search_one(query)) for query in queries]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    query, response = await next_done
+                    for item in visited.claim_new(response.get("data", [])):
+                        yield {**item, "query": query}
+            finally:
+                for task in tasks:
+                    task.cancel()
+            return
+
+        async with aclosing(self.manager.pipeline(queries, num_results=limit, **kwargs)) as results:
+            async for result in results:
+                yield {
+                    "query": result.query,
+                    "url": result.search_result.url,
+                    "title": result.search_result.title,
+                    "content": result.scraped.text if result.scraped is not None else "",
+                }
+
+    async def _cache_pages(self, items: List[Dict[str, str]]) -> None:
+        cache = get_page_cache()
+        for item in items:
+            if item.get("url") and item.get("content"):
+                await cache.async_put(
+                    ScrapedContent(
+                        url=item["url"],
+                        html="",
+                        text=item["content"],
+                        status_code=200,
+                        metadata={"title": item.get("title") or "", "tier": "firecrawl"},
+                    )
+                )
+
 
 class Firecrawl:
     """Simple wrapper for Firecrawl SDK."""
@@ -177,10 +288,13 @@ class Firecrawl:
         """Search using Firecrawl SDK in a thread pool to keep it async."""
         try:
             # Run the synchronous SDK call in a thread pool
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.app.search(
-                    query=query,
+            response = await rate_limiter.call(
+                "firecrawl",
+                lambda: asyncio.get_event_loop().run_in_executor(
+                    None,
+                    lambda: self.app.search(
+                        query=query,
+                    ),
                 ),
             )
 
@@ -0,0 +1,118 @@
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = frozenset(
+    {
+        "fbclid",
+        "gclid",
+        "dclid",
+        "msclkid",
+        "mc_cid",
+        "mc_eid",
+        "igshid",
+        "yclid",
+        "_ga",
+        "_gl",
+        "ref",
+        "ref_src",
+        "spm",
+    }
+)
+TRACKING_PREFIXES = ("utm_",)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so trivially different spellings of a page compare equal.
+
+    Lowercases the scheme and host, drops default ports, fragments,
+    tracking parameters and trailing slashes, and sorts the remaining query
+    parameters. The result is still a fetchable URL.
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    if not parts.scheme or not parts.hostname:
+        return url
+
+    scheme = parts.scheme.lower()
+    netloc = parts.hostname.lower()
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+
+    query = urlencode(
+        sorted(
+            (k, v)
+            for k, v in parse_qsl(parts.query, keep_blank_values=True)
+            if not is_tracking_param(k)
+        )
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def url_identity(url: str) -> str:
+    """Key under which URL variants of the same page are considered one page.
+
+    Like `canonicalize_url`, but http and https are folded together.
+    """
+    canonical = canonicalize_url(url)
+    scheme, sep, rest = canonical.partition("://")
+    if sep and scheme in DEFAULT_PORTS:
+        return rest
+    return canonical
+
+
+class VisitedUrls:
+    """Registry of URLs already fetched in a research run, by `url_identity`.
+
+    Shared by every branch of the research tree, so a page found by several
+    queries is fetched and sent to the LLM once. `claim` is the check-and-set
+    used before fetching; `urls` lists the first spelling seen of each page.
+    """
+
+    def __init__(self, urls: Optional[Iterable[str]] = None):
+        self._urls: Dict[str, str] = {}
+        self.skipped = 0
+        if urls:
+            self.add_all(urls)
+
+    def add_all(self, urls: Iterable[str]) -> None:
+        for url in urls:
+            self._urls.setdefault(url_identity(url), url)
+
+    def claim(self, url: str) -> bool:
+        """Record `url` as visited, False if it (or a variant of it) already was."""
+        key = url_identity(url)
+        if key in self._urls:
+            self.skipped += 1
+            return False
+        self._urls[key] = url
+        return True
+
+    def release(self, url: str) -> None:
+        """Forget a claimed URL that ended up not being fetched."""
+        self._urls.pop(url_identity(url), None)
+
+    def claim_new(self, results: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """The search results whose URL nobody has claimed yet, claiming them."""
+        return [item for item in results if not item.get("url") or self.claim(item["url"])]
+
+    def __contains__(self, url: str) -> bool:
+        return url_identity(url) in self._urls
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def urls(self) -> List[str]:
+        return list(self._urls.values())
@@ -0,0 +1,51 @@
+import pytest
+
+from deep_research_py.data_acquisition.urls import VisitedUrls, canonicalize_url, url_identity
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("HTTPS://Example.COM:443/a/?b=2&utm_source=x&a=1#top", "https://example.com/a?a=1&b=2"),
+        ("http://example.com:80", "http://example.com/"),
+        ("http://example.com:8080/x?fbclid=1", "http://example.com:8080/x"),
+        ("https://example.com/search?q=a+b&ref=home", "https://example.com/search?q=a+b"),
+        # Not an absolute URL, or an invalid port: returned as is
+        ("/relative/path", "/relative/path"),
+        ("http://example.com:bad/", "http://example.com:bad/"),
+    ],
+)
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_url_identity_folds_scheme():
+    assert url_identity("http://example.com/a/") == url_identity("https://EXAMPLE.com/a")
+    assert url_identity("ftp://example.com/a") == "ftp://example.com/a"
+    assert url_identity("https://example.com/a") != url_identity("https://example.com/b")
+
+
+def test_claim_and_release():
+    visited = VisitedUrls(["https://example.com/seen"])
+    assert "http://example.com/seen/" in visited
+    assert not visited.claim("https://example.com/seen#frag")
+    assert visited.skipped == 1
+
+    assert visited.claim("https://example.com/new?utm_medium=x")
+    assert not visited.claim("http://example.com/new")
+    visited.release("https://example.com/new")
+    assert "https://example.com/new" not in visited
+    assert visited.claim("http://example.com/new")
+    assert visited.urls() == ["https://example.com/seen", "http://example.com/new"]
+
+
+def test_claim_new_keeps_results_without_url():
+    visited = VisitedUrls(["https://a.com/1"])
+    results = [
+        {"url": "https://a.com/1"},
+        {"url": "https://a.com/2"},
+        {"url": "http://a.com/2/"},
+        {"title": "no url"},
+    ]
+    assert visited.claim_new(results) == [{"url": "https://a.com/2"}, {"title": "no url"}]
+    assert len(visited) == 2
@@ -0,0 +1,184 @@
+import re
+import random
+import hashlib
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+
+WORD_RE = re.compile(r"\w+")
+NUMBER_RE = re.compile(r"\d")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the their "
+    "this to was were which with".split()
+)
+
+# 64 permutations in 32 bands of 2 rows: pairs at Jaccard 0.6 collide in some band
+# with probability ~1, candidates are then verified against the exact Jaccard.
+NUM_PERM = 64
+BANDS = 32
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def stem(word: str) -> str:
+    """Fold plurals, so "additive" and "additives" are one term."""
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def content_words(text: str) -> List[str]:
+    return [w for w in WORD_RE.findall(text.casefold()) if w not in STOPWORDS]
+
+
+def terms(text: str) -> FrozenSet[str]:
+    """The stemmed content words of `text`, the set learnings are compared on."""
+    return frozenset(stem(w) for w in content_words(text))
+
+
+def key_facts(text: str) -> FrozenSet[str]:
+    """Stemmed numbers and capitalized words (names, places) of `text`."""
+    return frozenset(
+        stem(t.casefold())
+        for t in WORD_RE.findall(text)
+        if NUMBER_RE.search(t) or (t[:1].isupper() and t.casefold() not in STOPWORDS)
+    )
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def information_density(text: str) -> Tuple[int, int]:
+    """Rank learnings by distinct numbers/entities, then by distinct words."""
+    return len(key_facts(text)), len(terms(text))
+
+
+class MinHasher:
+    """MinHash signatures from universal hashes of a 64-bit shingle digest."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = random.Random(seed)
+        self.params = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, term_set: Iterable[str]) -> Tuple[int, ...]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+            for s in term_set
+        ]
+        if not hashes:
+            return tuple([MERSENNE_PRIME] * len(self.params))
+        return tuple(
+            min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self.params
+        )
+
+
+class LearningDeduplicator:
+    """Incremental near-duplicate filter for research learnings.
+
+    Learnings are indexed with MinHash LSH as they arrive. A learning whose
+    Jaccard similarity with a kept one, over stemmed content words, reaches
+    `threshold` is a duplicate, so rewordings ("operates a plant" / "runs a
+    plant located") are merged. Learnings are never merged when one names a
+    number or proper noun the other does not mention: "capacity 1,500" and
+    "capacity 1,800" are both kept. Of a duplicate pair the more
+    information-dense one is kept.
+    """
+
+    def __init__(self, threshold: float = 0.6, num_perm: int = NUM_PERM, bands: int = BANDS):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+
+        self._learnings: Dict[int, str] = {}
+        self._terms: Dict[int, FrozenSet[str]] = {}
+        self._facts: Dict[int, FrozenSet[str]] = {}
+        self._signatures: Dict[int, Tuple[int, ...]] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[int]] = defaultdict(set)
+        self._next_id = 0
+
+        self.duplicates = 0
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [
+            (band, signature[band * self.rows : (band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    def _index(
+        self,
+        idx: int,
+        term_set: FrozenSet[str],
+        signature: Tuple[int, ...],
+        facts: FrozenSet[str],
+    ) -> None:
+        self._terms[idx] = term_set
+        self._facts[idx] = facts
+        self._signatures[idx] = signature
+        for key in self._band_keys(signature):
+            self._buckets[key].add(idx)
+
+    def _unindex(self, idx: int) -> None:
+        for key in self._band_keys(self._signatures.pop(idx)):
+            self._buckets[key].discard(idx)
+        del self._terms[idx]
+        del self._facts[idx]
+
+    def add(self, learning: str) -> bool:
+        """Add a learning, returning False if it was dropped as a near-duplicate."""
+        learning = learning.strip()
+        if not learning:
+            return False
+
+        term_set = terms(learning)
+        signature = self.hasher.signature(term_set)
+        facts = key_facts(learning)
+
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates |= self._buckets.get(key, set())
+
+        best_idx, best_similarity = None, 0.0
+        for idx in candidates:
+            # A number or name only one of them mentions is a different fact
+            if not (facts <= self._terms[idx] and self._facts[idx] <= term_set):
+                continue
+            similarity = jaccard(term_set, self._terms[idx])
+            if similarity > best_similarity:
+                best_idx, best_similarity = idx, similarity
+
+        if best_idx is None or best_similarity < self.threshold:
+            idx = self._next_id
+            self._next_id += 1
+            self._learnings[idx] = learning
+            self._index(idx, term_set, signature, facts)
+            return True
+
+        self.duplicates += 1
+        if information_density(learning) > information_density(self._learnings[best_idx]):
+            # Keep the richer variant in the slot of the one it replaces
+            self._unindex(best_idx)
+            self._learnings[best_idx] = learning
+            self._index(best_idx, term_set, signature, facts)
+            return True
+
+        return False
+
+    def extend(self, learnings: Iterable[str]) -> None:
+        for learning in learnings:
+            self.add(learning)
+
+    @property
+    def learnings(self) -> List[str]:
+        return list(self._learnings.values())
+
+    def __len__(self) -> int:
+        return len(self._learnings)
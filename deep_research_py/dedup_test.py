@@ -0,0 +1,41 @@
+from deep_research_py.dedup import LearningDeduplicator
+
+BASE = "Supplier X delivers ethylene to plant Y in Sauget by pipeline since 2019"
+
+
+def test_exact_and_punctuation_duplicates_are_dropped():
+    dedup = LearningDeduplicator()
+    assert dedup.add(BASE)
+    assert not dedup.add(BASE + ".")
+    assert not dedup.add("  " + BASE.lower())
+    assert dedup.learnings == [BASE]
+    assert dedup.duplicates == 2
+
+
+def test_reworded_duplicate_is_dropped():
+    dedup = LearningDeduplicator()
+    assert dedup.add("Afton Chemical runs a lubricant additives plant located in Sauget, Illinois.")
+    assert not dedup.add("Afton Chemical operates a lubricant additive plant in Sauget, Illinois.")
+    assert len(dedup) == 1
+    assert dedup.duplicates == 1
+
+
+def test_differing_number_or_name_is_kept():
+    dedup = LearningDeduplicator()
+    assert dedup.add(BASE)
+    assert dedup.add(BASE.replace("2019", "2021"))
+    assert dedup.add(BASE.replace("Sauget", "Freeport"))
+    # An extra number is a fact the kept learning lacks
+    assert dedup.add(BASE + " at 1,500 tonnes a day")
+    assert len(dedup) == 4
+
+
+def test_superset_replaces_the_kept_learning():
+    dedup = LearningDeduplicator(threshold=0.5)
+    assert dedup.add(BASE)
+    richer = BASE + " under contract"
+    assert dedup.add(richer)
+    assert dedup.learnings == [richer]
+    # The shorter variant adds nothing and is dropped
+    assert not dedup.add(BASE)
+    assert dedup.learnings == [richer]
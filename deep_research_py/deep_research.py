@@ -1,18 +1,39 @@
-from typing import List, Dict, TypedDict, Optional, Union
-from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterator, List, Dict, NotRequired, TypedDict, Optional, Union
+from dataclasses import dataclass, field
+from contextlib import asynccontextmanager
 import asyncio
+import os
+import time
 import openai
 ## from ollama import chat
-from deep_research_py.llm_query import Gemini, Ollama
+from deep_research_py.llm_query import (
+    Gemini,
+    Ollama,
+    async_stream_query_json,
+    read_tagged_json,
+    stream_query_json,
+)
+from deep_research_py.json_utils import JsonArrayItemStream, JsonStringStream
 
 from deep_research_py.data_acquisition.services import search_service, DuckDuckGoService
-from deep_research_py.ai.providers import trim_prompt, get_client_response
+from deep_research_py.data_acquisition.scraper import Scraper
+from deep_research_py.data_acquisition.politeness import politeness
+from deep_research_py.data_acquisition.page_cache import CachingScraper, cached_page
+from deep_research_py.data_acquisition.urls import VisitedUrls
+from deep_research_py.ai.providers import encoder, trim_prompt, get_client_response
+from deep_research_py.ai.bm25 import select_passages
 from deep_research_py.prompt import system_prompt
+from deep_research_py.dedup import LearningDeduplicator
+from deep_research_py.accounting import RunAccounting, stage, track_run
+from deep_research_py.checkpoint import ROOT_KEY, ResearchCheckpoint, node_key
 from tqdm import tqdm
 import json
 
 MODEL = "gemma3:12b"
 
+# Learnings per map call in the map-reduce report and facility prediction
+REPORT_PARTITION_TOKENS = int(os.getenv("REPORT_PARTITION_TOKENS", "12000"))
+
 
 class SearchResponse(TypedDict):
     data: List[Dict[str, str]]
@@ -21,6 +42,10 @@ class SearchResponse(TypedDict):
 class ResearchResult(TypedDict):
     learnings: List[str]
     visited_urls: List[str]
+    # LLM calls, tokens and latency per stage, see `RunAccounting.summary`
+    usage: NotRequired[Dict[str, Any]]
+    # Set when the run is checkpointed, pass it to `resume_deep_research_local`
+    run_id: NotRequired[str]
 
 
 @dataclass
@@ -28,13 +53,12 @@ class SerpQuery:
     query: str
     research_goal: str
 
-def generate_serp_queries_local(
-    client: Union[Ollama, Gemini],
+def serp_queries_prompt(
     query: str,
     num_queries: int = 3,
     learnings: Optional[List[str]] = None,
-) -> List[SerpQuery]:
-    """Generate SERP queries based on user input and previous learnings."""
+) -> str:
+    """Build the prompt asking for SERP queries."""
 
     ## prompt = f"""Given the following prompt from the user, generate a list of SERP queries to research the topic. Return a JSON object with a 'queries' array field containing {num_queries} queries (or less if the original prompt is clear). Each query object should have 'query' and 'research_goal' fields. Make sure each query is unique and not similar to each other: <prompt>{query}</prompt>"""
     prompt = f"""Given the following facility from the user, generate a list of SERP queries to research the topic with the goal of finding likely suppliers, materials supplied, and transportation method. First identify likely input materials to their products, then search nearby for facilities which manufacture or supply those materials. Return a JSON object with a 'queries' array field containing {num_queries} queries (or less if the original prompt is clear). Each query object should have 'query' and 'research_goal' fields. Make sure each query is unique and not similar to each other: <prompt>{query}</prompt>"""
@@ -42,57 +66,78 @@ def generate_serp_queries_local(
     if learnings:
         prompt += f"\n\nHere are some learnings from previous research, use them to generate more specific queries: {' '.join(learnings)}"
 
-    '''
-    response = chat(
-        model=MODEL,
-        messages=[
-            {"role": "system", "content": system_prompt()},
-            {"role": "user", "content": prompt},
-        ],
-        format="json",
-        stream=False,
-    )["message"].content
+    return prompt
 
-    queries = json.loads(response).get("queries", [])
-    '''
-
-    queries = client.query_json(
-            user_prompt=prompt,
-            system_prompt=system_prompt(),
-            stream=False,
-            )["queries"]
 
+def parse_serp_queries(response: Dict, num_queries: int) -> List[SerpQuery]:
     queries = [
             {
                 "query": q["query"],
                 "research_goal": q["research_goal"],
             }
-            for q in queries
+            for q in response["queries"]
             if q["query"] and q["research_goal"]
             ]
     return [SerpQuery(**q) for q in queries][:num_queries]
 
 
+def generate_serp_queries_local(
+    client: Union[Ollama, Gemini],
+    query: str,
+    num_queries: int = 3,
+    learnings: Optional[List[str]] = None,
+) -> List[SerpQuery]:
+    """Generate SERP queries based on user input and previous learnings."""
+    with stage("generate_serp_queries"):
+        response = client.query_json(
+                user_prompt=serp_queries_prompt(query, num_queries, learnings),
+                system_prompt=system_prompt(),
+                stream=False,
+                )
+    return parse_serp_queries(response, num_queries)
+
 
-def process_serp_result_local(
+async def async_generate_serp_queries_local(
     client: Union[Ollama, Gemini],
+    query: str,
+    num_queries: int = 3,
+    learnings: Optional[List[str]] = None,
+) -> List[SerpQuery]:
+    """Awaitable `generate_serp_queries_local`."""
+    with stage("generate_serp_queries"):
+        response = await client.async_query_json(
+                user_prompt=serp_queries_prompt(query, num_queries, learnings),
+                system_prompt=system_prompt(),
+                stream=False,
+                )
+    return parse_serp_queries(response, num_queries)
+
+
+def serp_result_prompt(
     query: str,
     search_result: List[Dict[str, str]],
     num_learnings: int = 2,
     num_follow_up_questions: int = 1,
-) -> Dict[str, List[str]]:
-    """Process search results to extract learnings and follow-up questions."""
+    research_goal: Optional[str] = None,
+    token_budget: Optional[int] = None,
+) -> str:
+    """Build the prompt extracting learnings from search results.
+
+    Only the passages most relevant to the query and research goal (by BM25)
+    are kept, up to `token_budget` tokens in total.
+    """
 
     contents = [
         trim_prompt(item.get("content", ""), 25_000)
         for item in search_result
         if item.get("content")
     ]
+    contents = select_passages(f"{query} {research_goal or ''}", contents, token_budget)
 
     # Create the contents string separately
     contents_str = "".join(f"<content>\n{content}\n</content>" for content in contents)
 
-    prompt = (
+    return (
         f"Given the following contents from a SERP search for the query <query>{query}</query>, "
         f"generate a list of learnings from the contents. Return a JSON object with 'learnings' "
         f"and 'followUpQuestions' keys with array of strings as values. Include up to {num_learnings} learnings and "
@@ -101,24 +146,10 @@ def process_serp_result_local(
         f"<contents>{contents_str}</contents>"
     )
 
-    '''
-    response = json.loads(chat(
-        model=MODEL,
-        messages=[
-            {"role": "system", "content": system_prompt()},
-            {"role": "user", "content": prompt},
-        ],
-        format="json",
-        stream=False,
-    )["message"].content)
-    '''
-
-    response = client.query_json(
-            user_prompt=prompt,
-            system_prompt=system_prompt(),
-            stream=False,
-            )
 
+def parse_serp_result(
+    response: Dict, num_learnings: int, num_follow_up_questions: int
+) -> Dict[str, List[str]]:
     return {
         "learnings": response["learnings"][:num_learnings],
         "followUpQuestions": response["followUpQuestions"][
@@ -126,20 +157,67 @@ def process_serp_result_local(
         ],
     }
 
-def get_predicted_facilities_local(
+
+def process_serp_result_local(
     client: Union[Ollama, Gemini],
-    prompt: str,
-    learnings: List[str],
-    visited_urls: List[str],
-) -> str:
-    """Generate final report based on all research learnings."""
+    query: str,
+    search_result: List[Dict[str, str]],
+    num_learnings: int = 2,
+    num_follow_up_questions: int = 1,
+    research_goal: Optional[str] = None,
+    token_budget: Optional[int] = None,
+) -> Dict[str, List[str]]:
+    """Process search results to extract learnings and follow-up questions."""
+    with stage("process_serp_result"):
+        response = client.query_json(
+                user_prompt=serp_result_prompt(
+                    query,
+                    search_result,
+                    num_learnings,
+                    num_follow_up_questions,
+                    research_goal,
+                    token_budget,
+                ),
+                system_prompt=system_prompt(),
+                stream=False,
+                )
+    return parse_serp_result(response, num_learnings, num_follow_up_questions)
 
-    learnings_string = trim_prompt(
-        "\n".join([f"<learning>\n{learning}\n</learning>" for learning in learnings]),
-        150_000,
-    )
 
-    user_prompt = (
+async def async_process_serp_result_local(
+    client: Union[Ollama, Gemini],
+    query: str,
+    search_result: List[Dict[str, str]],
+    num_learnings: int = 2,
+    num_follow_up_questions: int = 1,
+    research_goal: Optional[str] = None,
+    token_budget: Optional[int] = None,
+) -> Dict[str, List[str]]:
+    """Awaitable `process_serp_result_local`."""
+    with stage("process_serp_result"):
+        response = await client.async_query_json(
+                user_prompt=serp_result_prompt(
+                    query,
+                    search_result,
+                    num_learnings,
+                    num_follow_up_questions,
+                    research_goal,
+                    token_budget,
+                ),
+                system_prompt=system_prompt(),
+                stream=False,
+                )
+    return parse_serp_result(response, num_learnings, num_follow_up_questions)
+
+
+def learnings_block(learnings: List[str]) -> str:
+    return "\n".join([f"<learning>\n{learning}\n</learning>" for learning in learnings])
+
+
+def predicted_facilities_prompt(prompt: str, learnings: List[str]) -> str:
+    learnings_string = trim_prompt(learnings_block(learnings), 150_000)
+
+    return (
         f"Given the following facility provided by the user, provide at least 10 specific nearby facilities "
         f"which likely supply them materials they use to make their products. Return JSON objects with a 'facilities' array field"
         f"containing objects with fields 'name', 'address', 'materials', 'transportation method', and 'evidence/rationale'."
@@ -148,24 +226,8 @@ def get_predicted_facilities_local(
         f"Here are all the learnings from research:\n\n<learnings>\n{learnings_string}\n</learnings>"
     )
 
-    '''
-    response = json.loads(chat(
-        model=MODEL,
-        messages=[
-            {"role": "system", "content": system_prompt()},
-            {"role": "user", "content": user_prompt},
-        ],
-        format="json",
-        stream=False,
-    )["message"].content)
-    '''
-
-    response = client.query_json(
-            user_prompt=user_prompt,
-            system_prompt=system_prompt(),
-            stream=False,
-            )
 
+def parse_predicted_facilities(response: Dict) -> List[Dict]:
     try:
         candidate_facilities = response.get("facilities", [])
 
@@ -175,20 +237,90 @@ def get_predicted_facilities_local(
         print(f"Raw response: {response}")
         return "Error generating report"
 
-def write_final_report_local(
+
+def get_predicted_facilities_local(
     client: Union[Ollama, Gemini],
     prompt: str,
     learnings: List[str],
     visited_urls: List[str],
-) -> str:
+) -> List[Dict]:
     """Generate final report based on all research learnings."""
+    with stage("predict_facilities"):
+        response = client.query_json(
+                user_prompt=predicted_facilities_prompt(prompt, learnings),
+                system_prompt=system_prompt(),
+                stream=False,
+                )
+    return parse_predicted_facilities(response)
+
+
+async def async_get_predicted_facilities_local(
+    client: Union[Ollama, Gemini],
+    prompt: str,
+    learnings: List[str],
+    visited_urls: List[str],
+) -> List[Dict]:
+    """Awaitable `get_predicted_facilities_local`."""
+    with stage("predict_facilities"):
+        response = await client.async_query_json(
+                user_prompt=predicted_facilities_prompt(prompt, learnings),
+                system_prompt=system_prompt(),
+                stream=False,
+                )
+    return parse_predicted_facilities(response)
 
-    learnings_string = trim_prompt(
-        "\n".join([f"<learning>\n{learning}\n</learning>" for learning in learnings]),
-        150_000,
-    )
 
-    user_prompt = (
+def stream_predicted_facilities_local(
+    client: Union[Ollama, Gemini],
+    prompt: str,
+    learnings: List[str],
+    visited_urls: List[str],
+) -> Iterator[Dict]:
+    """Yield each predicted facility as soon as the model finishes writing it."""
+    parser = JsonArrayItemStream()
+    parts = []
+    with stage("predict_facilities"):
+        for chunk in stream_query_json(
+            client,
+            user_prompt=predicted_facilities_prompt(prompt, learnings),
+            system_prompt=system_prompt(),
+        ):
+            parts.append(chunk)
+            yield from parser.feed(chunk)
+
+    # Untagged or malformed output, fall back to parsing the whole response
+    if not parser.items_found:
+        yield from parse_predicted_facilities(read_tagged_json("".join(parts)))
+
+
+async def async_stream_predicted_facilities_local(
+    client: Union[Ollama, Gemini],
+    prompt: str,
+    learnings: List[str],
+    visited_urls: List[str],
+) -> AsyncIterator[Dict]:
+    """Async `stream_predicted_facilities_local`."""
+    parser = JsonArrayItemStream()
+    parts = []
+    with stage("predict_facilities"):
+        async for chunk in async_stream_query_json(
+            client,
+            user_prompt=predicted_facilities_prompt(prompt, learnings),
+            system_prompt=system_prompt(),
+        ):
+            parts.append(chunk)
+            for facility in parser.feed(chunk):
+                yield facility
+
+    if not parser.items_found:
+        for facility in parse_predicted_facilities(read_tagged_json("".join(parts))):
+            yield facility
+
+
+def final_report_prompt(prompt: str, learnings: List[str]) -> str:
+    learnings_string = trim_prompt(learnings_block(learnings), 150_000)
+
+    return (
         f"Given the following prompt from the user, write a final report on the topic using "
         f"the learnings from research. Return a JSON object with a 'reportMarkdown' field "
         f"containing a detailed markdown report (aim for 3+ pages). Include ALL the learnings "
@@ -196,122 +328,908 @@ def write_final_report_local(
         f"Here are all the learnings from research:\n\n<learnings>\n{learnings_string}\n</learnings>"
     )
 
-    '''
-    response = json.loads(chat(
-        model=MODEL,
-        messages=[
-            {"role": "system", "content": system_prompt()},
-            {"role": "user", "content": user_prompt},
-        ],
-        format="json",
-        stream=False,
-    )["message"].content)
-    '''
 
-    response = client.query_json(
-            user_prompt=prompt,
-            system_prompt=system_prompt(),
-            stream=False,
-            )
+def sources_section(visited_urls: List[str]) -> str:
+    return "\n\n## Sources\n\n" + "\n".join([f"- {url}" for url in visited_urls])
+
 
+def parse_final_report(response: Dict, visited_urls: List[str]) -> str:
     try:
         report = response.get("reportMarkdown", "")
 
         # Append sources
-        urls_section = "\n\n## Sources\n\n" + "\n".join(
-            [f"- {url}" for url in visited_urls]
-        )
-        return report + urls_section
+        return report + sources_section(visited_urls)
     except json.JSONDecodeError as e:
         print(f"Error parsing JSON response: {e}")
         print(f"Raw response: {response}")
         return "Error generating report"
 
 
-def deep_research_local(
+def write_final_report_local(
+    client: Union[Ollama, Gemini],
+    prompt: str,
+    learnings: List[str],
+    visited_urls: List[str],
+) -> str:
+    """Generate final report based on all research learnings."""
+    with stage("write_final_report"):
+        response = client.query_json(
+                user_prompt=final_report_prompt(prompt, learnings),
+                system_prompt=system_prompt(),
+                stream=False,
+                )
+    return parse_final_report(response, visited_urls)
+
+
+async def async_write_final_report_local(
+    client: Union[Ollama, Gemini],
+    prompt: str,
+    learnings: List[str],
+    visited_urls: List[str],
+) -> str:
+    """Awaitable `write_final_report_local`."""
+    with stage("write_final_report"):
+        response = await client.async_query_json(
+                user_prompt=final_report_prompt(prompt, learnings),
+                system_prompt=system_prompt(),
+                stream=False,
+                )
+    return parse_final_report(response, visited_urls)
+
+
+def stream_final_report_local(
+    client: Union[Ollama, Gemini],
+    prompt: str,
+    learnings: List[str],
+    visited_urls: List[str],
+) -> Iterator[str]:
+    """Yield the markdown report as it is generated, followed by the sources."""
+    parser = JsonStringStream("reportMarkdown")
+    parts = []
+    streamed = False
+    with stage("write_final_report"):
+        for chunk in stream_query_json(
+            client,
+            user_prompt=final_report_prompt(prompt, learnings),
+            system_prompt=system_prompt(),
+        ):
+            parts.append(chunk)
+            text = parser.feed(chunk)
+            if text:
+                streamed = True
+                yield text
+
+    if not streamed:
+        yield read_tagged_json("".join(parts)).get("reportMarkdown", "")
+    yield sources_section(visited_urls)
+
+
+async def async_stream_final_report_local(
+    client: Union[Ollama, Gemini],
+    prompt: str,
+    learnings: List[str],
+    visited_urls: List[str],
+) -> AsyncIterator[str]:
+    """Async `stream_final_report_local`."""
+    parser = JsonStringStream("reportMarkdown")
+    parts = []
+    streamed = False
+    with stage("write_final_report"):
+        async for chunk in async_stream_query_json(
+            client,
+            user_prompt=final_report_prompt(prompt, learnings),
+            system_prompt=system_prompt(),
+        ):
+            parts.append(chunk)
+            text = parser.feed(chunk)
+            if text:
+                streamed = True
+                yield text
+
+    if not streamed:
+        yield read_tagged_json("".join(parts)).get("reportMarkdown", "")
+    yield sources_section(visited_urls)
+
+
+def partition_learnings(
+    learnings: List[str], token_budget: Optional[int] = None
+) -> List[List[str]]:
+    """Split learnings, in order, into groups of at most `token_budget` tokens.
+
+    Learnings from the same research branch are adjacent, so contiguous groups
+    keep related findings together. A learning larger than the budget gets a
+    group of its own.
+    """
+    return _partition(
+        learnings,
+        [f"<learning>\n{learning}\n</learning>" for learning in learnings],
+        token_budget,
+    )
+
+
+def partition_facilities(
+    facilities: List[Dict], token_budget: Optional[int] = None
+) -> List[List[Dict]]:
+    """Split candidate facilities, in order, into groups of at most `token_budget` tokens."""
+    return _partition(facilities, [json.dumps(f, indent=1) for f in facilities], token_budget)
+
+
+def _partition(items: List, texts: List[str], token_budget: Optional[int]) -> List[List]:
+    token_budget = token_budget or REPORT_PARTITION_TOKENS
+    if not items:
+        return []
+
+    lengths = [len(tokens) for tokens in encoder.encode_batch(texts, disallowed_special=())]
+
+    partitions, current, used = [], [], 0
+    for item, length in zip(items, lengths):
+        if current and used + length > token_budget:
+            partitions.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += length
+    partitions.append(current)
+    return partitions
+
+
+def condense_learnings_prompt(prompt: str, learnings: List[str]) -> str:
+    return (
+        f"Given the following prompt from the user and one batch of learnings from research, "
+        f"condense the learnings into notes for a section of the final report. Return a JSON "
+        f"object with a 'notes' array of strings. Merge learnings that state the same thing, "
+        f"but keep every entity, metric, number, and date.\n\n<prompt>{prompt}</prompt>\n\n"
+        f"Here is the batch of learnings:\n\n<learnings>\n{learnings_block(learnings)}\n</learnings>"
+    )
+
+
+def merge_facilities_prompt(prompt: str, facilities: List[Dict]) -> str:
+    return (
+        f"Given the following facility provided by the user and candidate supplier facilities "
+        f"found in separate batches of research, merge candidates that refer to the same facility "
+        f"(combining their materials and evidence) and provide at least 10 of the most likely "
+        f"suppliers. Return JSON objects with a 'facilities' array field containing objects with "
+        f"fields 'name', 'address', 'materials', 'transportation method', and 'evidence/rationale'."
+        f"\n\n<prompt>{prompt}</prompt>\n\n"
+        f"Here are the candidate facilities:\n\n<facilities>\n{json.dumps(facilities, indent=1)}\n</facilities>"
+    )
+
+
+async def map_queries(
+    client: Union[Ollama, Gemini],
+    prompts: List[str],
+    stage_name: str,
+    concurrency: int = 4,
+) -> List[Dict]:
+    """Run one JSON query per prompt, at most `concurrency` at a time.
+
+    A failed query yields an empty dict rather than failing the whole map.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def query(user_prompt: str) -> Dict:
+        async with semaphore:
+            with stage(stage_name):
+                try:
+                    response = await client.async_query_json(
+                        user_prompt=user_prompt,
+                        system_prompt=system_prompt(),
+                        stream=False,
+                    )
+                except Exception as e:
+                    print(f"Error in {stage_name} query: {e}")
+                    return {}
+        return response if isinstance(response, dict) else {}
+
+    return list(await asyncio.gather(*[query(p) for p in prompts]))
+
+
+async def reduce_learnings(
+    client: Union[Ollama, Gemini],
+    prompt: str,
+    learnings: List[str],
+    partition_tokens: Optional[int] = None,
+    concurrency: int = 4,
+) -> List[str]:
+    """Condense learnings partition by partition until they fit in one partition."""
+    partitions = partition_learnings(learnings, partition_tokens)
+    while len(partitions) > 1:
+        responses = await map_queries(
+            client,
+            [condense_learnings_prompt(prompt, p) for p in partitions],
+            "write_final_report_map",
+            concurrency,
+        )
+        notes = []
+        for partition, response in zip(partitions, responses):
+            condensed = [note for note in response.get("notes") or [] if note]
+            # A failed or empty call keeps its partition as is rather than losing it
+            notes.extend(condensed or partition)
+        if len(notes) >= len(learnings):
+            # Nothing was condensed, another round would not converge
+            break
+        learnings = notes
+        partitions = partition_learnings(learnings, partition_tokens)
+    return learnings
+
+
+async def async_write_final_report_map_reduce(
+    client: Union[Ollama, Gemini],
+    prompt: str,
+    learnings: List[str],
+    visited_urls: List[str],
+    partition_tokens: Optional[int] = None,
+    concurrency: int = 4,
+) -> str:
+    """Write the final report from any number of learnings.
+
+    Partitions of the learnings are condensed into notes in parallel (map),
+    repeating until the notes fit in one partition, then the report is
+    written from the notes (reduce). Each call sees at most one partition,
+    so nothing is trimmed away and latency follows the partition size.
+    """
+    notes = await reduce_learnings(client, prompt, learnings, partition_tokens, concurrency)
+    return await async_write_final_report_local(client, prompt, notes, visited_urls)
+
+
+async def async_get_predicted_facilities_map_reduce(
+    client: Union[Ollama, Gemini],
+    prompt: str,
+    learnings: List[str],
+    visited_urls: List[str],
+    partition_tokens: Optional[int] = None,
+    concurrency: int = 4,
+) -> List[Dict]:
+    """Predict facilities from any number of learnings.
+
+    Candidate facilities are extracted from each partition in parallel (map),
+    then merged group by group until they fit in one partition, which a
+    final call merges and ranks (reduce). No call sees more than one
+    partition of learnings or candidates.
+    """
+    partitions = partition_learnings(learnings, partition_tokens)
+    if len(partitions) <= 1:
+        return await async_get_predicted_facilities_local(client, prompt, learnings, visited_urls)
+
+    responses = await map_queries(
+        client,
+        [predicted_facilities_prompt(prompt, p) for p in partitions],
+        "predict_facilities_map",
+        concurrency,
+    )
+    candidates = [f for r in responses for f in parse_predicted_facilities(r)]
+
+    groups = partition_facilities(candidates, partition_tokens)
+    while len(groups) > 1:
+        responses = await map_queries(
+            client,
+            [merge_facilities_prompt(prompt, group) for group in groups],
+            "predict_facilities_merge",
+            concurrency,
+        )
+        merged = []
+        for group, response in zip(groups, responses):
+            merged.extend(parse_predicted_facilities(response) or group)
+        if len(merged) >= len(candidates):
+            # Merging stalled: the candidates cannot fit in one final call, so
+            # return every group's merge rather than dropping any of them
+            print(f"Could not merge {len(candidates)} candidate facilities further, keeping all of them")
+            return merged
+        candidates = merged
+        groups = partition_facilities(candidates, partition_tokens)
+    candidates = groups[0] if groups else []
+
+    with stage("predict_facilities"):
+        response = await client.async_query_json(
+            user_prompt=merge_facilities_prompt(prompt, candidates),
+            system_prompt=system_prompt(),
+            stream=False,
+        )
+    return parse_predicted_facilities(response) or candidates
+
+
+def _run_with_client(client: Union[Ollama, Gemini], coro):
+    async def run():
+        try:
+            return await coro
+        finally:
+            # The pooled async client is bound to this event loop
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def write_final_report_map_reduce(
+    client: Union[Ollama, Gemini],
+    prompt: str,
+    learnings: List[str],
+    visited_urls: List[str],
+    partition_tokens: Optional[int] = None,
+    concurrency: int = 4,
+) -> str:
+    """Blocking `async_write_final_report_map_reduce`."""
+    return _run_with_client(
+        client,
+        async_write_final_report_map_reduce(
+            client, prompt, learnings, visited_urls, partition_tokens, concurrency
+        ),
+    )
+
+
+def get_predicted_facilities_map_reduce(
+    client: Union[Ollama, Gemini],
+    prompt: str,
+    learnings: List[str],
+    visited_urls: List[str],
+    partition_tokens: Optional[int] = None,
+    concurrency: int = 4,
+) -> List[Dict]:
+    """Blocking `async_get_predicted_facilities_map_reduce`."""
+    return _run_with_client(
+        client,
+        async_get_predicted_facilities_map_reduce(
+            client, prompt, learnings, visited_urls, partition_tokens, concurrency
+        ),
+    )
+
+
+@dataclass
+class ResearchLimits:
+    """Concurrency caps for the local research engine.
+
+    `concurrency` bounds every in-flight operation across the whole tree, the
+    per-stage caps bound searches, page scrapes and LLM calls individually.
+    """
+
+    concurrency: int = 8
+    search_concurrency: int = 2
+    scrape_concurrency: int = 4
+    llm_concurrency: int = 2
+
+
+@dataclass
+class ResearchBudget:
+    """Stop conditions for a research run, None means unlimited.
+
+    Once any budget is spent no new frontier items are started; items already
+    in flight finish their current stage and do not expand further.
+    """
+
+    max_llm_calls: Optional[int] = None
+    max_tokens: Optional[int] = None
+    max_searches: Optional[int] = None
+    max_seconds: Optional[float] = None
+
+
+class BudgetExhausted(Exception):
+    """Raised instead of starting an LLM call once the research budget is spent."""
+
+
+@dataclass(order=True)
+class FrontierItem:
+    """A pending SERP query, ordered by priority (lowest first) then arrival."""
+
+    priority: float
+    seq: int
+    serp_query: SerpQuery = field(compare=False)
+    breadth: int = field(compare=False)
+    depth: int = field(compare=False)
+    learnings: List[str] = field(compare=False, default_factory=list)
+    # Deterministic node key, see `checkpoint.node_key`
+    key: str = field(compare=False, default=ROOT_KEY)
+
+
+class LocalResearchEngine:
+    """Runs research as a priority frontier of SERP queries worked concurrently.
+
+    Each query is searched and its results extracted. If it has depth left,
+    follow-up queries are generated and pushed back onto the frontier. Their
+    priority is the novelty of the learnings their parent produced, so the most
+    productive directions are expanded first. Without a budget this visits the
+    same breadth x depth tree (with halving breadth) as the recursive version.
+    """
+
+    def __init__(
+        self,
+        gemini_client: Gemini,
+        ollama_client: Ollama,
+        limits: Optional[ResearchLimits] = None,
+        search: Optional[DuckDuckGoService] = None,
+        scraper: Optional[Scraper] = None,
+        budget: Optional[ResearchBudget] = None,
+        passage_token_budget: Optional[int] = None,
+        checkpoint: Optional[ResearchCheckpoint] = None,
+    ):
+        self.gemini_client = gemini_client
+        self.ollama_client = ollama_client
+        self.limits = limits or ResearchLimits()
+        self.ddgs = search or DuckDuckGoService()
+        if scraper is not None and not isinstance(scraper, CachingScraper):
+            scraper = CachingScraper(scraper)
+        self.scraper = scraper
+        self.budget = budget or ResearchBudget()
+        self.passage_token_budget = passage_token_budget
+        self.checkpoint = checkpoint
+        # Paraphrased learnings from different branches collapse as they arrive
+        self.deduplicator = LearningDeduplicator()
+
+        self._global = asyncio.Semaphore(self.limits.concurrency)
+        self._search = asyncio.Semaphore(self.limits.search_concurrency)
+        self._scrape = asyncio.Semaphore(self.limits.scrape_concurrency)
+        self._llm = asyncio.Semaphore(self.limits.llm_concurrency)
+        self._progress = None
+
+        self._frontier: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._seq = 0
+        # Pages already fetched by any branch, see `VisitedUrls`
+        self.visited = VisitedUrls()
+
+        self.accounting: Optional[RunAccounting] = None
+        self._tokens_at_start = 0
+        self.llm_calls = 0
+        self.searches = 0
+        self.started_at = None
+        self.stop_reason = None
+
+    @asynccontextmanager
+    async def _slot(self, stage: asyncio.Semaphore):
+        """Hold a stage slot and a global slot for the duration of one operation."""
+        async with stage:
+            async with self._global:
+                yield
+
+    @property
+    def tokens(self) -> int:
+        """Tokens spent by this engine's LLM calls, as reported by the clients."""
+        if self.accounting is None:
+            return 0
+        return self.accounting.total_tokens - self._tokens_at_start
+
+    def budget_exhausted(self) -> bool:
+        """Check every budget, remembering the first one that ran out."""
+        if self.stop_reason is not None:
+            return True
+
+        budget = self.budget
+        if budget.max_llm_calls is not None and self.llm_calls >= budget.max_llm_calls:
+            self.stop_reason = "max_llm_calls"
+        elif budget.max_tokens is not None and self.tokens >= budget.max_tokens:
+            self.stop_reason = "max_tokens"
+        elif budget.max_searches is not None and self.searches >= budget.max_searches:
+            self.stop_reason = "max_searches"
+        elif (
+            budget.max_seconds is not None
+            and self.started_at is not None
+            and time.monotonic() - self.started_at >= budget.max_seconds
+        ):
+            self.stop_reason = "max_seconds"
+
+        if self.stop_reason is not None:
+            print(f"Research budget exhausted: {self.stop_reason}")
+        return self.stop_reason is not None
+
+    async def search(self, query: str, limit: int = 5) -> List[Dict[str, str]]:
+        async with self._slot(self._search):
+            if self.budget_exhausted():
+                return []
+            self.searches += 1
+            return await asyncio.to_thread(self.ddgs.search, query, limit)
+
+    async def scrape(self, result: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Replace search snippets with full page text when a scraper is configured."""
+        if self.scraper is None:
+            return result
+
+        async def scrape_item(item: Dict[str, str]) -> Dict[str, str]:
+            if not item.get("url"):
+                return item
+            scraped, cache_kwargs = await cached_page(self.scraper, item["url"])
+            if scraped is None:
+                async with politeness.slot(item["url"]):
+                    async with self._slot(self._scrape):
+                        scraped = await self.scraper.scrape(item["url"], **cache_kwargs)
+                politeness.observe_scrape(item["url"], scraped)
+            if scraped.text:
+                return {**item, "content": scraped.text}
+            return item
+
+        return list(await asyncio.gather(*[scrape_item(item) for item in result]))
+
+    async def query_json(self, user_prompt: str, stage_name: str) -> Dict:
+        """Run one LLM call under the LLM cap and charge it to the budget."""
+        async with self._slot(self._llm):
+            if self.budget_exhausted():
+                raise BudgetExhausted(self.stop_reason)
+            self.llm_calls += 1
+            with stage(stage_name):
+                return await self.ollama_client.async_query_json(
+                    user_prompt=user_prompt,
+                    system_prompt=system_prompt(),
+                    stream=False,
+                )
+
+    async def generate_queries(
+        self,
+        query: str,
+        num_queries: int,
+        learnings: Optional[List[str]],
+        parent_key: str = ROOT_KEY,
+    ) -> List[SerpQuery]:
+        if self.checkpoint is not None:
+            saved = await asyncio.to_thread(self.checkpoint.get_queries, parent_key)
+            if saved is not None:
+                return [SerpQuery(**q) for q in saved]
+
+        response = await self.query_json(
+            serp_queries_prompt(query, num_queries, learnings), "generate_serp_queries"
+        )
+        serp_queries = parse_serp_queries(response, num_queries)
+        if self.checkpoint is not None:
+            await asyncio.to_thread(
+                self.checkpoint.save_queries, parent_key, [vars(q) for q in serp_queries]
+            )
+        return serp_queries
+
+    async def search_node(self, item: FrontierItem) -> List[Dict[str, str]]:
+        """Search (and scrape) a node's query, or replay its checkpointed results."""
+        if self.checkpoint is not None:
+            saved = await asyncio.to_thread(self.checkpoint.get_search, item.key)
+            if saved is not None:
+                self.visited.add_all(r["url"] for r in saved if r.get("url"))
+                return saved
+
+        result = await self.search(item.serp_query.query, limit=5)
+        # Pages another branch already fetched and extracted are dropped here
+        result = await self.scrape(self.visited.claim_new(result))
+        # An empty result may just mean the budget ran out, search again on resume
+        if self.checkpoint is not None and (result or not self.budget_exhausted()):
+            await asyncio.to_thread(self.checkpoint.save_search, item.key, result)
+        return result
+
+    async def extract_node(
+        self,
+        item: FrontierItem,
+        result: List[Dict[str, str]],
+        num_follow_up_questions: int,
+    ) -> Dict[str, List[str]]:
+        """Extract a node's learnings, or replay its checkpointed extraction."""
+        if self.checkpoint is not None:
+            saved = await asyncio.to_thread(self.checkpoint.get_extraction, item.key)
+            if saved is not None:
+                return saved
+
+        extraction = await self.process_result(
+            item.serp_query, result, num_follow_up_questions=num_follow_up_questions
+        )
+        if self.checkpoint is not None:
+            await asyncio.to_thread(self.checkpoint.save_extraction, item.key, extraction)
+        return extraction
+
+    async def process_result(
+        self,
+        serp_query: SerpQuery,
+        result: List[Dict[str, str]],
+        num_learnings: int = 2,
+        num_follow_up_questions: int = 1,
+    ) -> Dict[str, List[str]]:
+        # Splitting, tokenizing and BM25 ranking every page would stall the event loop
+        user_prompt = await asyncio.to_thread(
+            serp_result_prompt,
+            serp_query.query,
+            result,
+            num_learnings,
+            num_follow_up_questions,
+            research_goal=serp_query.research_goal,
+            token_budget=self.passage_token_budget,
+        )
+        response = await self.query_json(user_prompt, "process_serp_result")
+        return parse_serp_result(response, num_learnings, num_follow_up_questions)
+
+    def push(
+        self,
+        serp_query: SerpQuery,
+        breadth: int,
+        depth: int,
+        learnings: List[str],
+        priority: float = 0.0,
+        key: str = ROOT_KEY,
+    ) -> None:
+        self._seq += 1
+        self._frontier.put_nowait(
+            FrontierItem(
+                priority=priority,
+                seq=self._seq,
+                serp_query=serp_query,
+                breadth=breadth,
+                depth=depth,
+                learnings=learnings,
+                key=key,
+            )
+        )
+
+    async def process(self, item: FrontierItem) -> None:
+        """Search, extract and (depth permitting) expand one frontier item."""
+        serp_query = item.serp_query
+
+        # Search for content, keeping only pages no other branch has seen
+        result = await self.search_node(item)
+
+        # Calculate new breadth and depth for next iteration
+        new_breadth = max(1, item.breadth // 2)
+        new_depth = item.depth - 1
+
+        if self.budget_exhausted():
+            return
+
+        # Process the search results. With no new pages (all seen by other
+        # branches, or an empty search) there is nothing to extract, but the
+        # direction is still expanded from the learnings it inherited.
+        if result:
+            new_learnings = await self.extract_node(item, result, new_breadth)
+        else:
+            new_learnings = {"learnings": [], "followUpQuestions": []}
+        novel = [self.deduplicator.add(learning) for learning in new_learnings["learnings"]]
+        if self._progress is not None:
+            self._progress.update(1)
+
+        # If we have more depth to go, queue the follow-up queries
+        if new_depth <= 0 or self.budget_exhausted():
+            return
+
+        print(f"Researching deeper, breadth: {new_breadth}, depth: {new_depth}")
+
+        next_query = f"""
+        Previous research goal: {serp_query.research_goal}
+        Follow-up research directions: {" ".join(new_learnings["followUpQuestions"] or [serp_query.query])}
+        """.strip()
+
+        all_learnings = item.learnings + new_learnings["learnings"]
+
+        novelty = sum(novel) / len(novel) if novel else 0.0
+        children = await self.generate_queries(
+            next_query, new_breadth, all_learnings, parent_key=item.key
+        )
+        for i, child in enumerate(children):
+            self.push(
+                child,
+                new_breadth,
+                new_depth,
+                all_learnings,
+                priority=-novelty,
+                key=node_key(item.key, i, child.query),
+            )
+
+    async def worker(self) -> None:
+        while True:
+            item = await self._frontier.get()
+            try:
+                if not self.budget_exhausted():
+                    await self.process(item)
+            except BudgetExhausted:
+                pass
+            except Exception as e:
+                print(f"Error processing query {item.serp_query.query!r}: {e}")
+            finally:
+                self._frontier.task_done()
+
+    async def run(
+        self,
+        query: str,
+        breadth: int,
+        depth: int,
+        learnings: Optional[List[str]] = None,
+        visited_urls: Optional[List[str]] = None,
+    ) -> ResearchResult:
+        """Set up the scraper (if any), work the frontier until done or over budget."""
+        learnings = learnings or []
+        visited_urls = visited_urls or []
+
+        if self.scraper is not None:
+            await self.scraper.setup()
+
+        self.started_at = time.monotonic()
+        self.deduplicator.extend(learnings)
+        # Pages from earlier research are already covered by its learnings
+        self.visited.add_all(visited_urls)
+        self._progress = tqdm(desc="Processing queries", unit="query")
+        if self.checkpoint is not None:
+            await asyncio.to_thread(self.checkpoint.start, query, breadth, depth)
+
+        with track_run() as accounting:
+            self.accounting = accounting
+            self._tokens_at_start = accounting.total_tokens
+
+            workers = [
+                asyncio.create_task(self.worker()) for _ in range(self.limits.concurrency)
+            ]
+            try:
+                try:
+                    serp_queries = await self.generate_queries(query, breadth, learnings)
+                except BudgetExhausted:
+                    serp_queries = []
+                for i, serp_query in enumerate(serp_queries):
+                    self.push(
+                        serp_query,
+                        breadth,
+                        depth,
+                        learnings,
+                        key=node_key(ROOT_KEY, i, serp_query.query),
+                    )
+                await self._frontier.join()
+                if self.checkpoint is not None:
+                    await asyncio.to_thread(self.checkpoint.finish, self.stop_reason)
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                self._progress.close()
+                if self.scraper is not None:
+                    await self.scraper.teardown()
+
+        research_result: ResearchResult = {
+            "learnings": self.deduplicator.learnings,
+            "visited_urls": self.visited.urls(),
+            "usage": accounting.summary(),
+        }
+        if self.checkpoint is not None:
+            research_result["run_id"] = self.checkpoint.run_id
+        return research_result
+
+
+async def deep_research_local_async(
     gemini_client: Gemini,
     ollama_client: Ollama,
     query: str,
     breadth: int,
     depth: int,
-    learnings: List[str] = [],
-    visited_urls: List[str] = [],
+    learnings: Optional[List[str]] = None,
+    visited_urls: Optional[List[str]] = None,
+    limits: Optional[ResearchLimits] = None,
+    scraper: Optional[Scraper] = None,
+    budget: Optional[ResearchBudget] = None,
+    usage_path: Optional[str] = None,
+    run_id: Optional[str] = None,
+    checkpoint_path: Optional[str] = None,
+    passage_token_budget: Optional[int] = None,
 ) -> ResearchResult:
     """
-    Main research function that recursively explores a topic.
+    Research a topic, running sibling branches of the research tree concurrently.
 
     Args:
         query: Research query/topic
         breadth: Number of parallel searches to perform
         depth: How many levels deep to research
         learnings: Previous learnings to build upon
-        visited_urls: Previously visited URLs
+        visited_urls: Previously visited URLs, these pages (and variants of
+            their URLs) are not fetched again
+        limits: Global and per-stage concurrency caps
+        scraper: Optional scraper used to replace search snippets with page text
+        budget: Caps on LLM calls, tokens, searches and wall-clock time
+        usage_path: Optional path for a sidecar JSON of every LLM call
+        run_id: Checkpoint every completed node under this id, a run with the
+            same id resumes from its checkpoint
+        checkpoint_path: SQLite file for checkpoints (CHECKPOINT_PATH by default)
+        passage_token_budget: Tokens of page text kept per search result
+            prompt (PASSAGE_TOKEN_BUDGET by default)
     """
-    # Generate search queries
-    serp_queries = generate_serp_queries_local(
-        client=ollama_client,
-        query=query,
-        num_queries=breadth,
-        learnings=learnings,
+    checkpoint = ResearchCheckpoint(run_id, checkpoint_path) if run_id else None
+    engine = LocalResearchEngine(
+        gemini_client=gemini_client,
+        ollama_client=ollama_client,
+        limits=limits,
+        scraper=scraper,
+        budget=budget,
+        passage_token_budget=passage_token_budget,
+        checkpoint=checkpoint,
     )
+    try:
+        result = await engine.run(query, breadth, depth, learnings, visited_urls)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+    if usage_path:
+        engine.accounting.write_json(usage_path)
+    return result
 
-    ddgs = DuckDuckGoService()
-    def process_query(serp_query: SerpQuery) -> ResearchResult:
-        # Search for content
-        result = ddgs.search(serp_query.query, limit=5)
-
-        # Collect new URLs
-        new_urls = [
-            item.get("url") for item in result if item.get("url")
-        ]
-
-        # Calculate new breadth and depth for next iteration
-        new_breadth = max(1, breadth // 2)
-        new_depth = depth - 1
-
-        # Process the search results
-        new_learnings = process_serp_result_local(
-            client=ollama_client,
-            query=serp_query.query,
-            search_result=result,
-            num_follow_up_questions=new_breadth,
-        )
-
-        all_learnings = learnings + new_learnings["learnings"]
-        all_urls = visited_urls + new_urls
 
-        # If we have more depth to go, continue research
-        if new_depth > 0:
-            print(
-                f"Researching deeper, breadth: {new_breadth}, depth: {new_depth}"
-            )
+def deep_research_local(
+    gemini_client: Gemini,
+    ollama_client: Ollama,
+    query: str,
+    breadth: int,
+    depth: int,
+    learnings: List[str] = [],
+    visited_urls: List[str] = [],
+    limits: Optional[ResearchLimits] = None,
+    budget: Optional[ResearchBudget] = None,
+    usage_path: Optional[str] = None,
+    run_id: Optional[str] = None,
+    checkpoint_path: Optional[str] = None,
+    passage_token_budget: Optional[int] = None,
+) -> ResearchResult:
+    """
+    Main research function that explores a topic breadth x depth deep.
 
-            next_query = f"""
-            Previous research goal: {serp_query.research_goal}
-            Follow-up research directions: {" ".join(new_learnings["followUpQuestions"])}
-            """.strip()
+    Args:
+        query: Research query/topic
+        breadth: Number of parallel searches to perform
+        depth: How many levels deep to research
+        learnings: Previous learnings to build upon
+        visited_urls: Previously visited URLs, these pages (and variants of
+            their URLs) are not fetched again
+        limits: Global and per-stage concurrency caps
+        budget: Caps on LLM calls, tokens, searches and wall-clock time
+        usage_path: Optional path for a sidecar JSON of every LLM call
+        run_id: Checkpoint every completed node under this id, a run with the
+            same id resumes from its checkpoint
+        checkpoint_path: SQLite file for checkpoints (CHECKPOINT_PATH by default)
+        passage_token_budget: Tokens of page text kept per search result
+            prompt (PASSAGE_TOKEN_BUDGET by default)
+    """
 
-            return deep_research_local(
+    async def run() -> ResearchResult:
+        try:
+            return await deep_research_local_async(
                 gemini_client=gemini_client,
                 ollama_client=ollama_client,
-                query=next_query,
-                breadth=new_breadth,
-                depth=new_depth,
-                learnings=all_learnings,
-                visited_urls=all_urls,
+                query=query,
+                breadth=breadth,
+                depth=depth,
+                learnings=list(learnings),
+                visited_urls=list(visited_urls),
+                limits=limits,
+                budget=budget,
+                usage_path=usage_path,
+                run_id=run_id,
+                checkpoint_path=checkpoint_path,
+                passage_token_budget=passage_token_budget,
             )
+        finally:
+            # The pooled async clients are bound to this event loop
+            await ollama_client.aclose()
+            if gemini_client is not None:
+                await gemini_client.aclose()
 
-        return {"learnings": all_learnings, "visited_urls": all_urls}
+    return asyncio.run(run())
 
-    results = [process_query(query) for query in tqdm(serp_queries, desc="Processing queries")]
 
-    all_learnings = list(
-        set(learning for result in results for learning in result["learnings"])
-    )
+def resume_deep_research_local(
+    gemini_client: Gemini,
+    ollama_client: Ollama,
+    run_id: str,
+    checkpoint_path: Optional[str] = None,
+    limits: Optional[ResearchLimits] = None,
+    budget: Optional[ResearchBudget] = None,
+    usage_path: Optional[str] = None,
+    passage_token_budget: Optional[int] = None,
+) -> ResearchResult:
+    """
+    Resume a checkpointed run with its original query, breadth and depth.
 
-    all_urls = list(set(url for result in results for url in result["visited_urls"]))
+    Completed nodes are replayed from the checkpoint; only searches and LLM
+    calls that never finished are made again.
+    """
+    checkpoint = ResearchCheckpoint(run_id, checkpoint_path)
+    try:
+        info = checkpoint.run_info()
+    finally:
+        checkpoint.close()
+    if info is None:
+        raise ValueError(f"No checkpoint for run {run_id!r}")
 
-    return {"learnings": all_learnings, "visited_urls": all_urls}
+    print(f"Resuming run {run_id} ({info['status']}): {info['query']}")
+    return deep_research_local(
+        gemini_client=gemini_client,
+        ollama_client=ollama_client,
+        query=info["query"],
+        breadth=info["breadth"],
+        depth=info["depth"],
+        limits=limits,
+        budget=budget,
+        usage_path=usage_path,
+        run_id=run_id,
+        checkpoint_path=checkpoint_path,
+        passage_token_budget=passage_token_budget,
+    )
 
 
 
@@ -363,13 +1281,13 @@ if __name__ == "__main__":
     print(md_result)
     '''
 
-    # Example usage of get_predicted_facilities
-    predicted_facilities = get_predicted_facilities_local(
+    # Example usage of stream_predicted_facilities, each facility is printed
+    # as soon as the model has finished writing it
+    print("Predicted Facilities:")
+    for fac in stream_predicted_facilities_local(
         client=gemini_client,
         prompt=query,
         learnings=results["learnings"],
         visited_urls=results["visited_urls"],
-    )
-    print("Predicted Facilities:")
-    for fac in predicted_facilities:
+    ):
         print(json.dumps(fac, indent=2))
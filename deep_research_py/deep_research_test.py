@@ -0,0 +1,99 @@
+import hashlib
+import json
+import re
+
+from deep_research_py.checkpoint import ResearchCheckpoint
+from deep_research_py.deep_research import (
+    LocalResearchEngine,
+    ResearchBudget,
+    async_get_predicted_facilities_map_reduce,
+)
+
+LEARNING_RE = re.compile(r"<learning>\n(.*?)\n</learning>", re.S)
+
+
+class FakeClient:
+    """Answers map calls with one facility per learning, and merges nothing."""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def async_query_json(self, user_prompt, system_prompt=None, stream=False):
+        self.prompts.append(user_prompt)
+        if "<facilities>" in user_prompt:
+            block = user_prompt.split("<facilities>\n", 1)[1].rsplit("\n</facilities>", 1)[0]
+            return {"facilities": json.loads(block)}
+        return {"facilities": [{"name": name} for name in LEARNING_RE.findall(user_prompt)]}
+
+
+async def test_stalled_facility_merge_keeps_every_candidate():
+    learnings = [f"Supplier {i} ships feedstock to the plant by rail" for i in range(60)]
+    client = FakeClient()
+    facilities = await async_get_predicted_facilities_map_reduce(
+        client, "plant", learnings, [], partition_tokens=200
+    )
+    assert sorted(f["name"] for f in facilities) == sorted(learnings)
+    assert any("<facilities>" in p for p in client.prompts)
+
+
+class FakeResearchClient:
+    """Deterministic queries and learnings, so node keys match across runs."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def async_query_json(self, user_prompt, system_prompt=None, stream=False):
+        self.calls += 1
+        if "<query>" in user_prompt:
+            query = user_prompt.split("<query>", 1)[1].split("</query>", 1)[0]
+            return {"learnings": [f"Learning from {query}"], "followUpQuestions": [f"follow {query}"]}
+        parent = user_prompt.split("<prompt>", 1)[1].split("</prompt>", 1)[0]
+        tag = hashlib.sha256(parent.encode()).hexdigest()[:6]
+        return {"queries": [{"query": f"q{tag}{i}", "research_goal": f"goal {tag}{i}"} for i in range(4)]}
+
+
+class FakeSearch:
+    def __init__(self):
+        self.queries = []
+
+    def search(self, query, limit=5):
+        self.queries.append(query)
+        return [{"url": f"https://example.com/{query}", "title": query, "content": f"about {query}"}]
+
+
+async def research(tmp_path, budget=None):
+    client, search = FakeResearchClient(), FakeSearch()
+    checkpoint = ResearchCheckpoint("run", str(tmp_path / "checkpoints.sqlite"))
+    engine = LocalResearchEngine(
+        gemini_client=None,
+        ollama_client=client,
+        search=search,
+        budget=budget,
+        checkpoint=checkpoint,
+    )
+    try:
+        result = await engine.run("plant", breadth=2, depth=2)
+    finally:
+        checkpoint.close()
+    return result, engine, client, search
+
+
+async def test_resumed_run_does_not_redo_finished_nodes(tmp_path):
+    full, _, full_client, full_search = await research(tmp_path / "full")
+
+    _, interrupted, first_client, first_search = await research(
+        tmp_path, ResearchBudget(max_llm_calls=3)
+    )
+    assert interrupted.stop_reason == "max_llm_calls"
+    assert first_client.calls == 3 < full_client.calls
+
+    # Resuming only issues the calls and searches the first run did not finish
+    resumed, _, second_client, second_search = await research(tmp_path)
+    assert first_client.calls + second_client.calls == full_client.calls
+    assert sorted(first_search.queries + second_search.queries) == sorted(full_search.queries)
+    assert sorted(resumed["learnings"]) == sorted(full["learnings"])
+
+    # A finished run replays entirely from the checkpoint
+    replayed, _, third_client, third_search = await research(tmp_path)
+    assert third_client.calls == 0 and third_search.queries == []
+    assert sorted(replayed["learnings"]) == sorted(full["learnings"])
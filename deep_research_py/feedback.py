@@ -3,6 +3,7 @@ import openai
 import json
 from .prompt import system_prompt
 from .ai.providers import get_client_response
+from .accounting import stage
 
 
 async def generate_feedback(query: str, client: openai.OpenAI, model: str) -> List[str]:
@@ -10,18 +11,19 @@ async def generate_feedback(query: str, client: openai.OpenAI, model: str) -> Li
 
     # Run OpenAI call in thread pool since it's synchronous
 
-    response = await get_client_response(
-        client=client,
-        model=model,
-        messages=[
-            {"role": "system", "content": system_prompt()},
-            {
-                "role": "user",
-                "content": f"Given this research topic: {query}, generate 3-5 follow-up questions to better understand the user's research needs. Return the response as a JSON object with a 'questions' array field.",
-            },
-        ],
-        response_format={"type": "json_object"},
-    )
+    with stage("generate_feedback"):
+        response = await get_client_response(
+            client=client,
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt()},
+                {
+                    "role": "user",
+                    "content": f"Given this research topic: {query}, generate 3-5 follow-up questions to better understand the user's research needs. Return the response as a JSON object with a 'questions' array field.",
+                },
+            ],
+            response_format={"type": "json_object"},
+        )
 
     # Parse the JSON response
     try:
@@ -5,6 +5,7 @@ from deep_research_py.ai.providers import get_client_response
 from deep_research_py.deep_research import MODEL
 
 from deep_research_py.llm_query import Gemini, Ollama
+from deep_research_py.accounting import stage
 
 
 def generate_feedback(
@@ -27,10 +28,11 @@ def generate_feedback(
     '''
     try:
         ## return json.loads(response["message"].content).get("questions", [])
-        return client.query_json(
-            user_prompt=f"Given this research topic: {query}, generate 2-3 follow-up questions to better understand the user's research needs. Return the response as a JSON object with a 'questions' array field.",
-            system_prompt=system_prompt(),
-        ).get("questions", [])
+        with stage("generate_feedback"):
+            return client.query_json(
+                user_prompt=f"Given this research topic: {query}, generate 2-3 follow-up questions to better understand the user's research needs. Return the response as a JSON object with a 'questions' array field.",
+                system_prompt=system_prompt(),
+            ).get("questions", [])
 
     except json.JSONDecodeError as e:
         print(f"Error parsing JSON response: {e}")
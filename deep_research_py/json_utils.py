@@ -0,0 +1,364 @@
+import json
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import demjson3
+
+from deep_research_py.utils import logger
+
+try:
+    import orjson
+except ImportError:  # optional C parser, see the `json` extra
+    orjson = None
+
+JSON_OPEN_TAG = "<json_object>"
+
+# Truncated or badly quoted responses past this size go straight to demjson3
+MAX_REPAIR_CHARS = 2_000_000
+
+CLOSERS = {"{": "}", "[": "]"}
+
+ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class _JsonScanner:
+    """Shared state for scanning streamed JSON one character at a time.
+
+    Scanning starts after `start_marker` (the <json_object> tag by default) so
+    braces in any preamble the model writes first are not mistaken for JSON.
+    """
+
+    def __init__(self, start_marker: Optional[str] = JSON_OPEN_TAG):
+        self.buffer = ""
+        self.pos = 0
+        self.started = start_marker is None
+        self.start_marker = start_marker
+
+    def _append(self, chunk: str) -> bool:
+        """Add a chunk, returning True once the JSON payload has started."""
+        self.buffer += chunk
+        if not self.started:
+            idx = self.buffer.find(self.start_marker)
+            if idx < 0:
+                return False
+            self.started = True
+            self.pos = idx + len(self.start_marker)
+        return True
+
+
+class JsonArrayItemStream(_JsonScanner):
+    """Incrementally extract the objects of JSON arrays from streamed text.
+
+    Feed the response as it arrives; every object that is an element of an
+    array (e.g. each entry of `{"facilities": [...]}`) is returned as soon as
+    its closing brace is seen. Objects nested inside an element are returned
+    as part of that element.
+    """
+
+    def __init__(self, start_marker: Optional[str] = JSON_OPEN_TAG):
+        super().__init__(start_marker)
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escape = False
+        self.item_start: Optional[int] = None
+        self.item_depth = 0
+        self.items_found = 0
+
+    def feed(self, chunk: str) -> List[Dict]:
+        if not self._append(chunk):
+            return []
+
+        items = []
+        buffer = self.buffer
+        for i in range(self.pos, len(buffer)):
+            c = buffer[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                continue
+
+            if c == '"':
+                self.in_string = True
+            elif c in "{[":
+                if (
+                    c == "{"
+                    and self.item_start is None
+                    and self.stack
+                    and self.stack[-1] == "["
+                ):
+                    self.item_start = i
+                    self.item_depth = len(self.stack)
+                self.stack.append(c)
+            elif c in "}]":
+                if self.stack:
+                    self.stack.pop()
+                if (
+                    c == "}"
+                    and self.item_start is not None
+                    and len(self.stack) == self.item_depth
+                ):
+                    item = self._parse(buffer[self.item_start : i + 1])
+                    if item is not None:
+                        items.append(item)
+                    self.item_start = None
+
+        self.pos = len(buffer)
+        # Everything before an open item has been consumed
+        keep_from = self.item_start if self.item_start is not None else self.pos
+        self.buffer = buffer[keep_from:]
+        self.pos -= keep_from
+        if self.item_start is not None:
+            self.item_start = 0
+        self.items_found += len(items)
+        return items
+
+    @staticmethod
+    def _parse(text: str) -> Optional[Dict]:
+        try:
+            item = decode_json(text)
+        except Exception:
+            return None
+        return item if isinstance(item, dict) else None
+
+
+class JsonStringStream(_JsonScanner):
+    """Incrementally decode the string value of `key` from streamed JSON text.
+
+    Returns the decoded text available so far on each `feed`, so a long field
+    such as a markdown report can be shown while it is being generated.
+    """
+
+    def __init__(self, key: str, start_marker: Optional[str] = JSON_OPEN_TAG):
+        super().__init__(start_marker)
+        self.key_token = json.dumps(key)
+        self.in_value = False
+        self.done = False
+
+    def _find_value(self) -> bool:
+        idx = self.buffer.find(self.key_token, self.pos)
+        if idx < 0:
+            # Keep a possible partial key at the end of the buffer
+            self.pos = max(self.pos, len(self.buffer) - len(self.key_token))
+            return False
+
+        i = idx + len(self.key_token)
+        while i < len(self.buffer) and self.buffer[i] in " \t\r\n:":
+            i += 1
+        if i >= len(self.buffer):
+            self.pos = idx
+            return False
+        if self.buffer[i] != '"':
+            # Not a string value, look for another occurrence of the key
+            self.pos = i
+            return self._find_value()
+
+        self.pos = i + 1
+        self.in_value = True
+        return True
+
+    def feed(self, chunk: str) -> str:
+        if self.done or not self._append(chunk):
+            return ""
+        if not self.in_value and not self._find_value():
+            return ""
+
+        out = []
+        buffer = self.buffer
+        i = self.pos
+        while i < len(buffer):
+            c = buffer[i]
+            if c == '"':
+                self.done = True
+                i += 1
+                break
+            if c != "\\":
+                out.append(c)
+                i += 1
+                continue
+
+            # Wait for the rest of an escape sequence split across chunks
+            if i + 1 >= len(buffer):
+                break
+            code = buffer[i + 1]
+            if code == "u":
+                if i + 6 > len(buffer):
+                    break
+                try:
+                    out.append(chr(int(buffer[i + 2 : i + 6], 16)))
+                except ValueError:
+                    out.append(buffer[i : i + 6])
+                i += 6
+            else:
+                out.append(ESCAPES.get(code, code))
+                i += 2
+
+        self.buffer = buffer[i:]
+        self.pos = 0
+        return "".join(out)
+
+
+_tier_counts: Counter = Counter()
+_tier_lock = threading.Lock()
+
+
+def _count(tier: str) -> None:
+    with _tier_lock:
+        _tier_counts[tier] += 1
+
+
+def decode_stats() -> Dict[str, int]:
+    """How many responses each tier of `decode_json` has decoded in this process."""
+    with _tier_lock:
+        return dict(_tier_counts)
+
+
+def fast_loads(text: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _closes_string(text: str, i: int) -> bool:
+    """Whether the quote at `i` ends a string, rather than being an unescaped quote in it."""
+    j = i + 1
+    while j < len(text) and text[j] in " \t\r\n":
+        j += 1
+    return j >= len(text) or text[j] in ",:}]"
+
+
+def repair_json(text: str) -> str:
+    """Fix the mistakes LLMs commonly make in JSON, in a single pass.
+
+    Handles trailing commas, unescaped quotes and raw control characters in
+    strings, text around the payload, and output truncated mid-array/object
+    (the open string and containers are closed).
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return text
+    text = text[min(starts):]
+
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    # Where the last object key starts in `out`, and where it ends once closed
+    key_start = key_end = -1
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if in_string:
+            if c == "\\":
+                out.append(text[i : i + 2])
+                i += 2
+                continue
+            if c == '"':
+                if _closes_string(text, i):
+                    in_string = False
+                    out.append(c)
+                    key_end = len(out) if key_start >= 0 else -1
+                else:
+                    out.append('\\"')
+            elif c == "\n":
+                out.append("\\n")
+            elif c == "\r":
+                out.append("\\r")
+            elif c == "\t":
+                out.append("\\t")
+            else:
+                out.append(c)
+            i += 1
+            continue
+
+        if c == '"':
+            in_string = True
+            previous = next((o for o in reversed(out) if not o.isspace()), "")
+            key_start = len(out) if stack and stack[-1] == "}" and previous in "{," else -1
+        elif c in CLOSERS:
+            stack.append(CLOSERS[c])
+        elif c in "}]":
+            # Drop a trailing comma before the closer
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if stack:
+                stack.pop()
+            out.append(c)
+            if not stack:
+                # Ignore whatever follows the payload
+                break
+            i += 1
+            continue
+        out.append(c)
+        i += 1
+
+    if stack:
+        # Truncated: drop a dangling key, finish a dangling value, then close
+        # every container
+        if in_string and key_start >= 0:
+            del out[key_start:]
+        elif in_string:
+            if out and out[-1] == "\\":
+                out.pop()
+            out.append('"')
+        while out and out[-1].isspace():
+            out.pop()
+        if key_end == len(out) and key_start >= 0:
+            del out[key_start:]
+            while out and out[-1].isspace():
+                out.pop()
+        if out and out[-1] == ",":
+            out.pop()
+        elif out and out[-1] == ":":
+            out.append("null")
+        out.extend(reversed(stack))
+    return "".join(out)
+
+
+def decode_json(text: str) -> Any:
+    """Decode LLM JSON output, cheapest tier first.
+
+    1. the C (orjson, if installed) or stdlib parser on the text as is
+    2. the same parser after a bounded `repair_json` pass
+    3. demjson3, which is tolerant but pure Python and slow
+
+    Raises `demjson3.JSONDecodeError` if every tier fails.
+    """
+    text = text.replace("```json", "").replace("```", "").strip()
+    try:
+        value = fast_loads(text)
+        _count("fast")
+        return value
+    except ValueError:
+        pass
+
+    if len(text) <= MAX_REPAIR_CHARS:
+        try:
+            value = fast_loads(repair_json(text))
+            _count("repaired")
+            return value
+        except ValueError:
+            pass
+
+    try:
+        value = demjson3.decode(text)
+        _count("demjson3")
+        return value
+    except demjson3.JSONDecodeError:
+        _count("failed")
+        logger.warning("Could not decode JSON with any decoder tier")
+        raise
@@ -0,0 +1,116 @@
+import json
+import random
+
+import demjson3
+import pytest
+
+from deep_research_py.json_utils import (
+    JsonArrayItemStream,
+    JsonStringStream,
+    decode_json,
+    decode_stats,
+    repair_json,
+)
+
+FACILITIES = [
+    {"name": "Plant {A}", "location": "Sauget, IL", "notes": 'says "hi" [1]'},
+    {"name": "Plant B", "location": {"city": "Freeport", "state": "TX"}, "tags": ["a", "b"]},
+    {"name": "Plant \\ C", "location": "Baton Rouge\nLA", "capacity": 1.5e3},
+]
+RESPONSE = (
+    "Sure, here is {the} list:\n<json_object>"
+    + json.dumps({"facilities": FACILITIES, "count": 3}, indent=2)
+    + "</json_object>"
+)
+REPORT = 'Line one\n"Quoted" \\ path\ttab, unicode é中 and {braces}'
+
+
+def random_chunks(text, rng):
+    chunks, i = [], 0
+    while i < len(text):
+        size = rng.randint(1, 12)
+        chunks.append(text[i : i + size])
+        i += size
+    return chunks
+
+
+def test_array_items_survive_any_chunking():
+    rng = random.Random(0)
+    for _ in range(200):
+        stream = JsonArrayItemStream()
+        items = []
+        for chunk in random_chunks(RESPONSE, rng):
+            items.extend(stream.feed(chunk))
+        assert items == FACILITIES
+        assert stream.items_found == 3
+
+
+def test_array_items_are_returned_as_they_close():
+    stream = JsonArrayItemStream(start_marker=None)
+    text = json.dumps({"facilities": FACILITIES})
+    first_end = text.index("}, {") + 1
+    assert stream.feed(text[:first_end]) == [FACILITIES[0]]
+    assert stream.feed(text[first_end:]) == FACILITIES[1:]
+
+
+def test_braces_before_the_tag_are_ignored():
+    stream = JsonArrayItemStream()
+    assert stream.feed('[{"not": "json"}] ') == []
+    assert stream.feed('<json_object>{"x": [{"a": 1}]}') == [{"a": 1}]
+
+
+def test_string_value_survives_any_chunking():
+    text = "<json_object>" + json.dumps({"title": "T", "reportMarkdown": REPORT}) + "</json_object>"
+    rng = random.Random(1)
+    for _ in range(200):
+        stream = JsonStringStream("reportMarkdown")
+        decoded = "".join(stream.feed(chunk) for chunk in random_chunks(text, rng))
+        assert decoded == REPORT
+        assert stream.done
+
+
+def test_string_stream_skips_non_string_values():
+    stream = JsonStringStream("report", start_marker=None)
+    assert stream.feed('{"report": {"nested": 1}, "x": "report", "report": "text"}') == "text"
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{"a": [1, 2,], "b": {"c": 3,},}', {"a": [1, 2], "b": {"c": 3}}),
+        ('Here you go: {"a": 1} hope it helps {"b": 2}', {"a": 1}),
+        ('{"quote": "he said "no" to it"}', {"quote": 'he said "no" to it'}),
+        # Raw control characters inside a string
+        ('{"text": "line one\nline\ttwo"}', {"text": "line one\nline\ttwo"}),
+        ('{"items": [{"a": 1}, {"a": 2', {"items": [{"a": 1}, {"a": 2}]}),
+        ('{"items": ["one", "tw', {"items": ["one", "tw"]}),
+        ('{"done": true, "dangling', {"done": True}),
+        ('{"done": true, "key": ', {"done": True, "key": None}),
+        ('{"done": true, "key"', {"done": True}),
+    ],
+)
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+def tier_delta(text):
+    before = decode_stats()
+    value = decode_json(text)
+    after = decode_stats()
+    changed = [tier for tier in after if after[tier] != before.get(tier, 0)]
+    assert len(changed) == 1
+    return value, changed[0]
+
+
+def test_decode_json_tiers():
+    assert tier_delta('```json\n{"a": 1}\n```') == ({"a": 1}, "fast")
+    assert tier_delta('{"a": [1, 2,]}') == ({"a": [1, 2]}, "repaired")
+    # Unquoted keys are beyond the repair pass
+    assert tier_delta("{a: 1}") == ({"a": 1}, "demjson3")
+
+
+def test_decode_json_failure_is_counted():
+    before = decode_stats().get("failed", 0)
+    with pytest.raises(demjson3.JSONDecodeError):
+        decode_json("no json here")
+    assert decode_stats()["failed"] == before + 1
@@ -1,29 +1,187 @@
 import google
 from google import genai
-from ollama import chat
+import httpx
+from ollama import Client as OllamaClient, AsyncClient as AsyncOllamaClient
 from pprint import pprint
 
-from typing import Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, Union
+import asyncio
 import json
+import time
 import demjson3
 import os
 
+from deep_research_py.cache import LLMCache, get_llm_cache
+from deep_research_py.accounting import count_tokens, record_llm_call
+from deep_research_py.json_utils import decode_json
+
+
+JSON_TAGS_INSTRUCTION = "Please wrap the json data in <json_object></json_object> tags. YOU MUST INCLUDE THESE TAGS!"
+
 
 def clean_and_read_json(text: str) -> dict:
 
-    ## Identify quotes which should be escaped and escape
-    text = text.replace("```json", "").replace("```", "").strip()
+    ## Fast parser first, then a repair pass, demjson3 only as a last resort
     try:
-        return demjson3.decode(text)
+        return decode_json(text)
     except demjson3.JSONDecodeError as e:
         print(f"Error parsing JSON: {e}")
         print(f"Raw text: {text}")
         raise e
 
+
+def json_system_prompt(system_prompt: Optional[str] = None) -> str:
+    """Append the <json_object> tag instruction to a system prompt."""
+    if system_prompt is not None:
+        return f"{system_prompt}\n{JSON_TAGS_INSTRUCTION}"
+    return JSON_TAGS_INSTRUCTION
+
+
+def read_tagged_json(text: str) -> dict:
+    """Parse the JSON payload wrapped in <json_object></json_object> tags."""
+    try:
+        return clean_and_read_json(
+                text.split("<json_object>")[-1].split("</json_object>")[0].strip()
+                )
+    except json.JSONDecodeError as e:
+        print(f"`query_json()` ASSUMES YOU ARE REQUESTING A JSON RESPONSE OBJECT")
+        print(f"Raw response: {text}")
+        raise e
+
+
+def cached_json(
+        cache: LLMCache,
+        model: str,
+        system_prompt: Optional[str],
+        user_prompt: str,
+        ) -> Optional[dict]:
+    """Look up a cached response, charging hits to the run as free calls."""
+    cached = cache.get(model, system_prompt, user_prompt)
+    if cached is not None:
+        record_llm_call(model, 0, 0, 0.0, cached=True)
+    return cached
+
+
+def tagged_json(json_data: dict) -> str:
+    """Render a parsed response back as the tagged text a model would stream."""
+    return f"<json_object>{json.dumps(json_data)}</json_object>"
+
+
+def _cache_streamed(client, model, system_prompt, user_prompt, text) -> None:
+    try:
+        json_data = read_tagged_json(text)
+    except Exception:
+        return
+    client.cache.set(model, system_prompt, user_prompt, json_data)
+
+
+def stream_query_json(
+        client: "Union[Gemini, Ollama]",
+        user_prompt: str,
+        system_prompt: Optional[str] = None,
+        use_cache: bool = True,
+        ) -> Iterator[str]:
+    """Stream the raw text of a `query_json` call, caching the parsed result.
+
+    A cache hit is replayed as a single chunk of tagged JSON, so incremental
+    parsers see the same text either way.
+    """
+    model = client.model
+    if use_cache:
+        cached = cached_json(client.cache, model, system_prompt, user_prompt)
+        if cached is not None:
+            yield tagged_json(cached)
+            return
+
+    parts = []
+    for chunk in client.stream_text(user_prompt, system_prompt):
+        parts.append(chunk)
+        yield chunk
+    _cache_streamed(client, model, system_prompt, user_prompt, "".join(parts))
+
+
+async def async_stream_query_json(
+        client: "Union[Gemini, Ollama]",
+        user_prompt: str,
+        system_prompt: Optional[str] = None,
+        use_cache: bool = True,
+        ) -> AsyncIterator[str]:
+    """Async `stream_query_json`."""
+    model = client.model
+    if use_cache:
+        cached = cached_json(client.cache, model, system_prompt, user_prompt)
+        if cached is not None:
+            yield tagged_json(cached)
+            return
+
+    parts = []
+    async for chunk in client.async_stream_text(user_prompt, system_prompt):
+        parts.append(chunk)
+        yield chunk
+    _cache_streamed(client, model, system_prompt, user_prompt, "".join(parts))
+
+
+def record_usage(
+        model: str,
+        system_prompt: Optional[str],
+        user_prompt: str,
+        response_text: str,
+        started: float,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+        ) -> None:
+    """Record a call, counting tokens locally when the provider reports no usage."""
+    if prompt_tokens is None:
+        prompt_tokens = count_tokens(json_system_prompt(system_prompt)) + count_tokens(user_prompt)
+    if completion_tokens is None:
+        completion_tokens = count_tokens(response_text)
+    record_llm_call(model, prompt_tokens, completion_tokens, time.perf_counter() - started)
+
+
+class LoopClients:
+    """Pooled async clients, one per event loop.
+
+    An async HTTP pool is bound to the event loop it was first used on, so
+    each running loop gets its own client. Clients are kept until `aclose`,
+    which closes all of them, rather than being dropped when the loop changes.
+    """
+
+    def __init__(self, factory: Callable[[], Any], close: Callable[[Any], Awaitable[None]]):
+        self.factory = factory
+        self.close = close
+        self._clients: Dict[asyncio.AbstractEventLoop, Any] = {}
+
+    def get(self) -> Any:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = self.factory()
+        return client
+
+    async def aclose(self) -> None:
+        loop = asyncio.get_running_loop()
+        clients, self._clients = self._clients, {}
+        for client_loop, client in clients.items():
+            try:
+                if client_loop is loop or client_loop.is_closed():
+                    ## A pool whose loop has already gone can only be closed from here
+                    await self.close(client)
+                elif client_loop.is_running():
+                    await asyncio.wrap_future(
+                            asyncio.run_coroutine_threadsafe(self.close(client), client_loop)
+                            )
+                else:
+                    self._clients[client_loop] = client
+            except Exception as e:
+                print(f"Error closing async client: {e}")
+
+
 class Gemini:
-    def __init__(self):
+    def __init__(self, cache: Optional[LLMCache] = None):
+        self.cache = cache or get_llm_cache()
+        self.api_key = os.environ.get("GEMINI_API_KEY")
         self.client = genai.Client(
-                api_key=os.environ.get("GEMINI_API_KEY"),
+                api_key=self.api_key,
                 )
         self.models = [
                 "gemini-2.5-flash-preview-04-17",
@@ -33,6 +191,100 @@ class Gemini:
                 ]
         self.model_idx = 0
 
+        ## The async client keeps a pooled HTTP session which is bound to the
+        ## event loop it was first used on, so one is kept per running loop.
+        self._async_clients = LoopClients(
+                lambda: genai.Client(api_key=self.api_key).aio,
+                lambda client: client.aclose(),
+                )
+
+    @property
+    def model(self) -> str:
+        return self.models[self.model_idx]
+
+    def async_client(self) -> "genai.client.AsyncClient":
+        """Get the pooled async client for the running event loop."""
+        return self._async_clients.get()
+
+    async def aclose(self) -> None:
+        """Close the pooled async clients of every loop."""
+        await self._async_clients.aclose()
+
+    def _record_usage(self, model, system_prompt, user_prompt, text, response, started) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        record_usage(
+                model,
+                system_prompt,
+                user_prompt,
+                text,
+                started,
+                prompt_tokens=getattr(usage, "prompt_token_count", None),
+                completion_tokens=getattr(usage, "candidates_token_count", None),
+                )
+
+    def _config(self, system_prompt: Optional[str]) -> "genai.types.GenerateContentConfig":
+        return genai.types.GenerateContentConfig(
+                system_instruction=[json_system_prompt(system_prompt)],
+                )
+
+    def stream_text(
+            self,
+            user_prompt: str,
+            system_prompt: Optional[str] = None,
+            attempt_idx: int = 0,
+            ) -> Iterator[str]:
+        """Yield the raw response text of a JSON query as it is generated."""
+        model = self.model
+        started = time.perf_counter()
+        parts, last = [], None
+        try:
+            for chunk in self.client.models.generate_content_stream(
+                model=model,
+                contents=f"{user_prompt}\n",
+                config=self._config(system_prompt),
+            ):
+                last = chunk
+                if chunk.text:
+                    parts.append(chunk.text)
+                    yield chunk.text
+        except Exception as e:
+            self._on_error(e, attempt_idx)
+
+        self._record_usage(model, system_prompt, user_prompt, "".join(parts), last, started)
+
+    async def async_stream_text(
+            self,
+            user_prompt: str,
+            system_prompt: Optional[str] = None,
+            attempt_idx: int = 0,
+            ) -> AsyncIterator[str]:
+        """Async `stream_text` using the pooled async client."""
+        model = self.model
+        started = time.perf_counter()
+        parts, last = [], None
+        try:
+            async for chunk in await self.async_client().models.generate_content_stream(
+                model=model,
+                contents=f"{user_prompt}\n",
+                config=self._config(system_prompt),
+            ):
+                last = chunk
+                if chunk.text:
+                    parts.append(chunk.text)
+                    yield chunk.text
+        except Exception as e:
+            self._on_error(e, attempt_idx)
+
+        self._record_usage(model, system_prompt, user_prompt, "".join(parts), last, started)
+
+    def _on_error(self, e: Exception, attempt_idx: int) -> None:
+        self.model_idx = (self.model_idx + 1) % len(self.models)
+        print(f"This is the rate limit exception: {e}")
+        if attempt_idx == 2:
+            print(f"Tried 3 models, but all failed. Exiting.")
+            raise RuntimeError(f"Rate limit error: {e}") from e
+
+        raise RuntimeError(e) from e
 
     def query_json(
             self, 
@@ -40,43 +292,75 @@ class Gemini:
             system_prompt: Optional[str] = None, 
             stream: bool = False,
             attempt_idx: int = 0,
-            ) -> str:
+            use_cache: bool = True,
+            ) -> dict:
         prompt = f"{user_prompt}\n"
 
-        if system_prompt is not None:
-            system_prompt += "\nPlease wrap the json data in <json_object></json_object> tags. YOU MUST INCLUDE THESE TAGS!"
+        if use_cache:
+            cached = cached_json(self.cache, self.model, system_prompt, user_prompt)
+            if cached is not None:
+                return cached
+
+        model = self.model
+        if stream:
+            text = "".join(self.stream_text(user_prompt, system_prompt, attempt_idx))
         else:
-            system_prompt = "Please wrap the json data in <json_object></json_object> tags. YOU MUST INCLUDE THESE TAGS!"
+            started = time.perf_counter()
+            try:
+                response = self.client.models.generate_content(
+                    model=model, 
+                    contents=prompt,
+                    config=self._config(system_prompt),
+                )
+            except Exception as e:
+                self._on_error(e, attempt_idx)
 
-        try:
-            response = self.client.models.generate_content(
-                model=self.models[self.model_idx], 
-                contents=prompt,
-                config=genai.types.GenerateContentConfig(
-                    system_instruction=[system_prompt],
-                ),
-            )
-        except Exception as e:
-            self.model_idx = (self.model_idx + 1) % len(self.models)
-            print(f"This is the rate limit exception: {e}")
-            if attempt_idx == 2:
-                print(f"Tried 3 models, but all failed. Exiting.")
-                raise RuntimeError(f"Rate limit error: {e}") from e
+            text = response.text
+            self._record_usage(model, system_prompt, user_prompt, text, response, started)
+        json_data = read_tagged_json(text)
 
-            raise RuntimeError(e) from e
+        print(f"Response: {json.dumps(json_data, indent=2)}")
+        self.cache.set(model, system_prompt, user_prompt, json_data)
+        return json_data 
 
-            return self.query_json(user_prompt, system_prompt, stream, attempt_idx + 1)
+    async def async_query_json(
+            self, 
+            user_prompt: str, 
+            system_prompt: Optional[str] = None, 
+            stream: bool = False,
+            attempt_idx: int = 0,
+            use_cache: bool = True,
+            ) -> dict:
+        """Awaitable `query_json` using the pooled async client."""
+        prompt = f"{user_prompt}\n"
 
-        try:
-            json_data = clean_and_read_json(
-                    response.text.split("<json_object>")[-1].split("</json_object>")[0].strip()
-                    )
-        except json.JSONDecodeError as e:
-            print(f"`query_json()` ASSUMES YOU ARE REQUESTING A JSON RESPONSE OBJECT")
-            print(f"Raw response: {response}")
-            raise e
+        if use_cache:
+            cached = cached_json(self.cache, self.model, system_prompt, user_prompt)
+            if cached is not None:
+                return cached
+
+        model = self.model
+        if stream:
+            text = "".join([
+                chunk async for chunk in self.async_stream_text(user_prompt, system_prompt, attempt_idx)
+                ])
+        else:
+            started = time.perf_counter()
+            try:
+                response = await self.async_client().models.generate_content(
+                    model=model, 
+                    contents=prompt,
+                    config=self._config(system_prompt),
+                )
+            except Exception as e:
+                self._on_error(e, attempt_idx)
+
+            text = response.text
+            self._record_usage(model, system_prompt, user_prompt, text, response, started)
+        json_data = read_tagged_json(text)
 
         print(f"Response: {json.dumps(json_data, indent=2)}")
+        self.cache.set(model, system_prompt, user_prompt, json_data)
         return json_data 
 
     def query(
@@ -115,32 +399,49 @@ class Gemini:
 
 
 class Ollama:
-    def __init__(self, model: str = "gemma3:12b"):
+    def __init__(
+            self,
+            model: str = "gemma3:12b",
+            host: Optional[str] = None,
+            max_connections: int = 16,
+            cache: Optional[LLMCache] = None,
+            ):
         self.model = model
+        self.cache = cache or get_llm_cache()
+        self.host = host
+        self.max_connections = max_connections
+        self.client = OllamaClient(host=host)
+
+        ## See `Gemini.__init__`, the async pool is bound to its event loop.
+        self._async_clients = LoopClients(
+                lambda: AsyncOllamaClient(
+                    host=self.host,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                        ),
+                    ),
+                lambda client: client.close(),
+                )
 
-    def query_json(self, user_prompt: str, system_prompt: Optional[str] = None, stream: bool = False) -> str:
-        prompt = []
+    def async_client(self) -> AsyncOllamaClient:
+        """Get the pooled async client for the running event loop."""
+        return self._async_clients.get()
 
-        if system_prompt is not None:
-            system_prompt += "\nPlease wrap the json data in <json_object></json_object> tags. YOU MUST INCLUDE THESE TAGS!"
-        else:
-            system_prompt = "Please wrap the json data in <json_object></json_object> tags. YOU MUST INCLUDE THESE TAGS!"
+    async def aclose(self) -> None:
+        """Close the pooled async clients of every loop."""
+        await self._async_clients.aclose()
 
-        prompt.append({"role": "system", "content": system_prompt})
-        prompt.append({"role": "user", "content": user_prompt})
+    def _messages(self, user_prompt: str, system_prompt: Optional[str]) -> list:
+        prompt = [
+                {"role": "system", "content": json_system_prompt(system_prompt)},
+                {"role": "user", "content": user_prompt},
+                ]
         print(f"Prompt: {prompt}")
+        return prompt
 
-        response = chat(model=self.model, messages=prompt, stream=stream)["message"].content
-
-        try:
-            json_data = clean_and_read_json(
-                    response.split("<json_object>")[-1].split("</json_object>")[0].strip()
-                    )
-
-        except json.JSONDecodeError as e:
-            print(f"`query_json()` ASSUMES YOU ARE REQUESTING A JSON RESPONSE OBJECT")
-            print(f"Raw response: {response}")
-            raise e
+    def _read_response(self, response: str) -> dict:
+        json_data = read_tagged_json(response)
 
         print(f"Response: {json.dumps(json_data, indent=2)}")
 
@@ -148,6 +449,85 @@ class Ollama:
 
         return json_data 
 
+    def _record_usage(self, system_prompt, user_prompt, text, response, started) -> None:
+        ## With `stream=True` the token counts arrive on the final (done) chunk
+        record_usage(
+                self.model,
+                system_prompt,
+                user_prompt,
+                text,
+                started,
+                prompt_tokens=response.get("prompt_eval_count") if response else None,
+                completion_tokens=response.get("eval_count") if response else None,
+                )
+
+    def stream_text(self, user_prompt: str, system_prompt: Optional[str] = None) -> Iterator[str]:
+        """Yield the raw response text of a JSON query as it is generated."""
+        prompt = self._messages(user_prompt, system_prompt)
+        started = time.perf_counter()
+        parts, last = [], None
+        for chunk in self.client.chat(model=self.model, messages=prompt, stream=True):
+            last = chunk
+            text = chunk["message"].content
+            if text:
+                parts.append(text)
+                yield text
+
+        self._record_usage(system_prompt, user_prompt, "".join(parts), last, started)
+
+    async def async_stream_text(self, user_prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        """Async `stream_text` using the pooled async client."""
+        prompt = self._messages(user_prompt, system_prompt)
+        started = time.perf_counter()
+        parts, last = [], None
+        async for chunk in await self.async_client().chat(model=self.model, messages=prompt, stream=True):
+            last = chunk
+            text = chunk["message"].content
+            if text:
+                parts.append(text)
+                yield text
+
+        self._record_usage(system_prompt, user_prompt, "".join(parts), last, started)
+
+    def query_json(self, user_prompt: str, system_prompt: Optional[str] = None, stream: bool = False, use_cache: bool = True) -> dict:
+        if use_cache:
+            cached = cached_json(self.cache, self.model, system_prompt, user_prompt)
+            if cached is not None:
+                return cached
+
+        if stream:
+            text = "".join(self.stream_text(user_prompt, system_prompt))
+        else:
+            prompt = self._messages(user_prompt, system_prompt)
+            started = time.perf_counter()
+            response = self.client.chat(model=self.model, messages=prompt)
+            text = response["message"].content
+            self._record_usage(system_prompt, user_prompt, text, response, started)
+        json_data = self._read_response(text)
+
+        self.cache.set(self.model, system_prompt, user_prompt, json_data)
+        return json_data
+
+    async def async_query_json(self, user_prompt: str, system_prompt: Optional[str] = None, stream: bool = False, use_cache: bool = True) -> dict:
+        """Awaitable `query_json` using the pooled async client."""
+        if use_cache:
+            cached = cached_json(self.cache, self.model, system_prompt, user_prompt)
+            if cached is not None:
+                return cached
+
+        if stream:
+            text = "".join([chunk async for chunk in self.async_stream_text(user_prompt, system_prompt)])
+        else:
+            prompt = self._messages(user_prompt, system_prompt)
+            started = time.perf_counter()
+            response = await self.async_client().chat(model=self.model, messages=prompt)
+            text = response["message"].content
+            self._record_usage(system_prompt, user_prompt, text, response, started)
+        json_data = self._read_response(text)
+
+        self.cache.set(self.model, system_prompt, user_prompt, json_data)
+        return json_data
+
 
 
 if __name__ == "__main__":